@@ -0,0 +1,74 @@
+"""
+Fixtures compartilhadas dos testes com HTTP simulado (requests/Ollama), sem Jira nem Ollama de verdade.
+"""
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+
+def _resposta(status_code=200, payload=None, linhas=None):
+    """
+    Resposta simulada do requests. payload: corpo JSON (.json() e .content).
+    linhas: pedaços NDJSON de iter_lines() (stream); sem linhas, o próprio payload numa linha só.
+    Os pedaços já entregues por iter_lines() ficam em .lidas.
+    """
+    r = MagicMock()
+    r.status_code = status_code
+    r.__enter__.return_value = r
+    payload = {} if payload is None else payload
+    r.json.return_value = payload
+    r.content = json.dumps(payload).encode()
+    r.lidas = []
+    linhas = [payload] if linhas is None else linhas
+
+    def iter_lines(*args, **kwargs):
+        for item in linhas:
+            r.lidas.append(item)
+            yield json.dumps(item).encode()
+    r.iter_lines.side_effect = iter_lines
+    return r
+
+
+def _sessao(respostas):
+    """
+    Sessão simulada: get/post devolvem a resposta do primeiro sufixo de URL que casar (404 se nenhum);
+    uma exceção no lugar da resposta é levantada. As URLs chamadas ficam em .urls.
+    """
+    sessao = MagicMock()
+    sessao.urls = []
+
+    def request(url, *args, **kwargs):
+        sessao.urls.append(url)
+        for sufixo, r in respostas.items():
+            if url.endswith(sufixo):
+                if isinstance(r, Exception):
+                    raise r
+                return r
+        return _resposta(404)
+    sessao.get.side_effect = request
+    sessao.post.side_effect = request
+    return sessao
+
+
+@pytest.fixture
+def resposta_http():
+    """Fábrica de respostas simuladas: resposta_http(status_code=200, payload=None, linhas=None)."""
+    return _resposta
+
+
+@pytest.fixture
+def sessao_http():
+    """Fábrica de sessões simuladas: sessao_http({'/api/chat': resposta, ...})."""
+    return _sessao
+
+
+@pytest.fixture(autouse=True)
+def memos_limpos():
+    """Cada teste começa e termina com os memos em memória do l1_dashboard (Ollama, SLA) vazios."""
+    import l1_dashboard as dash
+    dash.clear_ollama_cache()
+    dash.clear_sla_cache()
+    yield
+    dash.clear_ollama_cache()
+    dash.clear_sla_cache()
@@ -1,21 +1,29 @@
 #!/usr/bin/env python3
 """Debug: imprime o que a API do Jira retorna para um issue (campos de tempo)."""
 import json
+import re
 import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from dotenv import load_dotenv
-load_dotenv()
+load_dotenv()  # não sobrescreve variáveis já definidas no ambiente
 
 from l1_dashboard import (
     JIRA_URL,
     get_jira_credentials,
-    resolve_custom_fields,
+    fetch_issue,
     search_jql,
     NUBANK_TIME_TO_RESOLUTION_FID,
     NUBANK_TIME_TO_FIRST_RESPONSE_FID,
 )
 
+# Campos "parecidos" com os de tempo (variações de ID ou nome); re é C, uma busca por key
+_RELEVANT_FIELD_RE = re.compile(r'10886|10884|time.*(?:resolution|response)', re.IGNORECASE)
+_KNOWN_FIDS = frozenset((NUBANK_TIME_TO_RESOLUTION_FID, NUBANK_TIME_TO_FIRST_RESPONSE_FID))
+# Nome dos tipos que o JSON do Jira produz (evita type(val).__name__ no loop)
+_TNAME = {str: 'str', int: 'int', float: 'float', bool: 'bool', dict: 'dict', list: 'list', type(None): 'NoneType'}
+
+
 def main():
     key = sys.argv[1] if len(sys.argv) > 1 else None
     if not key:
@@ -24,17 +32,33 @@ def main():
         print("Se não passar key, busca 1 issue pela JQL 'order by created DESC' e inspeciona.")
         key = None
     auth = get_jira_credentials()
-    field_ids = resolve_custom_fields(auth)
-    jql = f'key = {key}' if key else 'order by created DESC'
-    issues = search_jql(auth, jql, field_ids, limit=1)
-    if not issues:
+    # Os IDs inspecionados são fixos: não precisa de GET /rest/api/3/field (resolve_custom_fields).
+    # Com JIRA_DEBUG_SCAN_ALL pede todos os campos (a varredura abaixo procura campo renomeado)
+    scan_all = bool(os.getenv('JIRA_DEBUG_SCAN_ALL'))
+    wanted = None if scan_all else [NUBANK_TIME_TO_RESOLUTION_FID, NUBANK_TIME_TO_FIRST_RESPONSE_FID, 'created', 'resolutiondate', 'summary']
+    if key:
+        # Com key: GET direto no issue, sem JQL
+        issue = fetch_issue(auth, key, fields=wanted)
+    else:
+        field_ids = {
+            'Time to resolution': NUBANK_TIME_TO_RESOLUTION_FID,
+            'Time to first response': NUBANK_TIME_TO_FIRST_RESPONSE_FID,
+        }
+        issues = search_jql(auth, 'order by created DESC', field_ids, limit=1, fields=wanted or ['*all'])
+        issue = issues[0] if issues else None
+    if not issue:
         print("Nenhum issue encontrado.")
         return
-    issue = issues[0]
+    if wanted and not _KNOWN_FIDS.issubset(issue.get('fields') or {}):
+        # Algum ID conhecido não veio: relê o issue com todos os campos para a varredura achar o campo renomeado
+        issue = fetch_issue(auth, issue.get('key'), fields=None) or issue
     fields = issue.get('fields', {})
-    print("Issue:", issue.get('key'))
-    print("Campos presentes (keys):", sorted(fields.keys()))
-    print()
+    # Monta a saída inteira e escreve de uma vez (um write em vez de ~15 prints)
+    lines = [
+        f"Issue: {issue.get('key')}",
+        f"Campos presentes (keys): {list(fields)}",
+        "",
+    ]
     for label, fid in [
         ("Time to resolution (customfield_10886)", NUBANK_TIME_TO_RESOLUTION_FID),
         ("Time to first response (customfield_10884)", NUBANK_TIME_TO_FIRST_RESPONSE_FID),
@@ -42,16 +66,19 @@ def main():
         ("resolutiondate", "resolutiondate"),
     ]:
         val = fields.get(fid)
-        print(f"{label}:")
-        print(f"  tipo={type(val).__name__!r}  valor={val!r}")
+        lines.append(f"{label}:")
+        tname = _TNAME.get(type(val)) or type(val).__name__
+        lines.append(f"  tipo={tname!r}  valor={val!r}")
         if isinstance(val, dict):
-            print(f"  (dict keys: {list(val.keys())})")
-        print()
-    # Qualquer outro customfield que contenha 10886 ou 10884
-    for k, v in fields.items():
-        if '10886' in k or '10884' in k or ('time' in k.lower() and ('resolution' in k.lower() or 'response' in k.lower())):
-            if k not in (NUBANK_TIME_TO_RESOLUTION_FID, NUBANK_TIME_TO_FIRST_RESPONSE_FID):
-                print(f"Outro campo relevante: {k} = {v!r}")
+            lines.append(f"  (dict keys: {list(val.keys())})")
+        lines.append("")
+    # Qualquer outro customfield que contenha 10886 ou 10884; só varre se faltar algum ID conhecido
+    # (ou se JIRA_DEBUG_SCAN_ALL estiver definido, para caçar campo renomeado)
+    if not _KNOWN_FIDS.issubset(fields) or os.getenv('JIRA_DEBUG_SCAN_ALL'):
+        for k, v in fields.items():
+            if k not in _KNOWN_FIDS and _RELEVANT_FIELD_RE.search(k):
+                lines.append(f"Outro campo relevante: {k} = {v!r}")
+    sys.stdout.write("\n".join(lines) + "\n")
 
 if __name__ == "__main__":
     main()
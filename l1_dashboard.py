@@ -10,16 +10,35 @@ JQL: (component not in (gadgets-devices) OR component IS EMPTY) AND "Support Lev
 """
 
 import argparse
+import bisect
+import calendar
+import functools
+import hashlib
+import heapq
+import json
 import os
+import re
+import statistics
 import sys
+import threading
 import time
 import unicodedata
+from collections import Counter, OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
 
 # Add parent so we can import jira_utils
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 load_dotenv()
 
@@ -57,38 +76,313 @@ COLUMNS = [
 ]
 
 
-def get_field_id_by_name(fields_list, name):
-    """Return field id for a given field name (exact, then case-insensitive, then partial)."""
-    if not name:
+def _build_http_session(pool_maxsize=16, retries=None):
+    """requests.Session com pool de conexões (keep-alive) montado em http:// e https://."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=pool_maxsize, max_retries=retries or 0)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+# Sessão compartilhada para Jira/Confluence: reaproveita TCP+TLS entre chamadas (inclusive nas threads de SLA).
+# Retry só para falhas de conexão/leitura; 429 continua tratado em search_jql (Retry-After).
+_JIRA_SESSION = _build_http_session(pool_maxsize=32, retries=Retry(total=3, backoff_factor=0.2))
+# Sessão do Ollama: sem retry no adapter (as funções já tentam vários endpoints/modelos), só keep-alive
+_OLLAMA_SESSION = _build_http_session(pool_maxsize=32)
+_OLLAMA_TAGS_TTL = 60  # segundos; lista de modelos instalados muda raramente (clear_ollama_cache força nova leitura)
+_ollama_tags_cache = {}
+_ollama_tags_lock = threading.Lock()  # threads em paralelo (pontos, notas em lote) fazem um único GET /api/tags por base
+
+
+def _ollama_installed_models(base):
+    """
+    GET {base}/api/tags com cache por base (TTL _OLLAMA_TAGS_TTL). Retorna (status_code, [nomes de modelos instalados]).
+    Erros de conexão/timeout são propagados (não cacheados).
+    """
+    hit = _ollama_tags_cache.get(base)
+    if hit and hit[0] > time.monotonic():
+        return 200, list(hit[1])
+    with _ollama_tags_lock:
+        # Outra thread pode ter preenchido o cache enquanto esta esperava o lock
+        hit = _ollama_tags_cache.get(base)
+        now = time.monotonic()
+        if hit and hit[0] > now:
+            return 200, list(hit[1])
+        r = _OLLAMA_SESSION.get(f'{base}/api/tags', timeout=5)
+        models = []
+        if r.status_code == 200:
+            for item in (_response_json(r).get('models') or []):
+                name = (item.get('name') or item.get('model') or '').strip()
+                if name and name not in models:
+                    models.append(name)
+            _ollama_tags_cache[base] = (now + _OLLAMA_TAGS_TTL, models)
+    return r.status_code, list(models)
+
+
+# Modelos tentados depois dos instalados (e do pedido), nesta ordem
+_OLLAMA_FALLBACK_MODELS = ('llama3.2', 'llama3.1', 'llama3', 'qwen2.5:0.5b', 'qwen2.5', 'mistral', 'gemma2:2b')
+
+
+def _build_models_to_try(installed, requested_model=None):
+    """Instalados primeiro, depois o modelo pedido e os fallbacks; sem vazios nem repetidos. installed é tupla."""
+    seen = set()
+    models = []
+    for name in installed + ((requested_model,) if requested_model else ()) + _OLLAMA_FALLBACK_MODELS:
+        n = (name or '').strip()
+        if n and n not in seen:
+            seen.add(n)
+            models.append(n)
+    return tuple(models)
+
+
+# Endpoints do Ollama na ordem padrão: (sufixo, monta payload, extrai texto da resposta 200)
+def _ollama_payload_generate(model, prompt, options):
+    payload = {'model': model, 'prompt': prompt, 'stream': False}
+    if options:
+        payload['options'] = options
+    return payload
+
+
+def _ollama_payload_chat(model, prompt, options):
+    payload = {'model': model, 'messages': [{'role': 'user', 'content': prompt}], 'stream': False}
+    if options:
+        payload['options'] = options
+    return payload
+
+
+def _ollama_payload_openai(model, prompt, options):
+    return {'model': model, 'messages': [{'role': 'user', 'content': prompt}], 'stream': False, 'temperature': 0}
+
+
+def _ollama_content_generate(data):
+    return (data.get('response') or '').strip()
+
+
+def _ollama_content_chat(data):
+    msg = data.get('message') or {}
+    return (msg.get('content') or '').strip()
+
+
+def _ollama_content_openai(data):
+    """Texto da resposta /v1/chat/completions; None se veio {"error": ...} (ex.: modelo não encontrado)."""
+    if data.get('error'):
         return None
-    name_clean = name.strip().lower()
-    # 1) Exact match
-    for f in fields_list:
-        if f.get('name') == name:
-            return f.get('id')
-    # 2) Case-insensitive
-    for f in fields_list:
-        if (f.get('name') or '').strip().lower() == name_clean:
-            return f.get('id')
-    # 3) Partial: search name inside field name (e.g. "Time to resolution" in "Time to resolution (days)")
+    choices = data.get('choices') or []
+    if not choices:
+        return ''
+    return ((choices[0].get('message') or {}).get('content') or '').strip()
+
+
+_OLLAMA_ENDPOINTS = (
+    ('/api/generate', _ollama_payload_generate, _ollama_content_generate),   # mais estável em muitas instalações
+    ('/api/chat', _ollama_payload_chat, _ollama_content_chat),
+    ('/v1/chat/completions', _ollama_payload_openai, _ollama_content_openai),  # API compatível com OpenAI (alguns proxies só expõem isso)
+)
+# Último endpoint que respondeu com sucesso por base URL: passa a ser tentado primeiro
+_ollama_preferred_endpoint = {}
+
+
+def _ollama_endpoints_for(base):
+    """_OLLAMA_ENDPOINTS com o endpoint que já funcionou para esta base na frente."""
+    preferred = _ollama_preferred_endpoint.get(base)
+    if not preferred or preferred == _OLLAMA_ENDPOINTS[0][0]:
+        return _OLLAMA_ENDPOINTS
+    return tuple(sorted(_OLLAMA_ENDPOINTS, key=lambda e: e[0] != preferred))
+
+
+def clear_ollama_cache():
+    """Esvazia os caches do Ollama (modelos instalados e endpoint preferido), ex.: após instalar um modelo novo."""
+    with _ollama_tags_lock:
+        _ollama_tags_cache.clear()
+    _ollama_preferred_endpoint.clear()
+
+
+def _response_json(r):
+    """Decodifica o corpo JSON da resposta HTTP; usa orjson (C) quando instalado, senão r.json()."""
+    if orjson is not None:
+        return orjson.loads(r.content)
+    return r.json()
+
+
+_JSON_HEADERS = {'Content-Type': 'application/json'}
+
+
+def _ollama_post(url, payload, timeout, stream=False):
+    """POST JSON ao Ollama pela sessão compartilhada; corpo serializado com orjson (C, já em bytes) quando instalado."""
+    if orjson is None:
+        return _OLLAMA_SESSION.post(url, json=payload, timeout=timeout, stream=stream)
+    return _OLLAMA_SESSION.post(url, data=orjson.dumps(payload), headers=_JSON_HEADERS, timeout=timeout, stream=stream)
+
+
+def _ollama_post_once(url, payload, extract_content, timeout):
+    """
+    Um POST ao Ollama, classificado para quem decide o próximo passo. Retorna (tipo, texto):
+    'ok' (200 com texto), 'not_found' (404), 'no_content' (200 sem texto), 'http_error' (outro status),
+    'conn_error', 'timeout' ou 'error' (JSON inválido etc.); texto só vem preenchido em 'ok'.
+    """
+    try:
+        r = _ollama_post(url, payload, timeout)
+        if r.status_code == 404:
+            return 'not_found', None
+        if r.status_code != 200:
+            return 'http_error', None
+        content = extract_content(_response_json(r))
+        if content is None:
+            return 'no_content', None
+        return 'ok', content
+    except requests.exceptions.ConnectionError:
+        return 'conn_error', None
+    except requests.exceptions.Timeout:
+        return 'timeout', None
+    except Exception:
+        return 'error', None
+
+
+# Texto de cada pedaço NDJSON com 'stream': True (sem strip: os espaços entre pedaços fazem parte do texto)
+_OLLAMA_STREAM_CHUNK = {
+    '/api/generate': lambda data: data.get('response') or '',
+    '/api/chat': lambda data: (data.get('message') or {}).get('content') or '',
+}
+
+
+def _ollama_post_stream(url, payload, extract_chunk, timeout, stop_when):
+    """
+    Como _ollama_post_once, mas com 'stream': True: junta os pedaços NDJSON à medida que chegam e fecha a conexão
+    (o Ollama interrompe a geração) assim que stop_when(texto até a última linha completa) for verdadeiro.
+    Ao parar cedo, devolve só esse texto verificado (sem o fragmento de linha incompleta que veio depois).
+    """
+    try:
+        with _ollama_post(url, dict(payload, stream=True), timeout, stream=True) as r:
+            if r.status_code == 404:
+                return 'not_found', None
+            if r.status_code != 200:
+                return 'http_error', None
+            parts = []
+            for raw in r.iter_lines():
+                if not raw:
+                    continue
+                data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+                if data.get('error'):
+                    return 'error', None
+                piece = extract_chunk(data)
+                if piece:
+                    parts.append(piece)
+                    if '\n' in piece:
+                        checked = ''.join(parts).rpartition('\n')[0]
+                        if stop_when(checked):
+                            return 'ok', checked.strip()
+                if data.get('done'):
+                    break
+        return 'ok', ''.join(parts).strip()
+    except requests.exceptions.ConnectionError:
+        return 'conn_error', None
+    except requests.exceptions.Timeout:
+        return 'timeout', None
+    except Exception:
+        return 'error', None
+
+
+def _build_field_index(fields_list):
+    """
+    Índices de busca por nome, montados uma vez por lista de campos:
+    (exato -> id, minúsculo -> id, [(nome minúsculo, id)] na ordem original para o match parcial).
+    Mantém sempre a primeira ocorrência, como a varredura linear fazia.
+    """
+    by_exact = {}
+    by_lower = {}
+    lowered = []
     for f in fields_list:
+        fid = f.get('id')
+        by_exact.setdefault(f.get('name'), fid)
         fn = (f.get('name') or '').strip().lower()
+        by_lower.setdefault(fn, fid)
+        lowered.append((fn, fid))
+    return by_exact, by_lower, lowered
+
+
+def _field_id_from_index(index, name):
+    """Mesma precedência de get_field_id_by_name (exato, case-insensitive, parcial) usando _build_field_index."""
+    if not name:
+        return None
+    by_exact, by_lower, lowered = index
+    if name in by_exact:
+        return by_exact[name]
+    name_clean = name.strip().lower()
+    if name_clean in by_lower:
+        return by_lower[name_clean]
+    # Partial: search name inside field name (e.g. "Time to resolution" in "Time to resolution (days)")
+    for fn, fid in lowered:
         if name_clean in fn or fn in name_clean:
-            return f.get('id')
+            return fid
     return None
 
 
+def get_field_id_by_name(fields_list, name):
+    """Return field id for a given field name (exact, then case-insensitive, then partial)."""
+    if not name:
+        return None
+    return _field_id_from_index(_build_field_index(fields_list), name)
+
+
 def fetch_jira_fields(auth):
     """GET /rest/api/3/field and return list of fields."""
     url = f'{JIRA_URL}/rest/api/3/field'
-    r = requests.get(
+    r = _JIRA_SESSION.get(
         url,
         auth=auth,
         headers={'Accept': 'application/json'},
         timeout=30,
     )
     r.raise_for_status()
-    return r.json()
+    return _response_json(r)
+
+
+# Cache em disco do catálogo de campos (/rest/api/3/field): quase estático e grande em instâncias com muitos customfields
+FIELDS_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'jiradashl1')
+try:
+    FIELDS_CACHE_TTL = int(os.environ.get('JIRA_FIELDS_CACHE_TTL', '900') or 0)  # segundos; 0 desativa
+except ValueError:
+    FIELDS_CACHE_TTL = 900  # valor inválido no .env: usa o padrão em vez de quebrar o import
+
+
+def _fields_cache_path(auth):
+    """Arquivo de cache por (JIRA_URL, usuário)."""
+    user = auth[0] if auth else ''
+    digest = hashlib.sha1(f'{JIRA_URL}|{user}'.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(FIELDS_CACHE_DIR, f'fields-{digest}.json')
+
+
+def clear_fields_cache(auth):
+    """Remove o cache em disco dos campos (força novo GET /rest/api/3/field)."""
+    try:
+        os.remove(_fields_cache_path(auth))
+    except OSError:
+        pass
+
+
+def _cached_fetch_jira_fields(auth, ttl=None):
+    """fetch_jira_fields com cache JSON em disco (TTL em segundos; padrão FIELDS_CACHE_TTL)."""
+    ttl = FIELDS_CACHE_TTL if ttl is None else ttl
+    if ttl <= 0:
+        return fetch_jira_fields(auth)
+    path = _fields_cache_path(auth)
+    try:
+        if time.time() - os.path.getmtime(path) < ttl:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+    except (OSError, ValueError):
+        pass
+    fields_list = fetch_jira_fields(auth)
+    try:
+        os.makedirs(FIELDS_CACHE_DIR, exist_ok=True)
+        tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'  # único por processo e thread
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(fields_list, f)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+    return fields_list
 
 
 # Nomes alternativos para tentar no Jira (ex.: Nubank, JSM)
@@ -110,86 +404,75 @@ def resolve_custom_fields(auth):
     Resolve display names to Jira field IDs.
     Returns dict: { 'Time to resolution': 'customfield_xxxx', ... }
     """
-    fields_list = fetch_jira_fields(auth)
+    fields_list = _cached_fetch_jira_fields(auth)
+    index = _build_field_index(fields_list)  # uma passada; cada nome vira lookup em dict
     resolved = {}
     for name in ['Request Type', 'Support Level - ITOPS', 'Satisfaction']:
-        fid = get_field_id_by_name(fields_list, name)
+        fid = _field_id_from_index(index, name)
         resolved[name] = fid if fid else None
-    fid = None
-    for name in TIME_TO_RESOLUTION_NAMES:
-        fid = get_field_id_by_name(fields_list, name)
-        if fid:
-            break
-    resolved['Time to resolution'] = fid
-    if not resolved['Time to resolution']:
-        for f in fields_list:
-            n = (f.get('name') or '').lower()
-            if 'resolution' in n and ('time' in n or 'tempo' in n):
-                resolved['Time to resolution'] = f.get('id')
-                break
-    fid = None
-    for name in TIME_TO_FIRST_RESPONSE_NAMES:
-        fid = get_field_id_by_name(fields_list, name)
-        if fid:
-            break
-    resolved['Time to first response'] = fid
-    if not resolved['Time to first response']:
-        for f in fields_list:
-            n = (f.get('name') or '').lower()
-            if ('first' in n and 'response' in n) or ('primeira' in n and 'resposta' in n):
-                resolved['Time to first response'] = f.get('id')
-                break
+    # Primeiro nome candidato (por prioridade) que resolve; senão, primeiro campo cujo nome "parece" o SLA
+    lowered = index[2]
+    resolved['Time to resolution'] = (
+        next((fid for fid in (_field_id_from_index(index, n) for n in TIME_TO_RESOLUTION_NAMES) if fid), None)
+        or next((fid for n, fid in lowered if 'resolution' in n and ('time' in n or 'tempo' in n)), None)
+    )
+    resolved['Time to first response'] = (
+        next((fid for fid in (_field_id_from_index(index, n) for n in TIME_TO_FIRST_RESPONSE_NAMES) if fid), None)
+        or next((fid for n, fid in lowered if ('first' in n and 'response' in n) or ('primeira' in n and 'resposta' in n)), None)
+    )
     return resolved
 
 
 def list_all_fields(auth, search=None):
     """Print all Jira fields (id, name). Optionally filter by search substring."""
-    fields_list = fetch_jira_fields(auth)
+    fields_list = _cached_fetch_jira_fields(auth)
     search_lower = (search or '').strip().lower()
-    out = []
-    for f in sorted(fields_list, key=lambda x: (x.get('name') or '').lower()):
-        fid = f.get('id', '')
+    # Filtra antes de ordenar e calcula o nome minúsculo uma vez por campo (serve ao filtro e à ordenação)
+    decorated = []
+    for f in fields_list:
         fname = f.get('name') or ''
-        if search_lower and search_lower not in fname.lower():
+        fname_lower = fname.lower()
+        if search_lower and search_lower not in fname_lower:
             continue
-        out.append((fid, fname))
-    return out
+        decorated.append((fname_lower, f.get('id', ''), fname))
+    decorated.sort(key=lambda t: t[0])
+    return [(fid, fname) for _, fid, fname in decorated]
 
 
 def fetch_my_filters(auth):
     """GET /rest/api/3/filter/my - lista filtros do usuário."""
-    r = requests.get(
+    r = _JIRA_SESSION.get(
         f'{JIRA_URL}/rest/api/3/filter/my',
         auth=auth,
         headers={'Accept': 'application/json'},
         timeout=30,
     )
     r.raise_for_status()
-    return r.json()
+    return _response_json(r)
 
 
 def fetch_filter_by_id(auth, filter_id):
     """GET /rest/api/3/filter/{id} - retorna filtro com JQL."""
-    r = requests.get(
+    r = _JIRA_SESSION.get(
         f'{JIRA_URL}/rest/api/3/filter/{filter_id}',
         auth=auth,
         headers={'Accept': 'application/json'},
         timeout=30,
     )
     r.raise_for_status()
-    return r.json()
+    return _response_json(r)
 
 
 def fetch_filter_columns(auth, filter_id):
     """GET /rest/api/3/filter/{id}/columns - retorna colunas configuradas do filtro (id, label)."""
-    r = requests.get(
+    r = _JIRA_SESSION.get(
         f'{JIRA_URL}/rest/api/3/filter/{filter_id}/columns',
         auth=auth,
         headers={'Accept': 'application/json'},
         timeout=30,
     )
     r.raise_for_status()
-    data = r.json()
+    data = _response_json(r)
     if isinstance(data, dict):
         data = data.get('columns') or data.get('items') or []
     if not isinstance(data, list):
@@ -205,36 +488,37 @@ def fetch_filter_columns(auth, filter_id):
 
 def fetch_projects(auth):
     """GET /rest/api/3/project - lista projetos (key, name)."""
-    r = requests.get(
+    r = _JIRA_SESSION.get(
         f'{JIRA_URL}/rest/api/3/project',
         auth=auth,
         headers={'Accept': 'application/json'},
         timeout=30,
     )
     r.raise_for_status()
-    data = r.json()
+    data = _response_json(r)
     return [(p.get('key', ''), p.get('name', '')) for p in data]
 
 
 def fetch_statuses(auth):
     """GET /rest/api/3/status - lista status (name)."""
-    r = requests.get(
+    r = _JIRA_SESSION.get(
         f'{JIRA_URL}/rest/api/3/status',
         auth=auth,
         headers={'Accept': 'application/json'},
         timeout=30,
     )
     r.raise_for_status()
-    data = r.json()
+    data = _response_json(r)
     return [s.get('name', '') for s in data if s.get('name')]
 
 
+_SEC_IN_YEAR = 86400 * 365  # acima disso um valor "em segundos" do Jira na verdade está em ms
+_MS_IN_YEAR = _SEC_IN_YEAR * 1000
 _SLA_MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
 
 
 def _sla_format_datetime(dt):
     """Formata datetime como no Jira: 05/Jan/26 5:05 PM."""
-    from datetime import datetime
     if not isinstance(dt, datetime):
         return ''
     h = dt.hour
@@ -246,51 +530,87 @@ def _sla_format_datetime(dt):
 def _sla_elapsed_to_seconds(obj):
     """Extrai duração em segundos de um objeto da API de SLA (elapsedTime: int segundos ou ms, ou dict com friendly/elapsed).
     Retorna int ou None se não for possível obter segundos."""
-    if obj is None:
-        return None
+    # Despacho por type(obj) (lookup em dict) em vez de cadeia de isinstance; roda para todo valor de SLA
+    return (_ELAPSED_DISPATCH.get(type(obj)) or _elapsed_from_other)(obj)
+
+
+def _elapsed_from_num(obj):
+    n = int(obj)
+    if 0 <= n < _SEC_IN_YEAR:
+        return n
+    if _SEC_IN_YEAR < n < _MS_IN_YEAR:  # provavelmente milissegundos
+        return n // 1000
+    return None
+
+
+def _elapsed_from_dict(obj):
+    elapsed = obj.get('elapsedTime') or obj.get('seconds') or obj.get('duration')
+    if elapsed is not None:
+        return _sla_elapsed_to_seconds(elapsed)
+    if 'seconds' in obj:
+        return int(obj['seconds']) if obj['seconds'] is not None else None
+    return None
+
+
+def _elapsed_from_other(obj):
+    # Subclasses (raras) caem aqui e seguem a regra do tipo base
     if isinstance(obj, (int, float)):
-        n = int(obj)
-        if n < 0:
-            return None
-        if n > 86400 * 365:  # provavelmente milissegundos
-            n = n // 1000
-        return n if n < 86400 * 365 else None
+        return _elapsed_from_num(obj)
     if isinstance(obj, dict):
-        elapsed = obj.get('elapsedTime') or obj.get('seconds') or obj.get('duration')
-        if elapsed is not None:
-            return _sla_elapsed_to_seconds(elapsed)
-        if 'seconds' in obj:
-            return int(obj['seconds']) if obj['seconds'] is not None else None
+        return _elapsed_from_dict(obj)
     return None
 
 
+_ELAPSED_DISPATCH = {int: _elapsed_from_num, float: _elapsed_from_num, bool: _elapsed_from_num, dict: _elapsed_from_dict}
+
+
 def _sla_time_to_epoch_seconds(obj):
     """Converte objeto de data da API de SLA (epochMillis, iso8601, etc.) em segundos desde epoch. Só dados Jira."""
-    if obj is None:
-        return None
-    if isinstance(obj, (int, float)):
-        ms = int(obj)
-        if ms > 1e12:
-            return ms // 1000
-        if ms > 86400 * 365:
-            return ms // 1000
-        return ms if ms > 0 else None
-    if isinstance(obj, dict):
-        ms = obj.get('epochMillis')
-        if ms is not None:
-            return _sla_time_to_epoch_seconds(ms)
-        iso = obj.get('iso8601') or obj.get('jira')
-        if iso and isinstance(iso, str):
-            dt = _parse_iso_date(iso.strip())
-            if dt:
-                return int(dt.timestamp())
-    if isinstance(obj, str) and obj.strip():
+    return (_EPOCH_DISPATCH.get(type(obj)) or _epoch_from_other)(obj)
+
+
+def _epoch_from_num(obj):
+    ms = int(obj)
+    if ms > 1e12:
+        return ms // 1000
+    if ms > _SEC_IN_YEAR:
+        return ms // 1000
+    return ms if ms > 0 else None
+
+
+def _epoch_from_dict(obj):
+    ms = obj.get('epochMillis')
+    if ms is not None:
+        return _sla_time_to_epoch_seconds(ms)
+    iso = obj.get('iso8601') or obj.get('jira')
+    if iso and isinstance(iso, str):
+        dt = _parse_iso_date(iso.strip())
+        if dt:
+            return int(dt.timestamp())
+    return None
+
+
+def _epoch_from_str(obj):
+    if obj.strip():
         dt = _parse_iso_date(obj.strip())
         if dt:
             return int(dt.timestamp())
     return None
 
 
+def _epoch_from_other(obj):
+    if isinstance(obj, (int, float)):
+        return _epoch_from_num(obj)
+    if isinstance(obj, dict):
+        return _epoch_from_dict(obj)
+    if isinstance(obj, str):
+        return _epoch_from_str(obj)
+    return None
+
+
+_EPOCH_DISPATCH = {int: _epoch_from_num, float: _epoch_from_num, bool: _epoch_from_num, dict: _epoch_from_dict, str: _epoch_from_str}
+
+
 def _sla_time_display(obj):
     """Extrai texto de data/hora ou duração de um objeto da API de SLA (friendly, iso8601, epochMillis, elapsedTime).
     Formato de data: 05/Jan/26 5:05 PM (como no dashboard do Jira).
@@ -299,22 +619,20 @@ def _sla_time_display(obj):
         return ''
     if isinstance(obj, (int, float)):
         if obj > 1e12:
-            from datetime import datetime
             try:
-                dt = datetime.utcfromtimestamp(obj / 1000.0)
+                dt = datetime.fromtimestamp(obj / 1000.0, timezone.utc)
                 return _sla_format_datetime(dt)
             except Exception:
                 return str(int(obj))
-        return _format_seconds_hhmm(int(obj)) if obj < 86400 * 365 else ''
+        return _format_seconds_hhmm(int(obj)) if obj < _SEC_IN_YEAR else ''
     if isinstance(obj, dict):
         s = obj.get('friendly') or obj.get('jira') or obj.get('iso8601') or ''
         if s:
             return str(s).strip()
         ms = obj.get('epochMillis')
         if ms is not None:
-            from datetime import datetime
             try:
-                dt = datetime.utcfromtimestamp(int(ms) / 1000.0)
+                dt = datetime.fromtimestamp(int(ms) / 1000.0, timezone.utc)
                 return _sla_format_datetime(dt)
             except Exception:
                 pass
@@ -324,34 +642,64 @@ def _sla_time_display(obj):
                 return str(elapsed.get('friendly', '')).strip()
             if isinstance(elapsed, (int, float)):
                 n = int(elapsed)
-                if n > 86400 * 365:
+                if n > _SEC_IN_YEAR:
                     n = n // 1000
                 return _format_seconds_hhmm(n)
     return str(obj).strip() if obj else ''
 
 
+# Memo curto de SLAs por (usuário, chamado): a mesma busca consulta o SLA na lista, nas notas e nos pontos (Ollama)
+_SLA_CACHE_TTL = 60  # segundos, igual ao cache de busca do app web
+_SLA_CACHE_MAX = 4096  # entradas; acima disso sai a mais antiga
+_sla_cache = OrderedDict()
+_sla_cache_lock = threading.Lock()  # fetch_issue_sla roda em várias threads (_fetch_slas_for_issues)
+
+
+def clear_sla_cache():
+    """Esvazia o memo de fetch_issue_sla (ex.: para forçar nova leitura do Jira)."""
+    with _sla_cache_lock:
+        _sla_cache.clear()
+
+
 def fetch_issue_sla(auth, issue_key):
     """
     GET /rest/servicedeskapi/request/{issueIdOrKey}/sla - SLAs do chamado (Jira Service Management).
     Retorna lista de dicts: [{'name': '...', 'timestamp': '...', 'met': bool, 'ongoing': bool}, ...]
     Se o projeto não for Service Desk ou API retornar 404/403, tenta GET request/{key}?expand=sla (Jira Cloud).
+    Resultados não vazios ficam em memória por _SLA_CACHE_TTL segundos.
     """
     if not issue_key or not issue_key.strip():
         return []
-    key = issue_key.strip()
+    cache_key = (auth[0] if auth else None, issue_key.strip())
+    with _sla_cache_lock:
+        hit = _sla_cache.get(cache_key)
+    # Cópia de cada dict: quem altera o resultado não altera o memo (nem os outros chamadores)
+    if hit and hit[0] > time.time():
+        return [dict(s) for s in hit[1]]
+    out = _fetch_issue_sla_uncached(auth, issue_key.strip())
+    if out:
+        with _sla_cache_lock:
+            _sla_cache.pop(cache_key, None)
+            _sla_cache[cache_key] = (time.time() + _SLA_CACHE_TTL, out)
+            while len(_sla_cache) > _SLA_CACHE_MAX:
+                _sla_cache.popitem(last=False)
+    return [dict(s) for s in out]
+
+
+def _fetch_issue_sla_uncached(auth, key):
     data = None
     try:
-        r = requests.get(
+        r = _JIRA_SESSION.get(
             f'{JIRA_URL}/rest/servicedeskapi/request/{key}/sla',
             auth=auth,
             headers={'Accept': 'application/json'},
             timeout=15,
         )
         if r.status_code == 200:
-            data = r.json()
+            data = _response_json(r)
         elif r.status_code in (404, 403, 400):
             # Fallback: Jira Cloud pode expor SLA via expand=sla no request
-            r2 = requests.get(
+            r2 = _JIRA_SESSION.get(
                 f'{JIRA_URL}/rest/servicedeskapi/request/{key}',
                 auth=auth,
                 headers={'Accept': 'application/json'},
@@ -359,7 +707,7 @@ def fetch_issue_sla(auth, issue_key):
                 timeout=15,
             )
             if r2.status_code == 200:
-                data = r2.json()
+                data = _response_json(r2)
                 # SLA pode estar em _expands.sla ou sla ou slaMetrics
                 expanded = (data.get('_expands') or [])
                 if 'sla' in expanded and isinstance(data.get('sla'), list):
@@ -389,104 +737,114 @@ def fetch_issue_sla(auth, issue_key):
             items = []
         out = []
         for item in items:
-            if not isinstance(item, dict):
-                continue
-            name = (item.get('name') or item.get('goalName') or item.get('slaName') or item.get('label')
-                    or item.get('metricName') or '').strip()
-            # Tempo: múltiplas fontes (top-level, completedCycles, ongoingCycle; aceita friendly "Today 7:59 AM")
-            ts = ''
-            if isinstance(item.get('friendly'), str) and item['friendly'].strip():
-                ts = item['friendly'].strip()
-            if not ts:
-                for time_key in ('completedTime', 'stopTime', 'dueTime', 'breachedDate', 'completedDate', 'startTime', 'targetTime'):
-                    t = item.get(time_key)
-                    if t:
-                        ts = _sla_time_display(t)
-                        break
-            if not ts and item.get('completedCycles'):
-                cy = item['completedCycles']
-                last_cycle = cy[-1] if isinstance(cy, list) and cy else (cy if isinstance(cy, dict) else None)
-                first_cycle = cy[0] if isinstance(cy, list) and cy else None
-                for c in (last_cycle, first_cycle):
-                    if isinstance(c, dict):
-                        if isinstance(c.get('friendly'), str) and c['friendly'].strip():
-                            ts = c['friendly'].strip()
-                            break
-                        ts = _sla_time_display(c.get('stopTime') or c.get('completedTime') or c.get('elapsedTime'))
-                        if ts:
-                            break
-            ongoing = False
-            if not ts and item.get('ongoingCycle'):
-                oc = item['ongoingCycle']
-                if isinstance(oc, dict):
-                    if isinstance(oc.get('friendly'), str) and oc['friendly'].strip():
-                        ts = oc['friendly'].strip() + ' (em andamento)'
-                    elif oc.get('elapsedTime') is not None:
-                        ts = _sla_time_display(oc['elapsedTime']) + ' (em andamento)'
-                    ongoing = True
-            # Breached: ler do ciclo correto (API Jira). completedCycles = ciclos já encerrados; último ciclo define se estourou. ongoingCycle = ciclo em andamento.
-            breached = False
-            completed_cycles = item.get('completedCycles')
-            if isinstance(completed_cycles, list) and len(completed_cycles) > 0:
-                last_cycle = completed_cycles[-1]
-                if isinstance(last_cycle, dict):
-                    b = last_cycle.get('breached')
-                    if isinstance(b, bool):
-                        breached = b
-            if not breached and isinstance(item.get('ongoingCycle'), dict):
-                oc = item['ongoingCycle']
-                ongoing = True
-                b = oc.get('breached')
-                if isinstance(b, bool):
-                    breached = b
-                elif oc.get('hasFailed') is not None:
-                    breached = bool(oc.get('hasFailed'))
-            if not isinstance(breached, bool):
-                b = item.get('breached')
-                breached = bool(b) if isinstance(b, bool) else bool(item.get('hasFailed', False))
-            # Duração em segundos (para gráficos TTR/FRT a partir da coluna SLA): API (elapsedTime/duration/timeSpent) ou parsing do texto exibido na lista (ts)
-            duration_seconds = None
-            def _try_duration(obj, *keys):
-                for k in keys:
-                    v = obj.get(k) if isinstance(obj, dict) else None
-                    if v is not None:
-                        s = _sla_elapsed_to_seconds(v)
-                        if s is not None:
-                            return s
-                return None
-            if item.get('completedCycles') and isinstance(item['completedCycles'], list):
-                last_cycle = item['completedCycles'][-1]
-                if isinstance(last_cycle, dict):
-                    duration_seconds = _try_duration(last_cycle, 'elapsedTime', 'duration', 'timeSpent', 'elapsedSeconds') or _sla_elapsed_to_seconds(last_cycle)
-            if duration_seconds is None and item.get('ongoingCycle') and isinstance(item['ongoingCycle'], dict):
-                oc = item['ongoingCycle']
-                duration_seconds = _try_duration(oc, 'elapsedTime', 'duration', 'timeSpent', 'elapsedSeconds')
-            if duration_seconds is None:
-                duration_seconds = _try_duration(item, 'elapsedTime', 'duration', 'timeSpent', 'elapsedSeconds')
-            if duration_seconds is None and item.get('completedCycles') and isinstance(item['completedCycles'], list):
-                last_cycle = item['completedCycles'][-1]
-                if isinstance(last_cycle, dict):
-                    start_sec = _sla_time_to_epoch_seconds(last_cycle.get('startTime') or last_cycle.get('startDate'))
-                    end_sec = _sla_time_to_epoch_seconds(last_cycle.get('stopTime') or last_cycle.get('completedTime') or last_cycle.get('completedDate'))
-                    if start_sec is not None and end_sec is not None and end_sec >= start_sec:
-                        duration_seconds = end_sec - start_sec
-            if duration_seconds is None and item.get('ongoingCycle') and isinstance(item['ongoingCycle'], dict):
-                oc = item['ongoingCycle']
-                start_sec = _sla_time_to_epoch_seconds(oc.get('startTime') or oc.get('startDate'))
-                end_sec = _sla_time_to_epoch_seconds(oc.get('stopTime') or oc.get('completedTime') or oc.get('completedDate'))
-                if start_sec is not None and end_sec is not None and end_sec >= start_sec:
-                    duration_seconds = end_sec - start_sec
-            if duration_seconds is None and ts:
-                duration_seconds = _parse_sla_timestamp_to_seconds(ts)
-            # Incluir todos os SLAs retornados pelo Jira para exibição no modo lista; gráficos/pontos usam apenas os relevantes (Time to close, first response, time to resolution).
-            if name or ts:
-                tipo = _sla_tipo(name)
-                out.append({'name': name or '—', 'timestamp': ts or '—', 'met': not breached, 'tipo': tipo, 'ongoing': ongoing, 'duration_seconds': duration_seconds})
+            if isinstance(item, dict):
+                parsed = _parse_sla_item(item)
+                if parsed is not None:
+                    out.append(parsed)
         return out
     except Exception:
         return []
 
 
+_SLA_DURATION_KEYS = ('elapsedTime', 'duration', 'timeSpent', 'elapsedSeconds')
+_SLA_TIME_KEYS = ('completedTime', 'stopTime', 'dueTime', 'breachedDate', 'completedDate', 'startTime', 'targetTime')
+
+
+def _sla_try_duration(obj, keys=_SLA_DURATION_KEYS):
+    """Primeira chave de obj que vira duração em segundos (via _sla_elapsed_to_seconds); None se nenhuma."""
+    if not isinstance(obj, dict):
+        return None
+    for k in keys:
+        v = obj.get(k)
+        if v is not None:
+            s = _sla_elapsed_to_seconds(v)
+            if s is not None:
+                return s
+    return None
+
+
+def _sla_cycle_span_seconds(cycle):
+    """Duração de um ciclo pelo início/fim (epoch); None se faltar algum ou fim < início."""
+    start_sec = _sla_time_to_epoch_seconds(cycle.get('startTime') or cycle.get('startDate'))
+    end_sec = _sla_time_to_epoch_seconds(cycle.get('stopTime') or cycle.get('completedTime') or cycle.get('completedDate'))
+    if start_sec is not None and end_sec is not None and end_sec >= start_sec:
+        return end_sec - start_sec
+    return None
+
+
+def _parse_sla_item(item):
+    """
+    Converte um item da API de SLA no dict usado pelo dashboard
+    ({'name', 'timestamp', 'met', 'tipo', 'ongoing', 'duration_seconds'}); None se não tiver nome nem tempo.
+    completedCycles/ongoingCycle são lidos uma vez só.
+    """
+    name = (item.get('name') or item.get('goalName') or item.get('slaName') or item.get('label')
+            or item.get('metricName') or '').strip()
+    cc = item.get('completedCycles')
+    oc = item.get('ongoingCycle')
+    last_completed = cc[-1] if isinstance(cc, list) and cc else None
+    # Tempo: múltiplas fontes (top-level, completedCycles, ongoingCycle; aceita friendly "Today 7:59 AM")
+    ts = ''
+    friendly = item.get('friendly')
+    if isinstance(friendly, str) and friendly.strip():
+        ts = friendly.strip()
+    if not ts:
+        for time_key in _SLA_TIME_KEYS:
+            t = item.get(time_key)
+            if t:
+                ts = _sla_time_display(t)
+                break
+    if not ts and cc:
+        last_cycle = last_completed if isinstance(cc, list) else (cc if isinstance(cc, dict) else None)
+        first_cycle = cc[0] if isinstance(cc, list) else None
+        for c in (last_cycle, first_cycle):
+            if isinstance(c, dict):
+                if isinstance(c.get('friendly'), str) and c['friendly'].strip():
+                    ts = c['friendly'].strip()
+                    break
+                ts = _sla_time_display(c.get('stopTime') or c.get('completedTime') or c.get('elapsedTime'))
+                if ts:
+                    break
+    ongoing = False
+    if not ts and oc and isinstance(oc, dict):
+        if isinstance(oc.get('friendly'), str) and oc['friendly'].strip():
+            ts = oc['friendly'].strip() + ' (em andamento)'
+        elif oc.get('elapsedTime') is not None:
+            ts = _sla_time_display(oc['elapsedTime']) + ' (em andamento)'
+        ongoing = True
+    # Breached: ler do ciclo correto (API Jira). completedCycles = ciclos já encerrados; último ciclo define se estourou. ongoingCycle = ciclo em andamento.
+    breached = False
+    if isinstance(last_completed, dict):
+        b = last_completed.get('breached')
+        if isinstance(b, bool):
+            breached = b
+    if not breached and isinstance(oc, dict):
+        ongoing = True
+        b = oc.get('breached')
+        if isinstance(b, bool):
+            breached = b
+        elif oc.get('hasFailed') is not None:
+            breached = bool(oc.get('hasFailed'))
+    # Duração em segundos (para gráficos TTR/FRT a partir da coluna SLA): API (elapsedTime/duration/timeSpent) ou parsing do texto exibido na lista (ts)
+    duration_seconds = None
+    if isinstance(last_completed, dict):
+        duration_seconds = _sla_try_duration(last_completed) or _sla_elapsed_to_seconds(last_completed)
+    if duration_seconds is None and oc and isinstance(oc, dict):
+        duration_seconds = _sla_try_duration(oc)
+    if duration_seconds is None:
+        duration_seconds = _sla_try_duration(item)
+    if duration_seconds is None and isinstance(last_completed, dict):
+        duration_seconds = _sla_cycle_span_seconds(last_completed)
+    if duration_seconds is None and oc and isinstance(oc, dict):
+        duration_seconds = _sla_cycle_span_seconds(oc)
+    if duration_seconds is None and ts:
+        duration_seconds = _parse_sla_timestamp_to_seconds(ts)
+    # Incluir todos os SLAs retornados pelo Jira para exibição no modo lista; gráficos/pontos usam apenas os relevantes (Time to close, first response, time to resolution).
+    if not (name or ts):
+        return None
+    return {'name': name or '—', 'timestamp': ts or '—', 'met': not breached, 'tipo': _sla_tipo(name), 'ongoing': ongoing, 'duration_seconds': duration_seconds}
+
+
 # SLAs que contam para "fora do SLA" (análises). Inclui variações em inglês e português para primeira resposta e resolução.
 # EXCEÇÃO: "Time to close after resolution" (ex.: within 24h) é IGNORADO em todo o sistema devido a falha na automação do Jira.
 _SLA_NAMES_RELEVANT = (
@@ -499,27 +857,59 @@ _SLA_NAMES_RELEVANT = (
     'resolution',
 )
 _SLA_NAMES_IGNORE = ('time to close after resolution',)  # ignorar por falha na automação Jira
+_SLA_FRT_TERMS = (
+    'first response', 'primeira resposta', '1ª resposta', 'tempo para primeira', 'first time to response',
+    'first reply', 'tempo até primeira', 'response time', 'tempo de resposta', 'tempo de primeira',
+)
+_SLA_TTR_TERMS = ('resolution', 'resolução', 'resolucao', 'resolver', 'time to close', 'tempo para resolução', 'time for resolution')
+
+
+def _terms_regex(terms):
+    """Uma regex com alternância dos termos (substring literal): uma varredura em C no lugar de N `in`."""
+    return re.compile('|'.join(map(re.escape, terms)))
+
+
+_SLA_RELEVANT_RE = _terms_regex(_SLA_NAMES_RELEVANT)
+_SLA_IGNORE_RE = _terms_regex(_SLA_NAMES_IGNORE)
+_SLA_FRT_RE = _terms_regex(_SLA_FRT_TERMS)
+_SLA_TTR_RE = _terms_regex(_SLA_TTR_TERMS)
 
 
 def _sla_name_is_relevant(name):
     """True apenas para os SLAs que definem se o chamado está fora do SLA (FRT, TTR). Time to close after resolution é ignorado."""
     if not name or not isinstance(name, str):
         return False
+    return _sla_name_is_relevant_str(name)
+
+
+@functools.lru_cache(maxsize=4096)
+def _sla_name_is_relevant_str(name):
+    # Poucos nomes de SLA distintos, repetidos em todo chamado: memoiza por string
     n = name.lower().strip()
-    if any(ign in n for ign in _SLA_NAMES_IGNORE):
+    if _SLA_IGNORE_RE.search(n):
         return False
-    return any(r in n for r in _SLA_NAMES_RELEVANT)
+    return _SLA_RELEVANT_RE.search(n) is not None
+
+
+def _sla_item_is_relevant(sla):
+    """_sla_name_is_relevant para um SLA de fetch_issue_sla (o nome normalizado fica no memo, não no dict)."""
+    return _sla_name_is_relevant(sla.get('name'))
 
 
 def _sla_tipo(sla_name):
     """Classifica o SLA como FRT (First Response Time) ou TTR (Time to Resolution) pelo nome. Retorna 'FRT', 'TTR' ou None."""
     if not sla_name or not isinstance(sla_name, str):
         return None
+    return _sla_tipo_str(sla_name)
+
+
+@functools.lru_cache(maxsize=4096)
+def _sla_tipo_str(sla_name):
     n = sla_name.lower().strip()
     # FRT: primeira resposta tem prioridade para não confundir com "time to close after resolution"
-    if any(x in n for x in ('first response', 'primeira resposta', '1ª resposta', 'tempo para primeira', 'first time to response', 'first reply', 'tempo até primeira', 'response time', 'tempo de resposta', 'tempo de primeira')):
+    if _SLA_FRT_RE.search(n):
         return 'FRT'
-    if any(x in n for x in ('resolution', 'resolução', 'resolucao', 'resolver', 'time to close', 'tempo para resolução', 'time for resolution')):
+    if _SLA_TTR_RE.search(n):
         return 'TTR'
     return None
 
@@ -529,23 +919,25 @@ def _format_sla_list_for_ollama(sla_list, only_relevant=True):
     if not sla_list:
         return ''
     if only_relevant:
-        sla_list = [s for s in sla_list if _sla_name_is_relevant(s.get('name'))]
-    parts = []
-    for s in sla_list:
-        name = (s.get('name') or '—').strip()
-        ts = (s.get('timestamp') or '—').strip()
-        met = s.get('met', True)
-        tipo = s.get('tipo')
-        if tipo == 'FRT':
-            status = 'Cumprido' if met else 'FRT Estourado'
-            parts.append(f'[FRT] {name}: {ts} - {status}')
-        elif tipo == 'TTR':
-            status = 'Cumprido' if met else 'TTR Estourado'
-            parts.append(f'[TTR] {name}: {ts} - {status}')
-        else:
-            status = 'Cumprido' if met else 'Estourado'
-            parts.append(f'{name}: {ts} - {status}')
-    return '; '.join(parts) if parts else ''
+        sla_list = [s for s in sla_list if _sla_item_is_relevant(s)]
+    return '; '.join(map(_sla_line_for_ollama, sla_list))
+
+
+# (tipo, cumprido) -> (prefixo, status) usados na linha de SLA enviada ao Ollama
+_SLA_OLLAMA_LABELS = {
+    ('FRT', True): ('[FRT] ', 'Cumprido'),
+    ('FRT', False): ('[FRT] ', 'FRT Estourado'),
+    ('TTR', True): ('[TTR] ', 'Cumprido'),
+    ('TTR', False): ('[TTR] ', 'TTR Estourado'),
+    (None, True): ('', 'Cumprido'),
+    (None, False): ('', 'Estourado'),
+}
+
+
+def _sla_line_for_ollama(s):
+    tipo = s.get('tipo')
+    prefix, status = _SLA_OLLAMA_LABELS[(tipo if tipo in ('FRT', 'TTR') else None, bool(s.get('met', True)))]
+    return f"{prefix}{(s.get('name') or '—').strip()}: {(s.get('timestamp') or '—').strip()} - {status}"
 
 
 def fetch_issue_sla_raw(auth, issue_key):
@@ -556,14 +948,14 @@ def fetch_issue_sla_raw(auth, issue_key):
     if not issue_key or not issue_key.strip():
         return 0, None, 'issue_key vazio'
     try:
-        r = requests.get(
+        r = _JIRA_SESSION.get(
             f'{JIRA_URL}/rest/servicedeskapi/request/{issue_key.strip()}/sla',
             auth=auth,
             headers={'Accept': 'application/json'},
             timeout=15,
         )
         try:
-            data = r.json()
+            data = _response_json(r)
         except Exception:
             data = {'_raw_text': r.text[:2000] if r.text else ''}
         return r.status_code, data, None
@@ -573,13 +965,50 @@ def fetch_issue_sla_raw(auth, issue_key):
 
 # IDs dos campos Nubank (sempre solicitados na busca para garantir que venham na resposta)
 # Time to first response: usado no gráfico "Tempo médio 1ª resposta"; override via JIRA_TIME_TO_FIRST_RESPONSE_FIELD_ID no .env
-NUBANK_TIME_TO_RESOLUTION_FID = 'customfield_10886'   # Nubank - Time for Resolution
-NUBANK_TIME_TO_FIRST_RESPONSE_FID = os.environ.get('JIRA_TIME_TO_FIRST_RESPONSE_FIELD_ID', '').strip() or 'customfield_10884'  # Nubank - First time to Response
+# sys.intern: o valor vindo do .env vira o mesmo objeto das chaves internadas -> fields.get(fid) compara por identidade
+NUBANK_TIME_TO_RESOLUTION_FID = sys.intern('customfield_10886')   # Nubank - Time for Resolution
+NUBANK_TIME_TO_FIRST_RESPONSE_FID = sys.intern(os.environ.get('JIRA_TIME_TO_FIRST_RESPONSE_FIELD_ID', '').strip() or 'customfield_10884')  # Nubank - First time to Response
 
 # Confluence: mesma base do Jira (ex.: https://nubank.atlassian.net -> https://nubank.atlassian.net/wiki). Mesmas credenciais Jira.
 CONFLUENCE_URL = os.environ.get('CONFLUENCE_URL', '').strip() or (JIRA_URL.rstrip('/') + '/wiki' if JIRA_URL else '')
 
 
+_CONF_TERM_RE = re.compile(r'[^\w\s-]')   # pontuação removida do Request Type
+_CONF_Q_RE = re.compile(r'["\\]')          # aspas/barra quebram o text~"..." do CQL
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+
+
+# Pool único para as páginas do Confluence: evita criar um executor por chamada (já dentro dos workers de pontos)
+_CONFLUENCE_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix='confluence')
+
+
+def _confluence_item_excerpt(item, auth):
+    """Trecho '[Confluence] Título: ...' de um resultado da busca CQL (busca o body.view da página); '' se não houver."""
+    content_id = item.get('content', {}).get('id') if isinstance(item.get('content'), dict) else item.get('id')
+    if not content_id:
+        title = (item.get('content') or item).get('title') or item.get('title') or ''
+        return f'[Confluence] Título: {title}' if title else ''
+    r2 = _JIRA_SESSION.get(
+        f'{CONFLUENCE_URL.rstrip("/")}/rest/api/content/{content_id}',
+        auth=auth,
+        headers={'Accept': 'application/json'},
+        params={'expand': 'body.view'},
+        timeout=10,
+    )
+    if r2.status_code != 200:
+        return ''
+    body_data = _response_json(r2)
+    title = (body_data.get('title') or '')[:200]
+    body_obj = (body_data.get('body') or {}).get('view') or body_data.get('body') or {}
+    body_html = body_obj.get('value') if isinstance(body_obj, dict) else ''
+    body_plain = _description_to_plain_text(body_html) if body_html else ''
+    if body_plain:
+        body_plain = body_plain.strip()[:1500]
+    if title or body_plain:
+        return f'[Confluence] Título: {title}\n{body_plain}'
+    return ''
+
+
 def fetch_confluence_for_issue(issue, auth, field_ids):
     """
     Busca no Confluence páginas relacionadas ao tema do chamado (Request Type / resumo).
@@ -593,24 +1022,21 @@ def fetch_confluence_for_issue(issue, auth, field_ids):
     summary, _ = get_issue_summary_and_description(issue, field_ids)
     summary = (summary or '')[:200]
     # Termos de busca: Request Type e primeiras palavras do summary (tema do chamado)
-    import re
-    import urllib.parse
     terms = []
     if request_type and request_type != '(sem tipo)':
-        terms.append(re.sub(r'[^\w\s-]', ' ', request_type).strip()[:80])
+        terms.append(_CONF_TERM_RE.sub(' ', request_type).strip()[:80])
     for w in (summary or '').split()[:5]:
         if len(w) > 2:
             terms.append(w)
     if not terms:
         return ''
     query = ' '.join(terms[:3])
-    query_clean = re.sub(r'["\\]', ' ', query).strip()
+    query_clean = _CONF_Q_RE.sub(' ', query).strip()
     if not query_clean:
         return ''
     try:
         cql = f'type=page and text~"{query_clean}"'
-        cql_encoded = urllib.parse.quote(cql, safe='')
-        r = requests.get(
+        r = _JIRA_SESSION.get(
             f'{CONFLUENCE_URL.rstrip("/")}/rest/api/search',
             auth=auth,
             headers={'Accept': 'application/json'},
@@ -619,68 +1045,47 @@ def fetch_confluence_for_issue(issue, auth, field_ids):
         )
         if r.status_code != 200:
             return ''
-        data = r.json()
+        data = _response_json(r)
         results = data.get('results') or data.get('content') or []
         if not results:
             return ''
-        excerpts = []
-        for item in (results[:2]):
-            content_id = item.get('content', {}).get('id') if isinstance(item.get('content'), dict) else item.get('id')
-            if not content_id:
-                title = (item.get('content') or item).get('title') or item.get('title') or ''
-                if title:
-                    excerpts.append(f'[Confluence] Título: {title}')
-                continue
-            r2 = requests.get(
-                f'{CONFLUENCE_URL.rstrip("/")}/rest/api/content/{content_id}',
-                auth=auth,
-                headers={'Accept': 'application/json'},
-                params={'expand': 'body.view'},
-                timeout=10,
-            )
-            if r2.status_code != 200:
-                continue
-            body_data = r2.json()
-            title = (body_data.get('title') or '')[:200]
-            body_obj = (body_data.get('body') or {}).get('view') or body_data.get('body') or {}
-            body_html = body_obj.get('value') if isinstance(body_obj, dict) else ''
-            body_plain = _description_to_plain_text(body_html) if body_html else ''
-            if body_plain:
-                body_plain = body_plain.strip()[:1500]
-            if title or body_plain:
-                excerpts.append(f'[Confluence] Título: {title}\n{body_plain}')
+        # As (até) 2 páginas em paralelo no pool compartilhado; a ordem dos resultados é mantida
+        excerpts = [e for e in _CONFLUENCE_EXECUTOR.map(lambda item: _confluence_item_excerpt(item, auth), results[:2]) if e]
         return '\n\n---\n\n'.join(excerpts).strip()[:3000] if excerpts else ''
     except Exception:
         return ''
 
 
-def _description_to_plain_text(description):
-    """Extrai texto puro da descrição do Jira (ADF, HTML ou string)."""
+def _description_to_plain_text(description, max_chars=2000):
+    """Extrai texto puro da descrição do Jira (ADF, HTML ou string), limitado a max_chars caracteres."""
     if description is None:
         return ''
     if isinstance(description, str):
-        import re
-        return re.sub(r'<[^>]+>', ' ', description).strip()[:2000]
+        return _HTML_TAG_RE.sub(' ', description).strip()[:max_chars]
     if isinstance(description, dict):
         # Atlassian Document Format (ADF)
+        # Pilha explícita (mesma ordem da recursão) e para assim que já houver max_chars caracteres úteis
         texts = []
-        def walk(node):
+        total = 0
+        stack = [description]
+        while stack:
+            node = stack.pop()
             if isinstance(node, dict):
                 if node.get('type') == 'text' and 'text' in node:
                     texts.append(node['text'])
-                for v in node.values():
-                    walk(v)
+                    total += len(node['text']) + 1
+                    if total > max_chars and len(' '.join(texts).strip()) >= max_chars:
+                        break
+                stack.extend(reversed(list(node.values())))
             elif isinstance(node, list):
-                for item in node:
-                    walk(item)
-        walk(description)
-        return ' '.join(texts).strip()[:2000]
-    return str(description)[:2000]
+                stack.extend(reversed(node))
+        return ' '.join(texts).strip()[:max_chars]
+    return str(description)[:max_chars]
 
 
-def get_issue_summary_and_description(issue, field_ids=None):
+def get_issue_summary_and_description(issue, field_ids=None, max_chars=2000):
     """
-    Retorna (summary, description_plain) do issue.
+    Retorna (summary, description_plain) do issue; description_plain limitada a max_chars.
     Tenta campos padrão 'summary' e 'description'; se field_ids tiver Summary/Description (custom), usa também.
     """
     fields = issue.get('fields') or {}
@@ -699,7 +1104,7 @@ def get_issue_summary_and_description(issue, field_ids=None):
         or fields.get(fid.get('Description'))
         or fields.get(fid.get('description'))
     )
-    description_plain = _description_to_plain_text(desc_raw)
+    description_plain = _description_to_plain_text(desc_raw, max_chars=max_chars)
     return summary, description_plain
 
 
@@ -712,6 +1117,21 @@ ROVO_DEFAULT_CRITERIA = (
 )
 
 
+# Faixas da nota por regras (limites em segundos: <= limite cai na faixa; bisect no lugar de cadeias de elif)
+_FIRST_RESPONSE_LIMITS_SEC = (3600, 4 * 3600, 24 * 3600)          # 1h, 4h, 24h
+_PTS_RESPOSTA = (1.5, 1.2, 0.8, 0.4)
+_RESOLUTION_LIMITS_SEC = (24 * 3600, 72 * 3600, 168 * 3600)      # 1 dia, 3 dias, 1 semana
+_PTS_SOLUCAO = (1.5, 1.2, 0.8, 0.5)
+_NOTA_TOTAL_LIMITS = (1.2, 2.0, 2.8, 3.5)                        # total >= limite sobe uma nota
+_NOTA_BY_TOTAL = (
+    (1, 'Baixo: ticket vago ou sem dados de resposta/solução.'),
+    (2, 'Abaixo: texto incompleto ou tempos de resposta/solução altos.'),
+    (3, 'Médio: algum critério (texto, resposta ou solução) pode melhorar.'),
+    (4, 'Bom: atendimento e solução dentro do esperado.'),
+    (5, 'Alto: texto completo, resposta e solução rápidas.'),
+)
+
+
 def get_issue_note_rule_based(issue, field_ids=None):
     """
     Nota 1–5 por regras fixas, sem IA. Critérios: CSTAT, ITSM, IT Support, atendimento ao cliente.
@@ -720,7 +1140,8 @@ def get_issue_note_rule_based(issue, field_ids=None):
     """
     fields = issue.get('fields', {})
     summary = (fields.get('summary') or '').strip() or ''
-    description = _description_to_plain_text(fields.get('description'))
+    # Só o tamanho importa e o maior limiar é 200: não precisa extrair mais que isso da descrição
+    description = _description_to_plain_text(fields.get('description'), max_chars=200)
     created = _parse_iso_date(fields.get('created'))
     resolved = _parse_iso_date(fields.get('resolutiondate'))
     fid_first = (field_ids or {}).get('Time to first response') or NUBANK_TIME_TO_FIRST_RESPONSE_FID
@@ -741,50 +1162,20 @@ def get_issue_note_rule_based(issue, field_ids=None):
 
     # --- Tempo até 1ª resposta (ITSM / atendimento ao cliente) ---
     if sec_first is not None and sec_first >= 0:
-        h_first = sec_first / 3600
-        if h_first <= 1:
-            pts_resposta = 1.5
-        elif h_first <= 4:
-            pts_resposta = 1.2
-        elif h_first <= 24:
-            pts_resposta = 0.8
-        else:
-            pts_resposta = 0.4
+        pts_resposta = _PTS_RESPOSTA[bisect.bisect_left(_FIRST_RESPONSE_LIMITS_SEC, sec_first)]
     else:
         pts_resposta = 0.3  # sem dado
 
     # --- Tempo até solução (ITSM / IT Support) ---
     if created and resolved:
         sec_resol = int((resolved - created).total_seconds())
-        h_resol = sec_resol / 3600
-        if h_resol <= 24:
-            pts_solucao = 1.5
-        elif h_resol <= 72:
-            pts_solucao = 1.2
-        elif h_resol <= 168:  # 1 semana
-            pts_solucao = 0.8
-        else:
-            pts_solucao = 0.5
+        pts_solucao = _PTS_SOLUCAO[bisect.bisect_left(_RESOLUTION_LIMITS_SEC, sec_resol)]
     else:
         pts_solucao = 0.3  # em aberto
 
     total = pts_texto + pts_resposta + pts_solucao
     # Mapear 0–4 para nota 1–5
-    if total >= 3.5:
-        nota = 5
-        comentario = 'Alto: texto completo, resposta e solução rápidas.'
-    elif total >= 2.8:
-        nota = 4
-        comentario = 'Bom: atendimento e solução dentro do esperado.'
-    elif total >= 2.0:
-        nota = 3
-        comentario = 'Médio: algum critério (texto, resposta ou solução) pode melhorar.'
-    elif total >= 1.2:
-        nota = 2
-        comentario = 'Abaixo: texto incompleto ou tempos de resposta/solução altos.'
-    else:
-        nota = 1
-        comentario = 'Baixo: ticket vago ou sem dados de resposta/solução.'
+    nota, comentario = _NOTA_BY_TOTAL[bisect.bisect_right(_NOTA_TOTAL_LIMITS, total)]
     return {'nota': nota, 'comentario': comentario[:200]}
 
 
@@ -792,7 +1183,7 @@ def _issue_context_for_ollama(issue, field_ids=None):
     """Monta contexto do ticket para o Ollama: Assignee, texto, resolução e tempo de 1ª resposta."""
     fields = issue.get('fields', {})
     summary = (fields.get('summary') or '').strip() or '(sem título)'
-    description = _description_to_plain_text(fields.get('description'))[:2000]
+    description = _description_to_plain_text(fields.get('description'))
     created_iso = fields.get('created')
     resolved_iso = fields.get('resolutiondate')
     time_to_resolution = ''
@@ -821,9 +1212,9 @@ def _issue_context_full_for_pontos(issue, field_ids, comments_text=None):
     """Contexto completo do ticket para análise de pontos: todas as colunas do modo lista + resposta do Assignee."""
     row = get_row_values(issue, field_ids or {})
     key = row.get('key', '') or (issue.get('key') or '')
-    summary, desc_plain = get_issue_summary_and_description(issue, field_ids)
+    summary, desc_plain = get_issue_summary_and_description(issue, field_ids, max_chars=1500)
     summary = (summary or '').strip() or '(sem título)'
-    desc_plain = (desc_plain or '')[:1500]
+    desc_plain = desc_plain or ''
     fields = issue.get('fields', {})
     status_obj = fields.get('status') or {}
     status = status_obj.get('name', '') if isinstance(status_obj, dict) else str(status_obj or '')
@@ -849,31 +1240,69 @@ def _issue_context_full_for_pontos(issue, field_ids, comments_text=None):
     return '\n'.join(parts)
 
 
+# Regex do parser de nota (compiladas uma vez; rodam a cada resposta do Ollama)
+_RE_NOTA_INLINE = re.compile(r'^\s*([1-5])\s*[-.:]\s*(.+)$', re.DOTALL)   # "N - resumo"
+_RE_NOTA_ONLY = re.compile(r'^\s*([1-5])\s*$')
+_RE_NOTA_JSON = re.compile(r'"nota"\s*:\s*["\']?(\d+)["\']?', re.I)
+_RE_NOTA_COM = re.compile(r'"comentario"\s*:\s*"((?:[^"\\]|\\.)*)"', re.I)
+_RE_NOTA_FALLBACKS = tuple(re.compile(p, re.I) for p in (
+    r'nota\s*[=:]\s*["\']?([1-5])["\']?', r'["\']nota["\']\s*:\s*([1-5])\b', r'\b([1-5])\s*/\s*5', r'\bnota\s+([1-5])\b',
+))
+_RE_NOTA_DIGIT = re.compile(r'\b([1-5])\b')
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _first_object_end(content, start):
+    """
+    Índice logo após o '}' que fecha o objeto aberto em content[start] (aspas simples ou duplas como string); None se não fechar.
+    Só para respostas que não são JSON válido: o JSON válido já sai de raw_decode.
+    """
+    depth = 0
+    in_string = None
+    escape = False
+    for i in range(start, len(content)):
+        c = content[i]
+        if escape:
+            escape = False
+        elif in_string:
+            if c == '\\':
+                escape = True
+            elif c == in_string:
+                in_string = None
+        elif c == '"' or c == "'":
+            in_string = c
+        elif c == '{':
+            depth += 1
+        elif c == '}':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return None
+
+
 def _parse_ollama_nota_response(content):
     """Extrai nota 1-5 e comentário resumido do texto. Retorna dict ou None. Comentário limitado a 60 chars."""
-    import json
-    import re
     if not content or not isinstance(content, str):
         return None
     content = content.strip()
     # Formato "N - resumo" ou "N. resumo" ou só "N" (menos processamento)
-    m = re.match(r'^\s*([1-5])\s*[-.:]\s*(.+)$', content, re.DOTALL)
+    m = _RE_NOTA_INLINE.match(content)
     if m:
         n = int(m.group(1))
         com = (m.group(2).strip() or '')[:60]
         return {'nota': n, 'comentario': com or 'OK'}
-    m = re.match(r'^\s*([1-5])\s*$', content)
+    m = _RE_NOTA_ONLY.match(content)
     if m:
         return {'nota': int(m.group(1)), 'comentario': 'OK'}
     # Se o modelo colocou "N - resumo" em qualquer linha (ex.: após texto introdutório)
-    for line in content.split('\n'):
+    for line in content.splitlines():
         line = line.strip()
-        m = re.match(r'^\s*([1-5])\s*[-.:]\s*(.+)$', line, re.DOTALL)
+        m = _RE_NOTA_INLINE.match(line)
         if m:
             n = int(m.group(1))
             com = (m.group(2).strip() or '')[:60]
             return {'nota': n, 'comentario': com or 'OK'}
-        m = re.match(r'^\s*([1-5])\s*$', line)
+        m = _RE_NOTA_ONLY.match(line)
         if m:
             return {'nota': int(m.group(1)), 'comentario': 'OK'}
     # Remove markdown code block
@@ -886,83 +1315,111 @@ def _parse_ollama_nota_response(content):
             if p.startswith('{'):
                 content = p
                 break
-    # Extrai primeiro {...} balanceado
+    # Decodifica o primeiro objeto JSON a partir do primeiro '{'. Caso comum (resposta só com o objeto): orjson no trecho
+    # até o último '}'; senão raw_decode em C (ignora o texto depois do objeto)
     start = content.find('{')
     if start >= 0:
-        depth = 0
-        in_string = None
-        escape = False
-        i = start
-        while i < len(content):
-            c = content[i]
-            if escape:
-                escape = False
-                i += 1
-                continue
-            if c == '\\' and in_string:
-                escape = True
-                i += 1
-                continue
-            if in_string:
-                if c == in_string:
-                    in_string = None
-                i += 1
-                continue
-            if c in ('"', "'"):
-                in_string = c
-                i += 1
-                continue
-            if c == '{':
-                depth += 1
-            elif c == '}':
-                depth -= 1
-                if depth == 0:
-                    content = content[start:i + 1]
-                    break
-            i += 1
-    try:
-        data = json.loads(content)
-        nota = data.get('nota')
-        if nota is not None:
+        data = None
+        if orjson is not None:
             try:
-                nota = max(1, min(5, int(nota)))
-            except (TypeError, ValueError):
-                nota = None
-        if nota is None or nota < 1 or nota > 5:
-            nota = None  # não considerar 0 ou inválido como avaliado
-        com = (data.get('comentario') or '')[:60]
-        return {'nota': nota if nota is not None else 0, 'comentario': com or 'OK'}
-    except (json.JSONDecodeError, TypeError):
-        pass
+                data = orjson.loads(content[start:content.rfind('}') + 1])
+            except orjson.JSONDecodeError:
+                pass
+        if data is None:
+            try:
+                data, _end = _JSON_DECODER.raw_decode(content, start)
+            except json.JSONDecodeError:
+                # Não é JSON válido (ex.: aspas simples): os fallbacks abaixo olham só o primeiro {...} balanceado
+                # (um segundo objeto depois dele não pode trocar a nota)
+                end = _first_object_end(content, start)
+                if end:
+                    content = content[start:end]
+        if isinstance(data, dict):
+            nota = data.get('nota')
+            if nota is not None:
+                try:
+                    nota = max(1, min(5, int(nota)))
+                except (TypeError, ValueError):
+                    nota = None
+            if nota is None or nota < 1 or nota > 5:
+                nota = None  # não considerar 0 ou inválido como avaliado
+            com = (data.get('comentario') or '')[:60]
+            return {'nota': nota if nota is not None else 0, 'comentario': com or 'OK'}
     # Fallback: procurar "nota": N no texto (aceita string ou número)
-    m = re.search(r'"nota"\s*:\s*["\']?(\d+)["\']?', content, re.I)
+    m = _RE_NOTA_JSON.search(content)
     if m:
         nota = max(1, min(5, int(m.group(1))))
         com = ''
-        mc = re.search(r'"comentario"\s*:\s*"((?:[^"\\]|\\.)*)"', content, re.I)
+        mc = _RE_NOTA_COM.search(content)
         if mc:
             com = (mc.group(1).replace('\\"', '"') or '')[:60]
         if 1 <= nota <= 5:
             return {'nota': nota, 'comentario': (com or 'OK')[:60]}
     # Último recurso: qualquer menção a nota 1–5
-    for pattern in (r'nota\s*[=:]\s*["\']?([1-5])["\']?', r'["\']nota["\']\s*:\s*([1-5])\b', r'\b([1-5])\s*/\s*5', r'\bnota\s+([1-5])\b'):
-        m = re.search(pattern, content, re.I)
+    for pattern in _RE_NOTA_FALLBACKS:
+        m = pattern.search(content)
         if m:
             n = int(m.group(1))
             if 1 <= n <= 5:
                 return {'nota': n, 'comentario': 'OK'}
     # Qualquer dígito 1–5 na resposta (garantir que nenhum chamado fique sem nota)
     for chunk in (content[-300:], content):
-        m = re.search(r'\b([1-5])\b', chunk)
+        m = _RE_NOTA_DIGIT.search(chunk)
         if m:
             return {'nota': int(m.group(1)), 'comentario': 'OK'}
     return None
 
 
-def get_issue_note_from_ollama(issue, ollama_url, model=None, field_ids=None, comments_text=None, auth=None):
+# Cenário 2: SLA CRÍTICO. Foco no atendimento e nas ações do Assignee; evitar linguagem muito técnica.
+# Parte fixa do prompt de nota (montada uma vez); por ticket só se concatena o contexto.
+_NOTA_PROMPT_PREAMBLE = (
+    'Você é um QA que avalia o atendimento prestado pelo analista (Assignee). '
+    'REGRA OBRIGATÓRIA: O Assignee NUNCA pode ser atendido — é ele quem atende. Reporter = quem foi atendido; Assignee = quem atende. '
+    'O resumo deve descrever as AÇÕES do Assignee (verbo no ativo), não do Reporter.\n\n'
+    'PROIBIDO (erros graves): '
+    '"X atendeu o Assignee" ou "atendeu o analista" (o Assignee é quem atende, nunca o objeto de "atender"); '
+    '"X atendido" ou "X atendido e prestou atendimento" quando X é o analista (o analista é quem atendeu, nunca "foi atendido"); '
+    '"atended" (inglês). '
+    'Correto: "O analista atendeu bem"; "Atendeu o solicitante e resolveu"; "Prestou atendimento no prazo". '
+    'LÍNGUA E GRAMÁTICA: Responda em pt-BR, com gramática e conjugação corretas. '
+    'O Assignee é sempre SUJEITO da ação: "atendeu", "prestou atendimento", "respondeu", "resolveu". '
+    'Concordância, acentuação e pontuação em pt-BR.\n\n'
+    'Foque no que o Assignee fez: respondeu no prazo? Foi claro? Resolveu? Marcou o Reporter (@Reporter)? '
+    'Use os dados: Satisfaction (1-5), SLA (Cumprido/Estourado), Comments do Assignee. '
+    'REGRA: Satisfaction 1, 2 ou 3 = insatisfação (NUNCA diga que o Reporter está satisfeito). Só 4 ou 5 = satisfeito.\n\n'
+    'Resposta em UMA LINHA: N - resumo em até 10 palavras. Ex: 4 - Atendeu bem, solução clara. Ex: 1 - Insatisfação, rever atendimento.\n\n'
+    'Dados do chamado (Assignee, Comments, TTR, FRT, Satisfaction):\n'
+)
+
+
+# Options por endpoint no prompt de nota (/api/generate sem options; /v1 usa temperature no topo do payload)
+_NOTA_OLLAMA_OPTIONS = {'/api/chat': {'temperature': 0}}
+
+
+def build_ollama_nota_prompt(issue, field_ids=None, comments_text=None, auth=None, sla_list=None):
+    """
+    Monta o prompt de nota do Ollama para o chamado (contexto + Comments + SLAs do Jira quando auth).
+    Quem reavalia o mesmo ticket várias vezes monta uma vez e repassa em get_issue_note_from_ollama(prompt=...).
+    sla_list: SLAs já buscados para o ticket (ex.: uma vez por lote); se None, busca no Jira quando há auth.
+    """
+    context = _issue_context_for_ollama(issue, field_ids)
+    if comments_text and comments_text.strip():
+        context += '\n\nComments (respostas do Assignee):\n' + (comments_text.strip()[:2500])
+    if sla_list is None and auth and issue.get('key'):
+        sla_list = fetch_issue_sla(auth, issue.get('key'))
+    if sla_list:
+        sla_text = _format_sla_list_for_ollama(sla_list)
+        if sla_text:
+            context += '\n\nSLAs (Jira): [FRT]=First Response Time, [TTR]=Time to Resolution. O status (Cumprido/Estourado) é o do Jira para ESTE ticket — não use valor fixo, respeite apenas o que consta abaixo por análise individual.\n' + sla_text
+    context = context[:3500]
+    return _NOTA_PROMPT_PREAMBLE + context
+
+
+def get_issue_note_from_ollama(issue, ollama_url, model=None, field_ids=None, comments_text=None, auth=None, prompt=None):
     """
     Usa Ollama (modelo local) para dar nota de 1 a 5 ao chamado. Em falha retorna nota None.
     Se auth for passado, inclui no contexto os SLAs do Jira (seção SLAs: nome + cumprido/estourado).
+    prompt: prompt já montado por build_ollama_nota_prompt (evita remontar o contexto a cada tentativa).
 
     Por que o Ollama pode falhar em avaliar um ticket:
     - Timeout/conexão: Ollama lento ou inacessível (5 tentativas por endpoint, timeout 120s).
@@ -1009,240 +1466,173 @@ def get_issue_note_from_ollama(issue, ollama_url, model=None, field_ids=None, co
     # Verificação rápida e lista de modelos instalados (tentar primeiro os que existem)
     models_installed = []
     try:
-        r = requests.get(f'{base}/api/tags', timeout=5)
-        if r.status_code == 404:
+        status, models_installed = _ollama_installed_models(base)
+        if status == 404:
             return _fail('Não avaliado (Ollama: URL não é o daemon Ollama — verifique OLLAMA_URL, ex: http://127.0.0.1:11434)')
-        if r.status_code == 200:
-            data = r.json()
-            for item in (data.get('models') or []):
-                name = (item.get('name') or item.get('model') or '').strip()
-                if name and name not in models_installed:
-                    models_installed.append(name)
     except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
         return _fail('Não avaliado (Ollama indisponível ou timeout)')
     except Exception:
         pass
-    context = _issue_context_for_ollama(issue, field_ids)
-    if comments_text and comments_text.strip():
-        context += '\n\nComments (respostas do Assignee):\n' + (comments_text.strip()[:2500])
-    if auth and issue.get('key'):
-        sla_list = fetch_issue_sla(auth, issue.get('key'))
-        sla_text = _format_sla_list_for_ollama(sla_list)
-        if sla_text:
-            context += '\n\nSLAs (Jira): [FRT]=First Response Time, [TTR]=Time to Resolution. O status (Cumprido/Estourado) é o do Jira para ESTE ticket — não use valor fixo, respeite apenas o que consta abaixo por análise individual.\n' + sla_text
-    context = context[:3500]
-
-    # Cenário 2: SLA CRÍTICO. Foco no atendimento e nas ações do Assignee; evitar linguagem muito técnica.
-    prompt = (
-        'Você é um QA que avalia o atendimento prestado pelo analista (Assignee). '
-        'REGRA OBRIGATÓRIA: O Assignee NUNCA pode ser atendido — é ele quem atende. Reporter = quem foi atendido; Assignee = quem atende. '
-        'O resumo deve descrever as AÇÕES do Assignee (verbo no ativo), não do Reporter.\n\n'
-        'PROIBIDO (erros graves): '
-        '"X atendeu o Assignee" ou "atendeu o analista" (o Assignee é quem atende, nunca o objeto de "atender"); '
-        '"X atendido" ou "X atendido e prestou atendimento" quando X é o analista (o analista é quem atendeu, nunca "foi atendido"); '
-        '"atended" (inglês). '
-        'Correto: "O analista atendeu bem"; "Atendeu o solicitante e resolveu"; "Prestou atendimento no prazo". '
-        'LÍNGUA E GRAMÁTICA: Responda em pt-BR, com gramática e conjugação corretas. '
-        'O Assignee é sempre SUJEITO da ação: "atendeu", "prestou atendimento", "respondeu", "resolveu". '
-        'Concordância, acentuação e pontuação em pt-BR.\n\n'
-        'Foque no que o Assignee fez: respondeu no prazo? Foi claro? Resolveu? Marcou o Reporter (@Reporter)? '
-        'Use os dados: Satisfaction (1-5), SLA (Cumprido/Estourado), Comments do Assignee. '
-        'REGRA: Satisfaction 1, 2 ou 3 = insatisfação (NUNCA diga que o Reporter está satisfeito). Só 4 ou 5 = satisfeito.\n\n'
-        'Resposta em UMA LINHA: N - resumo em até 10 palavras. Ex: 4 - Atendeu bem, solução clara. Ex: 1 - Insatisfação, rever atendimento.\n\n'
-        'Dados do chamado (Assignee, Comments, TTR, FRT, Satisfaction):\n' + context
-    )
+    # Prompt montado uma vez por chamada (ou recebido pronto do caller que reavalia o mesmo ticket em loop)
+    if prompt is None:
+        prompt = build_ollama_nota_prompt(issue, field_ids, comments_text=comments_text, auth=auth)
     max_retries = 4  # 5 tentativas por endpoint para obter nota 1–5 (sem fallback)
-    fallback_models = [model, 'llama3.2', 'llama3.1', 'llama3', 'qwen2.5:0.5b', 'qwen2.5', 'mistral', 'gemma2:2b']
-    seen = set()
-    models_to_try = []
-    for name in models_installed + fallback_models:
-        n = (name or '').strip()
-        if n and n not in seen:
-            seen.add(n)
-            models_to_try.append(n)
+    models_to_try = _build_models_to_try(tuple(models_installed), model)
     got_404 = False
     for m in models_to_try:
         if not m:
             continue
         m = m.strip()
-        # 1) /api/generate (mais estável em muitas instalações)
-        for attempt in range(max_retries + 1):
-            try:
-                r = requests.post(
-                    f'{base}/api/generate',
-                    json={'model': m, 'prompt': prompt, 'stream': False},
-                    timeout=120,
-                )
-                if r.status_code == 404:
-                    got_404 = True
-                    break
-                if r.status_code == 200:
-                    data = r.json()
-                    content = (data.get('response') or '').strip()
-                    if content:
-                        result = _parse_ollama_nota_response(content)
-                        if result and result.get('nota') and 1 <= result.get('nota') <= 5:
-                            return _apply_satisfaction_feedback(result)
-                if attempt < max_retries:
-                    time.sleep(1.5)
-            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
-                if attempt >= max_retries:
-                    return _fail('Não avaliado (Ollama indisponível ou timeout)')
-                time.sleep(1.5)
-            except Exception:
-                if attempt < max_retries:
-                    time.sleep(1.5)
-                break
-        # 2) /api/chat
-        for attempt in range(max_retries + 1):
-            try:
-                r = requests.post(
-                    f'{base}/api/chat',
-                    json={
-                        'model': m,
-                        'messages': [{'role': 'user', 'content': prompt}],
-                        'stream': False,
-                        'options': {'temperature': 0},
-                    },
-                    timeout=120,
-                )
-                if r.status_code == 404:
-                    got_404 = True
-                    break
-                if r.status_code == 200:
-                    data = r.json()
-                    msg = data.get('message') or {}
-                    content = (msg.get('content') or '').strip()
-                    if content:
-                        result = _parse_ollama_nota_response(content)
-                        if result and result.get('nota') and 1 <= result.get('nota') <= 5:
-                            return _apply_satisfaction_feedback(result)
-                if attempt < max_retries:
-                    time.sleep(1.5)
-            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
-                if attempt >= max_retries:
-                    return _fail('Não avaliado (Ollama indisponível ou timeout)')
-                time.sleep(1.5)
-            except Exception:
-                if attempt < max_retries:
-                    time.sleep(1.5)
-                break
-        # 3) /v1/chat/completions (API compatível com OpenAI; alguns proxies/Ollama só expõem isso)
-        for attempt in range(max_retries + 1):
-            try:
-                r = requests.post(
-                    f'{base}/v1/chat/completions',
-                    json={
-                        'model': m,
-                        'messages': [{'role': 'user', 'content': prompt}],
-                        'stream': False,
-                        'temperature': 0,
-                    },
-                    timeout=120,
-                )
-                if r.status_code == 404:
-                    got_404 = True
-                    break
-                if r.status_code == 200:
-                    data = r.json()
-                    if data.get('error'):
-                        if attempt < max_retries:
-                            time.sleep(1.5)
+        # /api/generate → /api/chat → /v1/chat/completions (o que já funcionou para esta base vem primeiro)
+        for suffix, build_payload, extract_content in _ollama_endpoints_for(base):
+            for attempt in range(max_retries + 1):
+                try:
+                    r = _ollama_post(f'{base}{suffix}', build_payload(m, prompt, _NOTA_OLLAMA_OPTIONS.get(suffix)), 120)
+                    if r.status_code == 404:
+                        got_404 = True
                         break
-                    choices = data.get('choices') or []
-                    if choices:
-                        content = (choices[0].get('message') or {}).get('content') or ''
-                        content = content.strip()
+                    if r.status_code == 200:
+                        content = extract_content(_response_json(r))
+                        if content is None:
+                            if attempt < max_retries:
+                                time.sleep(1.5)
+                            break
                         if content:
                             result = _parse_ollama_nota_response(content)
                             if result and result.get('nota') and 1 <= result.get('nota') <= 5:
-                                return _apply_satisfaction_feedback(result)
-                if attempt < max_retries:
+                                result = _apply_satisfaction_feedback(result)
+                                _ollama_preferred_endpoint[base] = suffix
+                                return result
+                    if attempt < max_retries:
+                        time.sleep(1.5)
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                    if attempt >= max_retries:
+                        return _fail('Não avaliado (Ollama indisponível ou timeout)')
                     time.sleep(1.5)
-            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
-                if attempt >= max_retries:
-                    return _fail('Não avaliado (Ollama indisponível ou timeout)')
-                time.sleep(1.5)
-            except Exception:
-                if attempt < max_retries:
-                    time.sleep(1.5)
-                break
+                except Exception:
+                    if attempt < max_retries:
+                        time.sleep(1.5)
+                    break
         # Não interromper o loop por 404: /v1/chat/completions pode existir mesmo quando /api/generate e /api/chat retornam 404; tentar todos os modelos.
     if got_404:
         return _fail('Não avaliado (Ollama: /api/generate, /api/chat e /v1/chat/completions não encontrados — verifique OLLAMA_URL, ex: http://127.0.0.1:11434)')
     return _fail('Não avaliado (Ollama sem modelo compatível ou resposta inválida)')
 
 
+# Regex/termos de metadata em pontos (chave Jira, "(assignee) [at]" etc.), compilados uma vez
+_RE_JIRA_KEY_ONLY = re.compile(r'^[A-Za-z]{2,}-\d+$')
+_RE_PAREN_NUM_END = re.compile(r'\s*\(\d+\)\s*$')
+_RE_ROLE_TAG_PREFIX = re.compile(r'^[\w\s]+\((assignee|reporter)\)\s*\[[\w.]+\]')
+_ROLE_PAREN_RE = _terms_regex(('(assignee)', '(reporter)'))
+_METADATA_TAG_RE = _terms_regex(('[at]', '[resolved]', '[acao]', '[argumento]'))
+
+
 def _is_nonsense_or_metadata_ponto(text):
     """Retorna True se o texto for chave Jira, metadata (assignee/reporter + [at]/[resolved]/[acao]/[argumento]) ou placeholder sem sentido."""
-    import re
     if not text or not isinstance(text, str):
         return True
     t = text.strip()
     t_lower = t.lower()
-    if re.match(r'^[A-Za-z]{2,}-\d+$', t.strip()):
+    if _RE_JIRA_KEY_ONLY.match(t):
         return True
-    if '(assignee)' in t_lower or '(reporter)' in t_lower:
-        if '[at]' in t_lower or '[resolved]' in t_lower or '[acao]' in t_lower or '[argumento]' in t_lower:
+    if _ROLE_PAREN_RE.search(t_lower):
+        if _METADATA_TAG_RE.search(t_lower):
             return True
-        if re.search(r'\s*\(\d+\)\s*$', t):
+        if _RE_PAREN_NUM_END.search(t):
             return True
     if '[acao]' in t_lower and '[argumento]' in t_lower:
         return True
     if '[at]' in t_lower and 'resolved' in t_lower and ('assignee' in t_lower or 'reporter' in t_lower):
         return True
-    if re.match(r'^[\w\s]+\((assignee|reporter)\)\s*\[[\w.]+\]', t_lower):
+    if _RE_ROLE_TAG_PREFIX.match(t_lower):
         return True
     return False
 
 
+# Acentos do português -> ASCII num único str.translate; o que sobrar fora do ASCII vai para o NFD
+_ACCENT_TABLE = str.maketrans(
+    'áàâãäéèêëíìîïóòôõöúùûüçÁÀÂÃÄÉÈÊËÍÌÎÏÓÒÔÕÖÚÙÛÜÇ',
+    'aaaaaeeeeiiiiooooouuuucAAAAAEEEEIIIIOOOOOUUUUC',
+)
+
+
+@functools.lru_cache(maxsize=4096)
+def _strip_accents(t):
+    """Remove acentos (NFD sem marcas combinantes). ASCII puro volta direto, sem normalizar."""
+    if t.isascii():
+        return t
+    t = t.translate(_ACCENT_TABLE)
+    if t.isascii():
+        return t
+    return ''.join(c for c in unicodedata.normalize('NFD', t) if unicodedata.category(c) != 'Mn')
+
+
+# Placeholders sem valor analítico (comparados já sem acento, minúsculos e sem '#' inicial)
+_PONTO_BLOCKLIST = frozenset((
+    'n/a', 'na', 'nenhuma', 'nenhum', 'nenhuma.', 'nenhum.',
+    'nao mencionado', 'não mencionado', 'not mentioned', 'none', 'n.a.', 'n.a',
+    'melhoria', 'melhoria:', 'forte', 'forte:',
+    'sem melhoria', 'sem forte', 'nao aplicavel', 'não aplicável', 'n/a.',
+    'nao especificado', 'não especificado', 'nao informado', 'não informado',
+    'no', 'nao', 'não', 'nada', 'nada.', 'nao ha', 'não há', 'sem conteudo',
+    'no specific', 'not specified', 'not applicable',
+    'no especificamente', 'não especificamente', 'nao especificamente',
+    '### melhoria', '### forte', '# melhoria', '# forte',
+))
+_PONTO_BLOCKLIST_PREFIX_RE = re.compile('|'.join(re.escape(b + ' ') for b in sorted(_PONTO_BLOCKLIST)))
+# Palavras-chave de ponto negativo / positivo: uma regex de alternância por categoria (uma varredura do texto)
+_MELHORIA_KEYWORDS = (
+    'estourado', 'estourou', 'fora do sla', 'extrapolou', 'atraso', 'atrasou',
+    'nao seguida', 'não seguida', 'regra nao', 'regra não', 'violou', 'violacao',
+    'baixo', 'insatisfatorio', 'insatisfatório', 'incompleto', 'incompleta',
+    'inadequad', 'vago', 'vagos', 'inadequado', 'negativo', 'negativos',
+    'pontos de melhoria', 'melhoria:', 'frt estourado', 'ttr estourado',
+    'satisfaction 1', 'satisfaction 2', 'satisfaction baixo', 'sem @reporter',
+    'nao alcanca', 'não alcança', 'satisfacao nao alcanca', 'satisfação não alcança',
+)
+_FORTE_KEYWORDS = (
+    'dentro do sla', 'cumprido', 'cumprida', 'no prazo', 'no tempo',
+    'alto', 'satisfaction alto', 'satisfaction 4', 'satisfaction 5',
+    'clara', 'claro', 'resolutivo', 'resolutiva', 'marcou @', 'corporativa',
+    'educado', 'regras seguidas', 'forte:', 'pontos fortes',
+)
+_MELHORIA_RE = _terms_regex(_MELHORIA_KEYWORDS)
+_FORTE_RE = _terms_regex(_FORTE_KEYWORDS)
+
+
 def _is_sensible_ponto(text):
     """Retorna False se o texto for genérico/placeholder sem valor analítico (n/a, nenhuma, melhoria:, etc.)."""
     if not text or not isinstance(text, str):
         return False
     if _is_nonsense_or_metadata_ponto(text):
         return False
-    import unicodedata
     t = text.strip().lower()
     if len(t) < 8:
         return False
-    t_norm = ''.join(c for c in unicodedata.normalize('NFD', t) if unicodedata.category(c) != 'Mn')
-    blocklist = {
-        'n/a', 'na', 'nenhuma', 'nenhum', 'nenhuma.', 'nenhum.',
-        'nao mencionado', 'não mencionado', 'not mentioned', 'none', 'n.a.', 'n.a',
-        'melhoria', 'melhoria:', 'forte', 'forte:',
-        'sem melhoria', 'sem forte', 'nao aplicavel', 'não aplicável', 'n/a.',
-        'nao especificado', 'não especificado', 'nao informado', 'não informado',
-        'no', 'nao', 'não', 'nada', 'nada.', 'nao ha', 'não há', 'sem conteudo',
-        'no specific', 'not specified', 'not applicable',
-        'no especificamente', 'não especificamente', 'nao especificamente',
-        '### melhoria', '### forte', '# melhoria', '# forte', 'melhoria:', 'forte:',
-    }
+    t_norm = _strip_accents(t)
     t_norm = t_norm.lstrip('#').strip()
-    if t_norm in blocklist:
+    # Igual a um item da blocklist (com ou sem ponto final) ou começa com "item " -> placeholder
+    if t_norm in _PONTO_BLOCKLIST or t_norm.rstrip('.') in _PONTO_BLOCKLIST:
         return False
-    for b in blocklist:
-        if len(b) > 4 and t_norm == b:
-            return False
-        if t_norm.startswith(b + ' ') or t_norm == b or t_norm.rstrip('.') == b:
-            return False
-    if t_norm in ('melhoria:', 'forte:', 'melhoria', 'forte'):
+    if _PONTO_BLOCKLIST_PREFIX_RE.match(t_norm):
         return False
     return True
 
 
+# Cabeçalhos de regra (qualquer categoria) e termos da categoria oposta: uma varredura por regex
+_RULE_HEADER_RE = _terms_regex(('regra:', 'regra :', 'pontos de melhoria =', 'pontos fortes ='))
+_RULE_POSITIVE_RE = _terms_regex(('regras seguidas', 'pontos positivos'))  # inclui '5 pontos positivos'
+_RULE_NEGATIVE_RE = _terms_regex(('regras não seguidas', 'regras nao seguidas', 'pontos negativos'))
+
+
 def _is_rule_or_wrong_category(text, for_melhoria=True):
     """Rejeita texto que é cabeçalho de regra ou categoria trocada (ex.: 'Regra: Pontos de Melhoria = 5 pontos Positivos')."""
     if not text or not isinstance(text, str):
         return True
     t = text.strip().lower()
-    if 'regra:' in t or 'regra :' in t or 'pontos de melhoria =' in t or 'pontos fortes =' in t:
-        return True
-    if for_melhoria and ('regras seguidas' in t or 'pontos positivos' in t or '5 pontos positivos' in t):
+    if _RULE_HEADER_RE.search(t):
         return True
-    if not for_melhoria and ('regras não seguidas' in t or 'regras nao seguidas' in t or 'pontos negativos' in t):
-        return True
-    return False
+    return (_RULE_POSITIVE_RE if for_melhoria else _RULE_NEGATIVE_RE).search(t) is not None
 
 
 def _looks_like_melhoria(text):
@@ -1250,17 +1640,8 @@ def _looks_like_melhoria(text):
     if not text or not isinstance(text, str):
         return False
     t = text.strip().lower()
-    t = ''.join(c for c in unicodedata.normalize('NFD', t) if unicodedata.category(c) != 'Mn')
-    keywords = (
-        'estourado', 'estourou', 'fora do sla', 'extrapolou', 'atraso', 'atrasou',
-        'nao seguida', 'não seguida', 'regra nao', 'regra não', 'violou', 'violacao',
-        'baixo', 'insatisfatorio', 'insatisfatório', 'incompleto', 'incompleta',
-        'inadequad', 'vago', 'vagos', 'inadequado', 'negativo', 'negativos',
-        'pontos de melhoria', 'melhoria:', 'frt estourado', 'ttr estourado',
-        'satisfaction 1', 'satisfaction 2', 'satisfaction baixo', 'sem @reporter',
-        'nao alcanca', 'não alcança', 'satisfacao nao alcanca', 'satisfação não alcança',
-    )
-    return any(k in t for k in keywords)
+    t = _strip_accents(t)
+    return _MELHORIA_RE.search(t) is not None
 
 
 def _looks_like_forte(text):
@@ -1268,14 +1649,8 @@ def _looks_like_forte(text):
     if not text or not isinstance(text, str):
         return False
     t = text.strip().lower()
-    t = ''.join(c for c in unicodedata.normalize('NFD', t) if unicodedata.category(c) != 'Mn')
-    keywords = (
-        'dentro do sla', 'cumprido', 'cumprida', 'no prazo', 'no tempo',
-        'alto', 'satisfaction alto', 'satisfaction 4', 'satisfaction 5',
-        'clara', 'claro', 'resolutivo', 'resolutiva', 'marcou @', 'corporativa',
-        'educado', 'regras seguidas', 'forte:', 'pontos fortes',
-    )
-    return any(k in t for k in keywords)
+    t = _strip_accents(t)
+    return _FORTE_RE.search(t) is not None
 
 
 def _normalize_for_contradiction(text):
@@ -1283,7 +1658,79 @@ def _normalize_for_contradiction(text):
     if not text or not isinstance(text, str):
         return ''
     t = text.strip().lower()
-    return ''.join(c for c in unicodedata.normalize('NFD', t) if unicodedata.category(c) != 'Mn')
+    return _strip_accents(t)
+
+
+# Indicadores de um ponto (bits) para _remove_contradictions
+_PF_FRT_ESTOURADO = 1 << 0        # "frt estourado" / "first response ... estourado" (remove de melhoria)
+_PF_FRT_ESTOURADO_AMPLO = 1 << 1  # idem + "first response ... fora" (detecta em melhoria)
+_PF_TTR_ESTOURADO = 1 << 2        # "ttr estourado" / "time to resolution|close ... estourado"
+_PF_TTR_ESTOURADO_AMPLO = 1 << 3  # idem + "resolution ... estourado"
+_PF_CSAT_BAIXO = 1 << 4
+_PF_TAGS = 1 << 5
+_PF_TAPI = 1 << 6
+_PF_SLA_INVALIDO = 1 << 7         # "fora do sla" ou TTR e FRT na mesma linha: nunca é ponto forte
+_PF_FRT_DENTRO = 1 << 8
+_PF_TTR_DENTRO = 1 << 9
+_PF_CSAT_ALTO = 1 << 10           # CSAT entre 4/5, alto, satisfaction 4/5
+_PF_CSAT_ALTO_ATE_6 = 1 << 11     # idem + "entre 6"
+_PF_TAGS_ADEQUADO = 1 << 12
+_PF_TAPI_ENTRE = 1 << 13
+
+# Regras aplicadas em ordem: (gatilho está em melhoria?, bits do gatilho, bits removidos do outro lado)
+_CONTRADICAO_REGRAS = (
+    # SLA: remover de fortes apenas o SLA que está estourado em melhoria (se só FRT estourou, manter "TTR dentro do SLA")
+    (True, _PF_FRT_ESTOURADO_AMPLO, _PF_FRT_DENTRO),
+    (True, _PF_TTR_ESTOURADO_AMPLO, _PF_TTR_DENTRO),
+    # SLA: se em fortes há "FRT/TTR dentro do SLA", remover de melhoria o respectivo "estourado"
+    (False, _PF_FRT_DENTRO, _PF_FRT_ESTOURADO),
+    (False, _PF_TTR_DENTRO, _PF_TTR_ESTOURADO),
+    # CSAT: baixo em melhoria remove CSAT alto de fortes; alto (até "entre 6") em fortes remove CSAT baixo de melhoria
+    (True, _PF_CSAT_BAIXO, _PF_CSAT_ALTO),
+    (False, _PF_CSAT_ALTO_ATE_6, _PF_CSAT_BAIXO),
+    # Tags/categorias negativas em melhoria removem "uso adequado das tags" de fortes
+    (True, _PF_TAGS, _PF_TAGS_ADEQUADO),
+    # TAPI (tolerância) em melhoria remove "TAPI está entre" de fortes
+    (True, _PF_TAPI, _PF_TAPI_ENTRE),
+)
+
+
+def _ponto_flags(n):
+    """Bits _PF_* de um ponto já normalizado (_normalize_for_contradiction)."""
+    flags = 0
+    sla_ctx = 'dentro' in n or 'cumprido' in n or 'sla' in n
+    # Lado melhoria: SLA estourado (amplo para detectar; estrito para remover) / CSAT baixo / tags / TAPI
+    if 'estourado' in n:
+        if 'frt estourado' in n or 'first response' in n:
+            flags |= _PF_FRT_ESTOURADO | _PF_FRT_ESTOURADO_AMPLO
+        if 'ttr estourado' in n or 'time to resolution' in n or 'time to close' in n:
+            flags |= _PF_TTR_ESTOURADO | _PF_TTR_ESTOURADO_AMPLO
+        elif 'resolution' in n:
+            flags |= _PF_TTR_ESTOURADO_AMPLO
+    if 'first response' in n and 'fora' in n:
+        flags |= _PF_FRT_ESTOURADO_AMPLO
+    if 'csat baix' in n or 'satisfaction 1' in n or 'satisfaction 2' in n:
+        flags |= _PF_CSAT_BAIXO
+    if 'tags' in n or 'categorias' in n:
+        flags |= _PF_TAGS
+    if 'tapi' in n or 'tolerancia' in n or 'tolerância' in n:
+        flags |= _PF_TAPI
+    # Lado forte: SLA fora / TTR+FRT na mesma linha / dentro do SLA / CSAT alto / uso adequado de tags / TAPI entre
+    if 'fora do sla' in n or 'fora sla' in n or ('ttr' in n and 'frt' in n):
+        flags |= _PF_SLA_INVALIDO
+    if sla_ctx and ('frt' in n or 'first response' in n):
+        flags |= _PF_FRT_DENTRO
+    if sla_ctx and ('ttr' in n or 'resolution' in n or 'time to close' in n):
+        flags |= _PF_TTR_DENTRO
+    if 'csat' in n and ('entre 4' in n or 'entre 5' in n or 'alto' in n or 'satisfaction 4' in n or 'satisfaction 5' in n):
+        flags |= _PF_CSAT_ALTO | _PF_CSAT_ALTO_ATE_6
+    elif 'csat' in n and 'entre 6' in n:
+        flags |= _PF_CSAT_ALTO_ATE_6
+    if 'uso adequado' in n and ('tags' in n or 'categorias' in n):
+        flags |= _PF_TAGS_ADEQUADO
+    if 'tapi' in n and 'entre' in n:
+        flags |= _PF_TAPI_ENTRE
+    return flags
 
 
 def _remove_contradictions(melhorias, fortes):
@@ -1293,93 +1740,32 @@ def _remove_contradictions(melhorias, fortes):
     """
     if not melhorias and not fortes:
         return list(melhorias), list(fortes)
-    mel = list(melhorias)
-    fort = list(fortes)
-
-    # SLA: remover de fortes apenas o SLA que está estourado em melhoria. Ex.: se só FRT estourou, manter "TTR dentro do SLA" em fortes; nunca "TTR/FRT dentro do SLA" numa linha.
-    nf = _normalize_for_contradiction
-    mel_has_frt_estourado = any(
-        'frt estourado' in nf(m) or ('first response' in nf(m) and ('estourado' in nf(m) or 'fora' in nf(m)))
-        or 'time to first response' in nf(m) and 'estourado' in nf(m)
-        for m in mel
-    )
-    mel_has_ttr_estourado = any(
-        'ttr estourado' in nf(m) or ('time to resolution' in nf(m) or 'time to close' in nf(m)) and 'estourado' in nf(m)
-        or 'resolution' in nf(m) and 'estourado' in nf(m)
-        for m in mel
-    )
-    def _forte_contradiz_sla(f):
-        n = nf(f)
-        if 'fora do sla' in n or 'fora sla' in n:
-            return True
-        if 'ttr' in n and 'frt' in n:
-            return True
-        if mel_has_frt_estourado and ('frt' in n or 'first response' in n) and ('dentro' in n or 'cumprido' in n or 'sla' in n):
-            return True
-        if mel_has_ttr_estourado and ('ttr' in n or 'resolution' in n or 'time to close' in n) and ('dentro' in n or 'cumprido' in n or 'sla' in n):
-            return True
-        return False
-    fort = [f for f in fort if not _forte_contradiz_sla(f)]
-
-    # SLA: se em fortes há "FRT dentro do SLA", remover de melhoria "FRT estourado"; se fortes há "TTR dentro do SLA", remover de melhoria "TTR estourado"
-    fort_has_frt_dentro = any(
-        ('frt' in nf(f) or 'first response' in nf(f)) and ('dentro' in nf(f) or 'cumprido' in nf(f) or 'sla' in nf(f))
-        for f in fort
-    )
-    fort_has_ttr_dentro = any(
-        ('ttr' in nf(f) or 'resolution' in nf(f) or 'time to close' in nf(f)) and ('dentro' in nf(f) or 'cumprido' in nf(f) or 'sla' in nf(f))
-        for f in fort
-    )
-    if fort_has_frt_dentro:
-        mel = [m for m in mel if not ('frt estourado' in nf(m) or ('first response' in nf(m) and 'estourado' in nf(m)))]
-    if fort_has_ttr_dentro:
-        mel = [m for m in mel if not ('ttr estourado' in nf(m) or ('time to resolution' in nf(m) or 'time to close' in nf(m)) and 'estourado' in nf(m))]
-
-    # CSAT: se melhoria tem CSAT baixo (Satisfaction 1-2), remover de fortes CSAT alto / entre 4 e 6
-    mel_has_csat_baixo = any(
-        'csat baix' in _normalize_for_contradiction(m) or 'satisfaction 1' in _normalize_for_contradiction(m) or 'satisfaction 2' in _normalize_for_contradiction(m)
-        for m in mel
-    )
-    if mel_has_csat_baixo:
-        fort = [f for f in fort if not (
-            'csat' in _normalize_for_contradiction(f) and ('entre 4' in _normalize_for_contradiction(f) or 'entre 5' in _normalize_for_contradiction(f) or 'alto' in _normalize_for_contradiction(f) or 'satisfaction 4' in _normalize_for_contradiction(f) or 'satisfaction 5' in _normalize_for_contradiction(f))
-        )]
-
-    # CSAT: se fortes tem CSAT alto, remover de melhoria CSAT baixo
-    fort_has_csat_alto = any(
-        'csat' in _normalize_for_contradiction(f) and ('entre 4' in _normalize_for_contradiction(f) or 'entre 5' in _normalize_for_contradiction(f) or 'entre 6' in _normalize_for_contradiction(f) or 'alto' in _normalize_for_contradiction(f) or 'satisfaction 4' in _normalize_for_contradiction(f) or 'satisfaction 5' in _normalize_for_contradiction(f))
-        for f in fort
-    )
-    if fort_has_csat_alto:
-        mel = [m for m in mel if not (
-            'csat baix' in _normalize_for_contradiction(m) or 'satisfaction 1' in _normalize_for_contradiction(m) or 'satisfaction 2' in _normalize_for_contradiction(m)
-        )]
-
-    # Tags/categorias: se melhoria tem uso de tags negativo, remover de fortes "uso adequado das tags"
-    mel_has_tags_neg = any(
-        'tags' in _normalize_for_contradiction(m) or 'categorias' in _normalize_for_contradiction(m)
-        for m in mel
-    )
-    if mel_has_tags_neg:
-        fort = [f for f in fort if not (
-            'uso adequado' in _normalize_for_contradiction(f) and ('tags' in _normalize_for_contradiction(f) or 'categorias' in _normalize_for_contradiction(f))
-        )]
+    # Bits extraídos uma única vez por item: pares (texto original, bits)
+    mel = [(m, _ponto_flags(_normalize_for_contradiction(m))) for m in melhorias]
+    fort = [(f, _ponto_flags(_normalize_for_contradiction(f))) for f in fortes]
+    # Nunca "fora do SLA" nem "TTR/FRT dentro do SLA" numa linha em fortes
+    fort = [(f, fl) for f, fl in fort if not fl & _PF_SLA_INVALIDO]
+    for gatilho_em_melhoria, gatilho, remover in _CONTRADICAO_REGRAS:
+        origem, alvo = (mel, fort) if gatilho_em_melhoria else (fort, mel)
+        if any(fl & gatilho for _, fl in origem):
+            alvo = [(t, fl) for t, fl in alvo if not fl & remover]
+            if gatilho_em_melhoria:
+                fort = alvo
+            else:
+                mel = alvo
+    return [m for m, _ in mel], [f for f, _ in fort]
 
-    # TAPI: se melhoria menciona TAPI (tolerância), remover de fortes "TAPI está entre" (evitar mesmo indicador nos dois lados)
-    mel_has_tapi = any('tapi' in _normalize_for_contradiction(m) or 'tolerancia' in _normalize_for_contradiction(m) or 'tolerância' in _normalize_for_contradiction(m) for m in mel)
-    if mel_has_tapi:
-        fort = [f for f in fort if not ('tapi' in _normalize_for_contradiction(f) and ('entre' in _normalize_for_contradiction(f) or 'esta entre' in _normalize_for_contradiction(f)))]
 
-    return mel, fort
+# Linha que já começa com "melhoria:"/"forte:" (texto já em minúsculas) nunca é só introdução
+_RE_INTRO_PONTO_PREFIX = re.compile(r'(?:melhoria|forte)\s*[:\-]')
 
 
 def _is_intro_line(text):
     """True se a linha for só introdutória (ex.: 'O analista X poderia ter feito... para o Reporter Y:') sem conteúdo de ponto."""
-    import re
     if not text or len(text) < 20:
         return False
     t = text.strip().lower()
-    if re.match(r'^melhoria\s*[:\-]', t) or re.match(r'^forte\s*[:\-]', t):
+    if _RE_INTRO_PONTO_PREFIX.match(t):
         return False
     if ('poderia ter feito' in t or 'poderia ter' in t) and ('reporter' in t or 'seguinte' in t):
         return True
@@ -1388,39 +1774,64 @@ def _is_intro_line(text):
     return False
 
 
-def _parse_pontos_ollama_response(content):
-    """Extrai listas de pontos de melhoria e fortes do texto. Filtra itens genéricos e linhas de regra. Retorna {'melhorias': [...], 'fortes': [...]}."""
-    import re
-    if not content or not isinstance(content, str):
-        return {'melhorias': [], 'fortes': []}
-    content = content.strip()
+# Regex do parser de pontos (melhoria/forte) do Ollama
+# Prefixo da linha numa única regex: o grupo que casou (lastgroup) diz o tipo; match.end() corta o prefixo
+_RE_PONTO_LINE_KIND = re.compile(
+    r'\s*(?:(?P<melhoria>melhoria\s*[:\-])|(?P<forte>forte\s*[:\-])|(?P<bullet>[\-\*•](?=\s))|(?P<numbered>\d+[.)](?=\s)))\s*',
+    re.I,
+)
+_RE_PONTO_NUMBERED = re.compile(r'^\s*\d+[.)]\s+')
+# 1º caractere com que _RE_PONTO_LINE_KIND pode casar (além de dígitos): prosa sai sem passar pela regex
+_PONTO_LINE_FIRST_CHARS = frozenset('mMfF-*•')
+_RE_SPLIT_SEMI = re.compile(r'[;\n]')
+_RE_SPLIT_SENTENCE = re.compile(r'[.\n]')
+
+
+def _split_ponto_lines(content):
+    """Melhorias e fortes das linhas do texto, na ordem da resposta, antes do corte em 5 e dos filtros finais."""
     melhorias = []
     fortes = []
-    for line in content.split('\n'):
-        line = line.strip()
-        line = re.sub(r'^#+\s*', '', line).strip()
+    for line in content.splitlines():
+        line = line.strip().lstrip('#').strip()
         if not line:
             continue
         if _is_intro_line(line):
             continue
-        if re.match(r'^\s*melhoria\s*[:\-]', line, re.I):
-            m = re.sub(r'^\s*melhoria\s*[:\-]\s*', '', line, flags=re.I).strip()
+        c0 = line[0]
+        if c0 not in _PONTO_LINE_FIRST_CHARS and not c0.isdigit():
+            continue
+        prefix = _RE_PONTO_LINE_KIND.match(line)
+        if prefix is None:
+            continue
+        kind = prefix.lastgroup
+        rest = line[prefix.end():]
+        if kind == 'melhoria':
+            m = rest.strip()
             if m and len(m) > 2 and _is_sensible_ponto(m) and not _is_rule_or_wrong_category(m, for_melhoria=True) and not _looks_like_forte(m):
                 melhorias.append(m[:450])
-        elif re.match(r'^\s*forte\s*[:\-]', line, re.I):
-            m = re.sub(r'^\s*forte\s*[:\-]\s*', '', line, flags=re.I).strip()
+        elif kind == 'forte':
+            m = rest.strip()
             if m and len(m) > 2 and _is_sensible_ponto(m) and not _is_rule_or_wrong_category(m, for_melhoria=False) and not _looks_like_melhoria(m):
                 fortes.append(m[:450])
-        elif re.match(r'^\s*[\-\*•]\s+', line) or re.match(r'^\s*\d+[.)]\s+', line):
-            bullet = re.sub(r'^\s*[\-\*•]\s+', '', line)
-            bullet = re.sub(r'^\s*\d+[.)]\s+', '', bullet).strip()
+        else:
+            # "- 1. texto": depois do marcador ainda pode vir numeração
+            bullet = (_RE_PONTO_NUMBERED.sub('', rest) if kind == 'bullet' else rest).strip()
             if bullet and len(bullet) > 15 and _is_sensible_ponto(bullet):
                 if not _looks_like_forte(bullet) and not _is_rule_or_wrong_category(bullet, for_melhoria=True):
                     melhorias.append(bullet[:450])
                 elif not _looks_like_melhoria(bullet) and not _is_rule_or_wrong_category(bullet, for_melhoria=False):
                     fortes.append(bullet[:450])
+    return melhorias, fortes
+
+
+def _parse_pontos_ollama_response(content):
+    """Extrai listas de pontos de melhoria e fortes do texto. Filtra itens genéricos e linhas de regra. Retorna {'melhorias': [...], 'fortes': [...]}."""
+    if not content or not isinstance(content, str):
+        return {'melhorias': [], 'fortes': []}
+    content = content.strip()
+    melhorias, fortes = _split_ponto_lines(content)
     if not melhorias and not fortes:
-        for part in re.split(r'[;\n]', content):
+        for part in _RE_SPLIT_SEMI.split(content):
             part = part.strip()
             if _is_intro_line(part):
                 continue
@@ -1428,17 +1839,23 @@ def _parse_pontos_ollama_response(content):
                 melhorias.append(part[:450])
     # Garantir: nenhum item de regra; nenhum nonsense/metadata; nenhum ponto de melhoria em fortes; nenhum ponto forte em melhorias
     melhorias = [x for x in melhorias[:5] if not _is_nonsense_or_metadata_ponto(x) and not _is_rule_or_wrong_category(x, for_melhoria=True) and not _looks_like_forte(x)]
-    fortes = [x for x in fortes[:5] if not _is_nonsense_or_metadata_ponto(x) and not _is_rule_or_wrong_category(x, for_melhoria=False) and not _looks_like_melhoria(x)]
-    # Nunca permitir em fortes: "estourado", "não alcança", ou linha que junta TTR e FRT ("TTR/FRT dentro do SLA")
-    nf = _normalize_for_contradiction
-    fortes = [f for f in fortes if 'estourado' not in nf(f) and 'nao alcanca' not in nf(f) and 'não alcança' not in nf(f)]
-    fortes = [f for f in fortes if not ('ttr' in nf(f) and 'frt' in nf(f))]  # nunca "TTR/FRT" numa única linha
+    # Nunca permitir em fortes: "estourado", "não alcança", ou linha que junta TTR e FRT ("TTR/FRT dentro do SLA");
+    # uma passada só, normalizando cada item uma vez (texto já sem acentos: basta "nao alcanca")
+    fortes_ok = []
+    for f in fortes[:5]:
+        if _is_nonsense_or_metadata_ponto(f) or _is_rule_or_wrong_category(f, for_melhoria=False) or _looks_like_melhoria(f):
+            continue
+        nx = _normalize_for_contradiction(f)
+        if 'estourado' in nx or 'nao alcanca' in nx or ('ttr' in nx and 'frt' in nx):
+            continue
+        fortes_ok.append(f)
+    fortes = fortes_ok
     # Remover contradições: mesma métrica não pode aparecer nos dois lados (ex.: SLA estourado em melhoria e "dentro do SLA" em fortes)
     melhorias, fortes = _remove_contradictions(melhorias, fortes)
     # Segunda passada: se a resposta tem conteúdo mas não veio no formato "Melhoria:/Forte:", extrair frases úteis por palavras-chave (só do que o modelo escreveu, sem fallback genérico)
     if not melhorias and not fortes and len(content) > 80:
         nf = _normalize_for_contradiction
-        for part in re.split(r'[.\n]', content):
+        for part in _RE_SPLIT_SENTENCE.split(content):
             part = part.strip()
             if not part or len(part) < 20 or len(part) > 400:
                 continue
@@ -1470,7 +1887,62 @@ _PONTOS_FALLBACK_SAT_MENOR_4 = (
 )
 
 
-def get_issue_pontos_ollama(issue, ollama_url, field_ids=None, model=None, comments_text=None, auth=None, sla_by_key=None, mode=None, confluence_text=None):
+# Partes fixas dos prompts de pontos (montadas uma vez); por ticket só se concatena o contexto.
+_PONTOS_REGRA_REPORTER_ASSIGNEE = (
+    'Regra: Reporter = quem foi atendido; Assignee = analista que atende. '
+    'NÃO cite nomes (ex.: Vini Reis, Gabriel Silva); use apenas "o analista", "o Assignee", "quem atendeu", "o atendente", "o solicitante". '
+    'PROIBIDO: "X atendeu o Assignee" ou "X atendido". Correto: "O analista atendeu"; "Prestou atendimento no prazo". '
+    'Não repita a mesma informação; cada ponto deve trazer uma ideia distinta.\n\n'
+)
+_PONTOS_CRITERIOS_ANALISE = (
+    'FORMATO DE ANÁLISE: Avalie o ticket em quatro dimensões e detalhe o que negativou (ponto de melhoria) e o que foi positivo (ponto forte):\n'
+    '1) Resolução do Problema — a solução foi dada corretamente? Resposta clara ao Reporter?\n'
+    '2) SLA — cumprido ou estourado? Se o SLA estourou, isso SEMPRE gera ponto de melhoria (não pode ser só ponto forte).\n'
+    '3) Comunicação — contato constante, feedback, clareza com o Reporter?\n'
+    '4) Satisfação — mede o campo do Jira Satisfaction (escala 1 a 5). Satisfaction menor que 4 (1, 2 ou 3) = ponto de melhoria; Satisfaction maior que 3 (4 ou 5) = ponto forte. Se Satisfaction = 0 ou não informado, NÃO mencione satisfação nos pontos (ignore essa dimensão).\n'
+    'Detalhe: o que entra como melhoria (negativo) e o que entra como forte (positivo), com base nos dados do chamado (SLA, Comments, Satisfaction 1-5 quando preenchido).\n\n'
+)
+_PONTOS_PT_GRAMMAR = (
+    'Responda em pt-BR, com gramática e conjugação corretas. '
+    'Assignee = sempre sujeito: "atendeu", "prestou atendimento". NUNCA nomes; NUNCA "atendeu o Assignee". Sem informações repetidas.\n\n'
+)
+_PONTOS_PROMPT_PREAMBLES = {
+    'melhoria': (
+        'Responda em português brasileiro. Use APENAS os dados abaixo (não invente). Analise a base de conhecimento (Jira + Confluence) e só então redija os pontos.\n\n'
+        + _PONTOS_REGRA_REPORTER_ASSIGNEE +
+        _PONTOS_CRITERIOS_ANALISE +
+        'Foque no ATENDIMENTO e nas AÇÕES do Assignee (analista). Evite linguagem muito técnica; use termos simples: resposta, comunicação, solução, prazo, clareza. '
+        + _PONTOS_PT_GRAMMAR + '\n\n'
+        'Redija até 5 PONTOS DE MELHORIA concretos (o que negativou): o que o Assignee poderia ter feito de diferente. Se o SLA estourou, inclua como melhoria. Se Satisfaction entre 1 e 3, considere como melhoria. Se Satisfaction = 0 ou não informado, não mencione Satisfação. Baseie-se em Resolução do Problema, SLA, Comunicação e Satisfação (1-5 quando preenchido).\n\n'
+        'OBRIGATÓRIO: não escreva frase introdutória. Saída APENAS linhas no formato "Melhoria: <frase concreta>." uma por linha. Frases completas, sem cortar no meio. Proibido comentário vago ou genérico.\n\n'
+        'Base de conhecimento:\n'
+    ),
+    'fortes': (
+        'Responda em português brasileiro. Use APENAS os dados abaixo (não invente). Analise a base de conhecimento e só então redija os pontos.\n\n'
+        + _PONTOS_REGRA_REPORTER_ASSIGNEE +
+        _PONTOS_CRITERIOS_ANALISE +
+        'Foque no ATENDIMENTO e nas AÇÕES do Assignee (analista). Evite linguagem muito técnica; use termos simples: resposta, comunicação, solução, prazo, clareza. '
+        + _PONTOS_PT_GRAMMAR + '\n\n'
+        'Redija até 5 pontos positivos (pontos fortes) concretos do que o Assignee fez bem. Considere Resolução do Problema, SLA (se cumprido), Comunicação e Satisfação (se 4 ou 5, considere ponto forte). Se Satisfaction = 0 ou não informado, não mencione Satisfação. Só inclua como forte o que de fato foi positivo nos dados do chamado.\n\n'
+        'OBRIGATÓRIO: não escreva frase introdutória. Saída APENAS linhas no formato "Forte: <frase concreta>." uma por linha. Frases completas, sem cortar no meio. Proibido comentário vago ou genérico.\n\n'
+        'Base de conhecimento:\n'
+    ),
+    None: (
+        'Responda em português brasileiro. Use APENAS os dados abaixo (não invente). Analise a base e só então redija as listas.\n\n'
+        + _PONTOS_REGRA_REPORTER_ASSIGNEE +
+        _PONTOS_CRITERIOS_ANALISE +
+        'Avalie o ticket em Resolução do Problema, SLA, Comunicação e Satisfação (1-5 quando preenchido: < 4 = melhoria; > 3 = forte). Se Satisfaction = 0 ou não informado, não mencione Satisfação. SLA estourado = melhoria; Satisfaction 1, 2 ou 3 = melhoria; 4 ou 5 = forte. '
+        + _PONTOS_PT_GRAMMAR + '\n\n'
+        'Saída APENAS linhas no formato "Melhoria: <frase>." ou "Forte: <frase>." até 5 de cada. Frases completas, sem cortar no meio. Não escreva frase introdutória. Cada ponto concreto e específico (proibido vago ou genérico).\n\n'
+        'Base de conhecimento:\n'
+    ),
+}
+
+
+_PONTOS_OLLAMA_OPTIONS = {'temperature': 0, 'num_predict': 1024}
+
+
+def get_issue_pontos_ollama(issue, ollama_url, field_ids=None, model=None, comments_text=None, auth=None, sla_by_key=None, mode=None, confluence_text=None, context=None):
     """
     Chama Ollama para extrair pontos de melhoria e/ou pontos fortes do atendimento.
     REGRA: Se Satisfaction (campo Jira) < 4, NÃO usa Ollama — retorna fallback fixo. O resto usa Ollama.
@@ -1478,6 +1950,7 @@ def get_issue_pontos_ollama(issue, ollama_url, field_ids=None, model=None, comme
     mode='fortes': só pontos fortes (o que foi feito de bom).
     mode=None: ambos (comportamento anterior).
     confluence_text: quando mode='melhoria', texto do Confluence sobre o tema do chamado; usado para sugerir o que o analista poderia ter feito.
+    context: _issue_context_full_for_pontos(issue, field_ids, comments_text) já montado (caller que analisa o chamado nos dois modos).
     SLA: usa APENAS a coluna SLA do modo lista (sla_by_key). Sem fallback para fetch no Jira.
     Retorna {'melhorias': [...], 'fortes': [...]} ou {'melhorias': [], 'fortes': []} em falha.
     """
@@ -1502,7 +1975,8 @@ def get_issue_pontos_ollama(issue, ollama_url, field_ids=None, model=None, comme
         return {'melhorias': melhorias[:5], 'fortes': []}
 
     base = ollama_url.strip().rstrip('/')
-    context = _issue_context_full_for_pontos(issue, field_ids, comments_text)
+    if context is None:
+        context = _issue_context_full_for_pontos(issue, field_ids, comments_text)
     if key and sla_by_key is not None:
         sla_list = sla_by_key.get(key)
         if sla_list:
@@ -1512,56 +1986,7 @@ def get_issue_pontos_ollama(issue, ollama_url, field_ids=None, model=None, comme
     if confluence_text and confluence_text.strip():
         context += '\n\nConteúdo do Confluence sobre o tema deste chamado:\n' + confluence_text.strip()[:1200]
     context = context[:3800]
-    regra_reporter_assignee = (
-        'Regra: Reporter = quem foi atendido; Assignee = analista que atende. '
-        'NÃO cite nomes (ex.: Vini Reis, Gabriel Silva); use apenas "o analista", "o Assignee", "quem atendeu", "o atendente", "o solicitante". '
-        'PROIBIDO: "X atendeu o Assignee" ou "X atendido". Correto: "O analista atendeu"; "Prestou atendimento no prazo". '
-        'Não repita a mesma informação; cada ponto deve trazer uma ideia distinta.\n\n'
-    )
-    criterios_analise = (
-        'FORMATO DE ANÁLISE: Avalie o ticket em quatro dimensões e detalhe o que negativou (ponto de melhoria) e o que foi positivo (ponto forte):\n'
-        '1) Resolução do Problema — a solução foi dada corretamente? Resposta clara ao Reporter?\n'
-        '2) SLA — cumprido ou estourado? Se o SLA estourou, isso SEMPRE gera ponto de melhoria (não pode ser só ponto forte).\n'
-        '3) Comunicação — contato constante, feedback, clareza com o Reporter?\n'
-        '4) Satisfação — mede o campo do Jira Satisfaction (escala 1 a 5). Satisfaction menor que 4 (1, 2 ou 3) = ponto de melhoria; Satisfaction maior que 3 (4 ou 5) = ponto forte. Se Satisfaction = 0 ou não informado, NÃO mencione satisfação nos pontos (ignore essa dimensão).\n'
-        'Detalhe: o que entra como melhoria (negativo) e o que entra como forte (positivo), com base nos dados do chamado (SLA, Comments, Satisfaction 1-5 quando preenchido).\n\n'
-    )
-    pt_grammar = (
-        'Responda em pt-BR, com gramática e conjugação corretas. '
-        'Assignee = sempre sujeito: "atendeu", "prestou atendimento". NUNCA nomes; NUNCA "atendeu o Assignee". Sem informações repetidas.\n\n'
-    )
-    if mode == 'melhoria':
-        prompt = (
-            'Responda em português brasileiro. Use APENAS os dados abaixo (não invente). Analise a base de conhecimento (Jira + Confluence) e só então redija os pontos.\n\n'
-            + regra_reporter_assignee +
-            criterios_analise +
-            'Foque no ATENDIMENTO e nas AÇÕES do Assignee (analista). Evite linguagem muito técnica; use termos simples: resposta, comunicação, solução, prazo, clareza. '
-            + pt_grammar + '\n\n'
-            'Redija até 5 PONTOS DE MELHORIA concretos (o que negativou): o que o Assignee poderia ter feito de diferente. Se o SLA estourou, inclua como melhoria. Se Satisfaction entre 1 e 3, considere como melhoria. Se Satisfaction = 0 ou não informado, não mencione Satisfação. Baseie-se em Resolução do Problema, SLA, Comunicação e Satisfação (1-5 quando preenchido).\n\n'
-            'OBRIGATÓRIO: não escreva frase introdutória. Saída APENAS linhas no formato "Melhoria: <frase concreta>." uma por linha. Frases completas, sem cortar no meio. Proibido comentário vago ou genérico.\n\n'
-            'Base de conhecimento:\n' + context
-        )
-    elif mode == 'fortes':
-        prompt = (
-            'Responda em português brasileiro. Use APENAS os dados abaixo (não invente). Analise a base de conhecimento e só então redija os pontos.\n\n'
-            + regra_reporter_assignee +
-            criterios_analise +
-            'Foque no ATENDIMENTO e nas AÇÕES do Assignee (analista). Evite linguagem muito técnica; use termos simples: resposta, comunicação, solução, prazo, clareza. '
-            + pt_grammar + '\n\n'
-            'Redija até 5 pontos positivos (pontos fortes) concretos do que o Assignee fez bem. Considere Resolução do Problema, SLA (se cumprido), Comunicação e Satisfação (se 4 ou 5, considere ponto forte). Se Satisfaction = 0 ou não informado, não mencione Satisfação. Só inclua como forte o que de fato foi positivo nos dados do chamado.\n\n'
-            'OBRIGATÓRIO: não escreva frase introdutória. Saída APENAS linhas no formato "Forte: <frase concreta>." uma por linha. Frases completas, sem cortar no meio. Proibido comentário vago ou genérico.\n\n'
-            'Base de conhecimento:\n' + context
-        )
-    else:
-        prompt = (
-            'Responda em português brasileiro. Use APENAS os dados abaixo (não invente). Analise a base e só então redija as listas.\n\n'
-            + regra_reporter_assignee +
-            criterios_analise +
-            'Avalie o ticket em Resolução do Problema, SLA, Comunicação e Satisfação (1-5 quando preenchido: < 4 = melhoria; > 3 = forte). Se Satisfaction = 0 ou não informado, não mencione Satisfação. SLA estourado = melhoria; Satisfaction 1, 2 ou 3 = melhoria; 4 ou 5 = forte. '
-            + pt_grammar + '\n\n'
-            'Saída APENAS linhas no formato "Melhoria: <frase>." ou "Forte: <frase>." até 5 de cada. Frases completas, sem cortar no meio. Não escreva frase introdutória. Cada ponto concreto e específico (proibido vago ou genérico).\n\n'
-            'Base de conhecimento:\n' + context
-        )
+    prompt = _PONTOS_PROMPT_PREAMBLES.get(mode, _PONTOS_PROMPT_PREAMBLES[None]) + context
 
     def parse_content(content):
         if content:
@@ -1570,6 +1995,15 @@ def get_issue_pontos_ollama(issue, ollama_url, field_ids=None, model=None, comme
                 return out
         return None
 
+    def enough_pontos(text):
+        """
+        Streaming: o resto da resposta já não muda o resultado. O parser só usa as 5 primeiras melhorias e os
+        5 primeiros fortes; com 5 de cada nas linhas completas (e algo aproveitável depois dos filtros e de
+        _remove_contradictions), as linhas seguintes seriam descartadas.
+        """
+        melhorias, fortes = _split_ponto_lines(text)
+        return len(melhorias) >= 5 and len(fortes) >= 5 and parse_content(text) is not None
+
     MELHORIA_SLA_ESTOURADO = 'O analista deve cumprir o SLA.'
 
     def ensure_pontos_never_empty(out, mode):
@@ -1595,23 +2029,10 @@ def get_issue_pontos_ollama(issue, ollama_url, field_ids=None, model=None, comme
     default_model = (model or 'llama3.2').strip()
     models_installed = []
     try:
-        r = requests.get(f'{base}/api/tags', timeout=5)
-        if r.status_code == 200:
-            data = r.json()
-            for item in (data.get('models') or []):
-                name = (item.get('name') or item.get('model') or '').strip()
-                if name and name not in models_installed:
-                    models_installed.append(name)
+        _, models_installed = _ollama_installed_models(base)
     except Exception:
         pass
-    fallback_models = [default_model, 'llama3.2', 'llama3.1', 'llama3', 'qwen2.5:0.5b', 'qwen2.5', 'mistral', 'gemma2:2b']
-    seen = set()
-    models_to_try = []
-    for name in models_installed + fallback_models:
-        n = (name or '').strip()
-        if n and n not in seen:
-            seen.add(n)
-            models_to_try.append(n)
+    models_to_try = _build_models_to_try(tuple(models_installed), default_model)
 
     max_retries = 6
     req_timeout = 240
@@ -1619,110 +2040,78 @@ def get_issue_pontos_ollama(issue, ollama_url, field_ids=None, model=None, comme
         if not m:
             continue
         m = m.strip()
-        # 1) /api/generate (mesma ordem que notas); options.num_predict limita saída para evitar timeout 500
-        for attempt in range(max_retries + 1):
-            try:
-                r = requests.post(
-                    f'{base}/api/generate',
-                    json={
-                        'model': m,
-                        'prompt': prompt,
-                        'stream': False,
-                        'options': {'temperature': 0, 'num_predict': 1024},
-                    },
-                    timeout=req_timeout,
-                )
-                if r.status_code == 404:
-                    break
-                if r.status_code == 200:
-                    data = r.json()
-                    content = (data.get('response') or '').strip()
-                    result = parse_content(content)
-                    if result:
-                        return apply_sla_estourado_feedback(ensure_pontos_never_empty(result, mode))
-                if attempt < max_retries:
-                    time.sleep(1.5)
-            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
-                if attempt < max_retries:
-                    time.sleep(1.5)
+        bad_output = False
+        # Mesma ordem que notas; options.num_predict limita saída para evitar timeout 500
+        for suffix, build_payload, extract_content in _ollama_endpoints_for(base):
+            if bad_output:
                 break
-            except Exception:
-                if attempt < max_retries:
-                    time.sleep(1.5)
-                break
-        # 2) /api/chat; num_predict limita saída para evitar timeout 500
-        for attempt in range(max_retries + 1):
-            try:
-                r = requests.post(
-                    f'{base}/api/chat',
-                    json={
-                        'model': m,
-                        'messages': [{'role': 'user', 'content': prompt}],
-                        'stream': False,
-                        'options': {'temperature': 0, 'num_predict': 1024},
-                    },
-                    timeout=req_timeout,
-                )
-                if r.status_code == 404:
-                    break
-                if r.status_code == 200:
-                    data = r.json()
-                    msg = data.get('message') or {}
-                    content = (msg.get('content') or '').strip()
+            payload = build_payload(m, prompt, _PONTOS_OLLAMA_OPTIONS)
+            extract_chunk = _OLLAMA_STREAM_CHUNK.get(suffix)
+            conn_retried = False
+            for attempt in range(max_retries + 1):
+                # generate/chat em streaming (corta a geração quando já há pontos suficientes); /v1 segue sem stream
+                if extract_chunk is not None:
+                    kind, content = _ollama_post_stream(f'{base}{suffix}', payload, extract_chunk, req_timeout, enough_pontos)
+                else:
+                    kind, content = _ollama_post_once(f'{base}{suffix}', payload, extract_content, req_timeout)
+                if kind == 'ok':
                     result = parse_content(content)
                     if result:
-                        return apply_sla_estourado_feedback(ensure_pontos_never_empty(result, mode))
-                if attempt < max_retries:
-                    time.sleep(1.5)
-            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
-                if attempt < max_retries:
-                    time.sleep(1.5)
-                break
-            except Exception:
-                if attempt < max_retries:
-                    time.sleep(1.5)
-                break
-        # 3) /v1/chat/completions
-        for attempt in range(max_retries + 1):
-            try:
-                r = requests.post(
-                    f'{base}/v1/chat/completions',
-                    json={
-                        'model': m,
-                        'messages': [{'role': 'user', 'content': prompt}],
-                        'stream': False,
-                        'temperature': 0,
-                    },
-                    timeout=req_timeout,
-                )
-                if r.status_code == 404:
+                        result = apply_sla_estourado_feedback(ensure_pontos_never_empty(result, mode))
+                        _ollama_preferred_endpoint[base] = suffix
+                        return result
+                    # 200 sem pontos aproveitáveis: os outros endpoints rodam o mesmo modelo (mesma saída); próximo modelo
+                    bad_output = True
                     break
-                if r.status_code == 200:
-                    data = r.json()
-                    if data.get('error'):
-                        if attempt < max_retries:
-                            time.sleep(1.5)
+                elif kind == 'conn_error':
+                    # Falha de conexão: um único backoff neste modelo/endpoint, depois o próximo endpoint
+                    if conn_retried:
                         break
-                    choices = data.get('choices') or []
-                    if choices:
-                        content = (choices[0].get('message') or {}).get('content') or ''
-                        content = content.strip()
-                        result = parse_content(content)
-                        if result:
-                            return apply_sla_estourado_feedback(ensure_pontos_never_empty(result, mode))
-                if attempt < max_retries:
-                    time.sleep(1.5)
-            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
-                if attempt < max_retries:
-                    time.sleep(1.5)
-                break
-            except Exception:
+                    conn_retried = True
+                elif kind != 'http_error':
+                    # 404, 200 sem texto, timeout ou erro: próximo endpoint já, sem esperar
+                    break
                 if attempt < max_retries:
                     time.sleep(1.5)
-                break
     return apply_sla_estourado_feedback(ensure_pontos_never_empty({'melhorias': [], 'fortes': []}, mode))
 
 
+# Chamadas simultâneas ao Ollama na análise de pontos (o daemon enfileira além do próprio limite)
+_PONTOS_MAX_WORKERS = 4
+
+
+def _pontos_for_candidate(issue, modes, ollama_url, field_ids, auth, sla_by_key):
+    """
+    Busca comments/Confluence do chamado uma vez e extrai os pontos em cada modo pedido ('melhoria' e/ou 'fortes').
+    Retorna {mode: resultado de get_issue_pontos_ollama}.
+    """
+    key = issue.get('key')
+    comments_text = fetch_issue_comments_text(auth, key, max_comments=20) or '' if auth else ''
+    confluence_text = fetch_confluence_for_issue(issue, auth, field_ids) if auth else ''
+    # Chamado nos dois modos: contexto montado uma vez (com um só modo, get_issue_pontos_ollama monta se precisar)
+    context = _issue_context_full_for_pontos(issue, field_ids, comments_text) if len(modes) > 1 else None
+    return {
+        mode: get_issue_pontos_ollama(issue, ollama_url, field_ids, comments_text=comments_text, auth=auth, sla_by_key=sla_by_key, mode=mode, confluence_text=confluence_text, context=context)
+        for mode in modes
+    }
+
+
+def _pick_candidates(tiers, limit=5):
+    """Até limit chamados (sem key repetida), esgotando cada nível de preferência antes do próximo."""
+    picked = []
+    seen = set()
+    for tier in tiers:
+        for issue in tier:
+            key = issue['key']
+            if key in seen:
+                continue
+            picked.append(issue)
+            seen.add(key)
+            if len(picked) >= limit:
+                return picked
+    return picked
+
+
 def stats_pontos_melhoria_fortes(issues, ollama_url, field_ids, limit=12, auth=None, sla_by_key=None):
     """
     Extrai pontos de melhoria e fortes via Ollama.
@@ -1731,134 +2120,104 @@ def stats_pontos_melhoria_fortes(issues, ollama_url, field_ids, limit=12, auth=N
     sla_by_key: dados da coluna SLAs do modo lista (obrigatório para seleção correta).
     Retorna: top5Melhoria, top5Fortes, melhoriaByRequestType, pontosPorIssue.
     """
-    from collections import defaultdict
-    import unicodedata
-    import time
-    count_melhoria = defaultdict(int)
-    count_forte = defaultdict(int)
+    # ponto normalizado -> keys (uma por ocorrência); a contagem é len(keys), sem dict paralelo de contadores
     melhoria_keys = defaultdict(list)
     forte_keys = defaultdict(list)
-    by_rt_melhoria = defaultdict(lambda: defaultdict(int))
+    by_rt_melhoria = Counter()  # chave (request type, ponto normalizado)
     pontos_por_issue = []
     sla_by_key = sla_by_key or {}
+    # Uma passada sobre issues: Satisfaction e SLA calculados uma vez por chamado e separados por nível de preferência.
     # Pontos de melhoria: no mínimo 5 tickets (mesmo critério de quantidade dos pontos positivos). Preferir Satisfaction 1-3 e SLA vencido; completar até 5.
-    melhoria_candidates = []
-    seen_melhoria = set()
-    for issue in issues:
-        key = issue.get('key')
-        if not key or key in seen_melhoria:
-            continue
-        sat = get_satisfaction_numeric(issue, field_ids)
-        if sat is None or sat not in (1, 2, 3):
-            continue
-        if not _issue_sla_breached(key, sla_by_key):
-            continue
-        melhoria_candidates.append(issue)
-        seen_melhoria.add(key)
-        if len(melhoria_candidates) >= 5:
-            break
-    if len(melhoria_candidates) < 5:
-        for issue in issues:
-            key = issue.get('key')
-            if not key or key in seen_melhoria:
-                continue
-            sat = get_satisfaction_numeric(issue, field_ids)
-            if sat is None or sat not in (1, 2, 3):
-                continue
-            melhoria_candidates.append(issue)
-            seen_melhoria.add(key)
-            if len(melhoria_candidates) >= 5:
-                break
-    if len(melhoria_candidates) < 5:
-        for issue in issues:
-            key = issue.get('key')
-            if not key or key in seen_melhoria:
-                continue
-            if not _issue_sla_breached(key, sla_by_key):
-                continue
-            melhoria_candidates.append(issue)
-            seen_melhoria.add(key)
-            if len(melhoria_candidates) >= 5:
-                break
     # Pontos fortes: até 5 tickets. Preferir Satisfaction=5 e dentro do SLA; se faltar, completar com Satisfaction=5 ou dentro do SLA (só Jira).
-    fortes_candidates = []
-    seen_fortes = set()
+    melhoria_sat_sla, melhoria_sat, melhoria_sla = [], [], []
+    fortes_sat_sla, fortes_sat_ou_sla = [], []
+    keys_melhoria_sat_sla, keys_fortes_sat_sla = set(), set()
     for issue in issues:
         key = issue.get('key')
-        if not key or key in seen_fortes:
+        if not key:
             continue
         sat = get_satisfaction_numeric(issue, field_ids)
-        if sat != 5:
-            continue
-        if not _issue_sla_within(key, sla_by_key):
-            continue
-        fortes_candidates.append(issue)
-        seen_fortes.add(key)
-        if len(fortes_candidates) >= 5:
+        breached = _issue_sla_breached(key, sla_by_key)
+        within = _issue_sla_within(key, sla_by_key)
+        if sat in (1, 2, 3):
+            melhoria_sat.append(issue)
+            if breached:
+                melhoria_sat_sla.append(issue)
+                keys_melhoria_sat_sla.add(key)
+        if breached:
+            melhoria_sla.append(issue)
+        if sat == 5 or within:
+            fortes_sat_ou_sla.append(issue)
+            if sat == 5 and within:
+                fortes_sat_sla.append(issue)
+                keys_fortes_sat_sla.add(key)
+        # Os dois níveis preferidos já completos: os demais chamados não mudariam a seleção
+        if len(keys_melhoria_sat_sla) >= 5 and len(keys_fortes_sat_sla) >= 5:
             break
-    if len(fortes_candidates) < 5:
-        for issue in issues:
-            key = issue.get('key')
-            if not key or key in seen_fortes:
-                continue
-            sat = get_satisfaction_numeric(issue, field_ids)
-            within = _issue_sla_within(key, sla_by_key)
-            if sat == 5 or within:
-                fortes_candidates.append(issue)
-                seen_fortes.add(key)
-                if len(fortes_candidates) >= 5:
-                    break
-    # Analisar melhoria (boas práticas para melhorar resultados negativos)
-    for idx, issue in enumerate(melhoria_candidates):
-        if idx > 0:
-            time.sleep(0.8)
-        key = issue.get('key')
-        rt = _get_request_type_from_issue(issue, field_ids)
-        comments_text = fetch_issue_comments_text(auth, key, max_comments=20) or '' if auth else ''
-        confluence_text = fetch_confluence_for_issue(issue, auth, field_ids) if auth else ''
-        out = get_issue_pontos_ollama(issue, ollama_url, field_ids, comments_text=comments_text, auth=auth, sla_by_key=sla_by_key, mode='melhoria', confluence_text=confluence_text)
-        summary = ((issue.get('fields') or {}).get('summary') or '').strip() or '(sem título)'
-        pontos_por_issue.append({'key': key, 'summary': summary[:200], 'melhorias': list(out.get('melhorias') or []), 'fortes': [], 'sla_vencido': _issue_sla_breached(key, sla_by_key)})
-        for m in (out.get('melhorias') or []):
-            if not _is_sensible_ponto(m):
-                continue
-            m_norm = m.strip().lower()[:150]
-            if not m_norm:
-                continue
-            m_norm = ''.join(c for c in unicodedata.normalize('NFD', m_norm) if unicodedata.category(c) != 'Mn')
-            count_melhoria[m_norm] += 1
-            melhoria_keys[m_norm].append(key)
-            by_rt_melhoria[rt][m_norm] += 1
-    # Analisar fortes (o que foi feito de bom nos tickets Satisfaction=5 e dentro do SLA)
-    for idx, issue in enumerate(fortes_candidates):
-        if idx > 0:
-            time.sleep(0.8)
+    melhoria_candidates = _pick_candidates((melhoria_sat_sla, melhoria_sat, melhoria_sla))
+    fortes_candidates = _pick_candidates((fortes_sat_sla, fortes_sat_ou_sla))
+    # Chamadas ao Ollama (comments + Confluence + pontos) em paralelo, uma tarefa por chamado (candidato nos dois modos
+    # busca comments/Confluence e monta o contexto uma vez só); a agregação fica na thread principal, na ordem dos candidatos
+    tasks = [(issue, 'melhoria') for issue in melhoria_candidates] + [(issue, 'fortes') for issue in fortes_candidates]
+    modes_by_issue = {}
+    for issue, mode in tasks:
+        modes_by_issue.setdefault(id(issue), (issue, []))[1].append(mode)
+    results = {}
+    if tasks:
+        with ThreadPoolExecutor(max_workers=min(_PONTOS_MAX_WORKERS, len(modes_by_issue))) as executor:
+            futures = {
+                executor.submit(_pontos_for_candidate, issue, modes, ollama_url, field_ids, auth, sla_by_key): issue_id
+                for issue_id, (issue, modes) in modes_by_issue.items()
+            }
+            for future in as_completed(futures):
+                try:
+                    results[futures[future]] = future.result()
+                except Exception:
+                    # Falha (Jira/Confluence/Ollama) num candidato perde só esse chamado, não a análise toda
+                    pass
+    for issue, mode in tasks:
+        by_mode = results.get(id(issue))
+        if by_mode is None:
+            continue
+        out = by_mode[mode]
         key = issue.get('key')
-        rt = _get_request_type_from_issue(issue, field_ids)
-        comments_text = fetch_issue_comments_text(auth, key, max_comments=20) or '' if auth else ''
-        confluence_text = fetch_confluence_for_issue(issue, auth, field_ids) if auth else ''
-        out = get_issue_pontos_ollama(issue, ollama_url, field_ids, comments_text=comments_text, auth=auth, sla_by_key=sla_by_key, mode='fortes', confluence_text=confluence_text)
         summary = ((issue.get('fields') or {}).get('summary') or '').strip() or '(sem título)'
-        pontos_por_issue.append({'key': key, 'summary': summary[:200], 'melhorias': [], 'fortes': list(out.get('fortes') or []), 'sla_vencido': _issue_sla_breached(key, sla_by_key)})
-        for f in (out.get('fortes') or []):
-            if not _is_sensible_ponto(f):
-                continue
-            f_norm = f.strip().lower()[:150]
-            if not f_norm:
-                continue
-            f_norm = ''.join(c for c in unicodedata.normalize('NFD', f_norm) if unicodedata.category(c) != 'Mn')
-            count_forte[f_norm] += 1
-            forte_keys[f_norm].append(key)
-    top5_melhoria = sorted(count_melhoria.items(), key=lambda x: -x[1])[:5]
-    top5_fortes = sorted(count_forte.items(), key=lambda x: -x[1])[:5]
-    melhoria_by_rt = {}
-    for rt, d in by_rt_melhoria.items():
-        melhoria_by_rt[rt] = dict(sorted(d.items(), key=lambda x: -x[1])[:5])
+        if mode == 'melhoria':
+            # Analisar melhoria (boas práticas para melhorar resultados negativos)
+            rt = _get_request_type_from_issue(issue, field_ids)
+            pontos_por_issue.append({'key': key, 'summary': summary[:200], 'melhorias': list(out.get('melhorias') or []), 'fortes': [], 'sla_vencido': _issue_sla_breached(key, sla_by_key)})
+            for m in (out.get('melhorias') or []):
+                if not _is_sensible_ponto(m):
+                    continue
+                m_norm = m.strip().lower()[:150]
+                if not m_norm:
+                    continue
+                m_norm = _strip_accents(m_norm)
+                melhoria_keys[m_norm].append(key)
+                by_rt_melhoria[(rt, m_norm)] += 1
+        else:
+            # Analisar fortes (o que foi feito de bom nos tickets Satisfaction=5 e dentro do SLA)
+            pontos_por_issue.append({'key': key, 'summary': summary[:200], 'melhorias': [], 'fortes': list(out.get('fortes') or []), 'sla_vencido': _issue_sla_breached(key, sla_by_key)})
+            for f in (out.get('fortes') or []):
+                if not _is_sensible_ponto(f):
+                    continue
+                f_norm = f.strip().lower()[:150]
+                if not f_norm:
+                    continue
+                f_norm = _strip_accents(f_norm)
+                forte_keys[f_norm].append(key)
+    top5_melhoria = heapq.nlargest(5, melhoria_keys.items(), key=lambda x: len(x[1]))
+    top5_fortes = heapq.nlargest(5, forte_keys.items(), key=lambda x: len(x[1]))
+    # Agrupa por request type na ordem de inserção (mesma ordem de rt e de empate que antes)
+    rt_groups = defaultdict(list)
+    for (rt, lbl), c in by_rt_melhoria.items():
+        rt_groups[rt].append((lbl, c))
+    melhoria_by_rt = {rt: dict(heapq.nlargest(5, items, key=lambda x: x[1])) for rt, items in rt_groups.items()}
     def unique_order(seq):
         return list(dict.fromkeys(seq))
     return {
-        'top5Melhoria': [{'label': lbl, 'count': c, 'keys': unique_order(melhoria_keys[lbl])} for lbl, c in top5_melhoria],
-        'top5Fortes': [{'label': lbl, 'count': c, 'keys': unique_order(forte_keys[lbl])} for lbl, c in top5_fortes],
+        'top5Melhoria': [{'label': lbl, 'count': len(keys), 'keys': unique_order(keys)} for lbl, keys in top5_melhoria],
+        'top5Fortes': [{'label': lbl, 'count': len(keys), 'keys': unique_order(keys)} for lbl, keys in top5_fortes],
         'melhoriaByRequestType': melhoria_by_rt,
         'pontosPorIssue': pontos_por_issue,
     }
@@ -1891,32 +2250,23 @@ def _ollama_feedback_analista_single(prompt, ollama_url, base_url=None):
         return ''
     base = (ollama_url or '').strip().rstrip('/')
     timeout = 180
-    models_to_try = ['llama3.2', 'llama3.1', 'llama3', 'qwen2.5:0.5b', 'qwen2.5', 'mistral', 'gemma2:2b']
+    models_to_try = _OLLAMA_FALLBACK_MODELS
     try:
-        r = requests.get(f'{base}/api/tags', timeout=5)
-        if r.status_code == 200:
-            data = r.json()
-            installed = [(x.get('name') or x.get('model') or '').strip() for x in (data.get('models') or []) if (x.get('name') or x.get('model') or '').strip()]
-            if installed:
-                models_to_try = list(dict.fromkeys(installed + models_to_try))
+        _, installed = _ollama_installed_models(base)
+        if installed:
+            models_to_try = _build_models_to_try(tuple(installed))
     except Exception:
         pass
     for m in models_to_try:
         if not m:
             continue
-        for endpoint, payload in [
-            ('/api/generate', {'model': m, 'prompt': prompt, 'stream': False, 'options': {'temperature': 0, 'num_predict': 1024}}),
-            ('/api/chat', {'model': m, 'messages': [{'role': 'user', 'content': prompt}], 'stream': False, 'options': {'temperature': 0, 'num_predict': 1024}}),
-        ]:
+        # /api/generate e /api/chat com as mesmas options dos pontos (dict do módulo, não remontado por chamada)
+        for endpoint, build_payload, extract_content in _OLLAMA_ENDPOINTS[:2]:
             try:
-                r = requests.post(f'{base}{endpoint}', json=payload, timeout=timeout)
+                r = _ollama_post(f'{base}{endpoint}', build_payload(m, prompt, _PONTOS_OLLAMA_OPTIONS), timeout)
                 if r.status_code != 200:
                     continue
-                data = r.json()
-                if endpoint == '/api/generate':
-                    content = (data.get('response') or '').strip()
-                else:
-                    content = ((data.get('message') or {}).get('content') or '').strip()
+                content = extract_content(_response_json(r))
                 if content:
                     return content
             except Exception:
@@ -1932,8 +2282,6 @@ def stats_feedback_analistas_ollama(issues, ollama_url, field_ids, auth=None, sl
     e linguagem clara, formal e objetiva.
     Retorna: { 'byAnalyst': [ { assignee, ticketCount, feedback, melhorias, fortes } ] }.
     """
-    from collections import defaultdict
-    import time
     if not ollama_url or not ollama_url.strip():
         return {'byAnalyst': []}
     sla_by_key = sla_by_key or {}
@@ -2081,6 +2429,17 @@ def get_issue_note_from_rovo(issue, rovo_url, rovo_api_key=None, criteria=None):
         return None
 
 
+# Bloco markdown ```/```json da resposta do LLM: o que está dentro (cerca de fechamento opcional; texto depois dela é ignorado)
+_RE_CODE_FENCE = re.compile(r'```\s*(?:json)?\s*(.*?)\s*(?:```|$)', re.S)
+
+
+def _strip_code_fence(content):
+    """Conteúdo de dentro de uma cerca ```/```json no início da resposta; sem cerca, devolve o texto como veio."""
+    if not content.startswith('```'):
+        return content
+    return _RE_CODE_FENCE.match(content).group(1)
+
+
 def get_issue_note_from_agent(issue, api_key):
     """
     Usa um agente (OpenAI) para dar uma nota de 1 a 5 ao chamado.
@@ -2114,13 +2473,8 @@ def get_issue_note_from_agent(issue, api_key):
         content = (r.choices[0].message.content or '').strip()
         if not content:
             return None
-        import json
         # Remover possível markdown
-        if content.startswith('```'):
-            content = content.split('```')[1]
-            if content.startswith('json'):
-                content = content[4:]
-        data = json.loads(content)
+        data = json.loads(_strip_code_fence(content))
         nota = data.get('nota')
         if nota is not None:
             nota = max(1, min(5, int(nota)))
@@ -2200,8 +2554,6 @@ def get_issue_note_from_vertex(
     if criteria and str(criteria).strip():
         system += ' Critérios adicionais: ' + str(criteria).strip()[:800]
     prompt = system + '\n\n---\n\nAvalie este chamado e dê uma nota de 1 a 5:\n\n' + text
-    import json
-    import time
     max_retries = 3
     backoff_seconds = [20, 40, 80]
     last_error = None
@@ -2219,12 +2571,7 @@ def get_issue_note_from_vertex(
                     content = (getattr(parts.parts[0], 'text', None) or '').strip()
             if not content:
                 return {'nota': None, 'comentario': 'Erro Vertex: resposta vazia'}
-            if content.startswith('```'):
-                content = content.split('```')[1]
-                if content.startswith('json'):
-                    content = content[4:]
-            content = content.strip()
-            data = json.loads(content)
+            data = json.loads(_strip_code_fence(content))
             nota = data.get('nota')
             if nota is not None:
                 nota = max(1, min(5, int(nota)))
@@ -2246,13 +2593,65 @@ def get_issue_note_from_vertex(
     return {'nota': None, 'comentario': f'Erro Vertex: {str(last_error).strip()[:300]}'}
 
 
-def search_jql(auth, jql, field_ids, limit=None, columns=None):
+def get_required_field_ids(field_ids):
+    """
+    Lista enxuta de campos que o dashboard usa (padrão + IDs resolvidos por resolve_custom_fields + SLAs Nubank).
+    Serve como fields= na busca: sem ela o Jira devolve todos os customfields de cada issue.
+    """
+    fields_to_fetch = ['key', 'summary', 'description', 'reporter', 'assignee', 'status', 'created', 'updated', 'resolutiondate']
+    for fid in list((field_ids or {}).values()) + [NUBANK_TIME_TO_RESOLUTION_FID, NUBANK_TIME_TO_FIRST_RESPONSE_FID]:
+        if fid and fid not in fields_to_fetch:
+            fields_to_fetch.append(fid)
+    return fields_to_fetch
+
+
+def get_reopened_field_ids(field_ids):
+    """
+    Campos que a tabela de reabertos exibe (título, descrição, pessoas, status, datas, Request Type, Satisfaction).
+    Sem resolutiondate nem campos de SLA/tempo: a tabela não mostra TTR/FRT.
+    """
+    fields_to_fetch = ['key', 'summary', 'description', 'reporter', 'assignee', 'status', 'created', 'updated']
+    for name in ('Request Type', 'Satisfaction'):
+        fid = (field_ids or {}).get(name)
+        if fid and fid not in fields_to_fetch:
+            fields_to_fetch.append(fid)
+    return fields_to_fetch
+
+
+def fetch_issue(auth, issue_key, fields=None):
+    """
+    GET /rest/api/3/issue/{key} - busca um issue direto pela key, sem passar pelo JQL.
+    fields: opcional, lista de campos a pedir (reduz o payload). Retorna o dict do issue ou None se não existir.
+    """
+    params = {'fields': ','.join(fields)} if fields else None
+    r = _JIRA_SESSION.get(
+        f'{JIRA_URL}/rest/api/3/issue/{issue_key.strip()}',
+        auth=auth,
+        headers={'Accept': 'application/json'},
+        params=params,
+        timeout=30,
+    )
+    if r.status_code == 404:
+        return None
+    if r.status_code != 200:
+        raise RuntimeError(f'Jira API error: {r.status_code} - {r.text}')
+    return _response_json(r)
+
+
+# Sessão já pede gzip/deflate (padrão do requests); Accept explícito para o Jira responder JSON
+_JIRA_SEARCH_HEADERS = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+
+
+def search_jql(auth, jql, field_ids, limit=None, columns=None, fields=None):
     """
     Run JQL search using /rest/api/3/search/jql.
     Returns list of issue dicts.
     columns: opcional, lista de {id, label} do filtro; quando informado, usa esses campos na busca.
+    fields: opcional, lista exata de campos a pedir ao Jira (ignora columns/field_ids); reduz o payload.
     """
-    if columns:
+    if fields:
+        fields_to_fetch = list(fields)
+    elif columns:
         fields_to_fetch = [c['id'] for c in columns if c.get('id')]
         if 'key' not in fields_to_fetch and 'issuekey' not in fields_to_fetch:
             fields_to_fetch.insert(0, 'key')
@@ -2261,13 +2660,7 @@ def search_jql(auth, jql, field_ids, limit=None, columns=None):
             if fid not in fields_to_fetch:
                 fields_to_fetch.append(fid)
     else:
-        fields_to_fetch = ['key', 'summary', 'description', 'reporter', 'assignee', 'status', 'created', 'updated', 'resolutiondate']
-        for name, fid in field_ids.items():
-            if fid and fid not in fields_to_fetch:
-                fields_to_fetch.append(fid)
-        for fid in (NUBANK_TIME_TO_RESOLUTION_FID, NUBANK_TIME_TO_FIRST_RESPONSE_FID):
-            if fid not in fields_to_fetch:
-                fields_to_fetch.append(fid)
+        fields_to_fetch = get_required_field_ids(field_ids)
 
     all_issues = []
     next_page_token = None
@@ -2287,12 +2680,14 @@ def search_jql(auth, jql, field_ids, limit=None, columns=None):
         if next_page_token:
             payload['nextPageToken'] = next_page_token
 
+        # Corpo serializado uma vez por página (orjson quando instalado) e reenviado igual nos retries de 429
+        body = orjson.dumps(payload) if orjson is not None else json.dumps(payload).encode('utf-8')
         for retry in range(max_retries):
-            r = requests.post(
+            r = _JIRA_SESSION.post(
                 f'{JIRA_URL}/rest/api/3/search/jql',
                 auth=auth,
-                headers={'Content-Type': 'application/json', 'Accept': 'application/json'},
-                json=payload,
+                headers=_JIRA_SEARCH_HEADERS,
+                data=body,
                 timeout=60,
             )
             if r.status_code == 429:
@@ -2302,7 +2697,7 @@ def search_jql(auth, jql, field_ids, limit=None, columns=None):
         if r.status_code != 200:
             raise RuntimeError(f'Jira API error: {r.status_code} - {r.text}')
 
-        data = r.json()
+        data = _response_json(r)
         issues = data.get('issues', [])
         all_issues.extend(issues)
         next_page_token = data.get('nextPageToken')
@@ -2321,7 +2716,6 @@ REOPENED_JQL_BASE = 'status CHANGED FROM ("Done", "Closed", "Resolved")'
 def _reopened_jql_for_period(month, year):
     """Monta JQL de reabertura com o mesmo período (mês/ano) usado no modo lista.
     DURING filtra pela data em que o status foi alterado (reabertura)."""
-    import calendar
     try:
         last_day = calendar.monthrange(int(year), int(month))[1]
         first = f'{year}-{month:02d}-01'
@@ -2341,15 +2735,18 @@ def _reopened_jql_for_date_range(first_yyyymmdd, last_yyyymmdd):
     return f'{REOPENED_JQL_BASE} DURING ("{first}", "{last}")'
 
 
+_RE_JQL_CREATED_FROM = re.compile(r'created\s*>=\s*["\'](\d{4}-\d{2}-\d{2})', re.IGNORECASE)
+_RE_JQL_CREATED_TO = re.compile(r'created\s*<=\s*["\'](\d{4}-\d{2}-\d{2})', re.IGNORECASE)
+
+
 def _parse_jql_date_range(jql):
     """Extrai intervalo de datas da JQL (created >= "Y-M-D" AND created <= "Y-M-D").
     Retorna (first_yyyymmdd, last_yyyymmdd) ou (None, None)."""
-    import re
     if not jql or not isinstance(jql, str):
         return None, None
     # created >= "YYYY-MM-DD" e created <= "YYYY-MM-DD"
-    m_first = re.search(r'created\s*>=\s*["\'](\d{4}-\d{2}-\d{2})', jql, re.IGNORECASE)
-    m_last = re.search(r'created\s*<=\s*["\'](\d{4}-\d{2}-\d{2})', jql, re.IGNORECASE)
+    m_first = _RE_JQL_CREATED_FROM.search(jql)
+    m_last = _RE_JQL_CREATED_TO.search(jql)
     if m_first and m_last:
         return m_first.group(1), m_last.group(1)
     return None, None
@@ -2366,7 +2763,7 @@ def stats_reopened_for_period(auth, field_ids, month, year, limit=5000):
     if not jql or not auth:
         return {'total': 0, 'byPeriod': [], 'keys': [], 'issues': []}
     try:
-        issues = search_jql(auth, jql, field_ids, limit=limit)
+        issues = search_jql(auth, jql, field_ids, limit=limit, fields=get_reopened_field_ids(field_ids))
     except Exception:
         return {'total': 0, 'byPeriod': [], 'keys': [], 'issues': []}
     keys = [i.get('key') for i in issues if i.get('key')]
@@ -2384,7 +2781,7 @@ def stats_reopened_for_date_range(auth, field_ids, first_yyyymmdd, last_yyyymmdd
     if not jql or not auth:
         return {'total': 0, 'byPeriod': [], 'keys': [], 'issues': []}
     try:
-        issues = search_jql(auth, jql, field_ids, limit=limit)
+        issues = search_jql(auth, jql, field_ids, limit=limit, fields=get_reopened_field_ids(field_ids))
     except Exception:
         return {'total': 0, 'byPeriod': [], 'keys': [], 'issues': []}
     keys = [i.get('key') for i in issues if i.get('key')]
@@ -2402,7 +2799,7 @@ def _format_seconds(seconds):
         if total < 0:
             return ''
         # Se valor > ~10 anos em segundos, provavelmente está em milissegundos
-        if total > 86400 * 365 * 10:
+        if total > _SEC_IN_YEAR * 10:
             total = total // 1000
         days, r = divmod(total, 86400)
         hours, r = divmod(r, 3600)
@@ -2422,13 +2819,17 @@ def _format_seconds_hhmm(seconds):
     """Formata duração em segundos como HH:MM (ex.: 50880 -> '14:13'). Suporta valores negativos (ex.: -2:18)."""
     if seconds is None:
         return ''
+    # Caminho rápido: int de segundos não negativo e fora da faixa de milissegundos (caso comum do Jira)
+    if type(seconds) is int and 0 <= seconds <= _SEC_IN_YEAR * 10:
+        hours, rem = divmod(seconds, 3600)
+        return f'{hours}:{rem // 60:02d}'
     try:
         total = int(float(seconds))
         neg = total < 0
         if neg:
             total = abs(total)
         # Se valor > ~10 anos em segundos, provavelmente está em milissegundos
-        if total > 86400 * 365 * 10:
+        if total > _SEC_IN_YEAR * 10:
             total = total // 1000
         hours = total // 3600
         minutes = (total % 3600) // 60
@@ -2438,24 +2839,25 @@ def _format_seconds_hhmm(seconds):
         return ''
 
 
+# Partes de uma duração do Jira ('1d 2h 30m 5s'): (regex, segundos por unidade)
+_DURATION_PARTS = (
+    (re.compile(r'(\d+)\s*d', re.I), 86400),
+    (re.compile(r'(\d+)\s*h', re.I), 3600),
+    (re.compile(r'(\d+)\s*m', re.I), 60),
+    (re.compile(r'(\d+)\s*s', re.I), 1),
+)
+_RE_TZ_NO_COLON = re.compile(r'([+-])(\d{2})(\d{2})$')
+
+
 def _parse_duration_string(s):
     """Parse string like '1d 2h 30m', '2h 30m', '5m' or '15m' to seconds. Espaço opcional entre número e letra."""
     if not s or not isinstance(s, str) or not s.strip():
         return None
-    import re
     total = 0
-    m = re.search(r'(\d+)\s*d', s, re.I)
-    if m:
-        total += int(m.group(1)) * 86400
-    m = re.search(r'(\d+)\s*h', s, re.I)
-    if m:
-        total += int(m.group(1)) * 3600
-    m = re.search(r'(\d+)\s*m', s, re.I)
-    if m:
-        total += int(m.group(1)) * 60
-    m = re.search(r'(\d+)\s*s', s, re.I)
-    if m:
-        total += int(m.group(1))
+    for pattern, unit in _DURATION_PARTS:
+        m = pattern.search(s)
+        if m:
+            total += int(m.group(1)) * unit
     return total if total > 0 else None
 
 
@@ -2467,18 +2869,23 @@ def _parse_sla_timestamp_to_seconds(ts):
     """
     if not ts or not isinstance(ts, str):
         return None
+    return _parse_sla_timestamp_str(ts)
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_sla_timestamp_str(ts):
+    # Textos de SLA se repetem muito entre chamados ('2h 30m', '14:13'): memoiza por string
     s = ts.strip()
     if ' (em andamento)' in s:
         s = s.replace(' (em andamento)', '').strip()
     if not s:
         return None
-    # Formato HH:MM ou -HH:MM (como _format_seconds_hhmm)
-    import re
-    mm = re.match(r'^(-?)(\d+):(\d{2})$', s.strip())
-    if mm:
-        sign = -1 if mm.group(1) == '-' else 1
-        h, m = int(mm.group(2)), int(mm.group(3))
-        return sign * (h * 3600 + m * 60)
+    # Formato HH:MM ou -HH:MM (como _format_seconds_hhmm); split manual, isdecimal() = \d do regex
+    neg = s[0] == '-'
+    h, sep, m = (s[1:] if neg else s).partition(':')
+    if sep and h.isdecimal() and len(m) == 2 and m.isdecimal():
+        total = int(h) * 3600 + int(m) * 60
+        return -total if neg else total
     # Formato 1d 2h 30m
     return _parse_duration_string(s)
 
@@ -2549,22 +2956,36 @@ def _parse_iso_date(s):
     """Parse ISO date string to datetime; return None on failure."""
     if not s:
         return None
+    if isinstance(s, str):
+        return _parse_iso_date_str(s)
+    return _parse_iso_date_uncached(s)
+
+
+def _parse_iso_date_uncached(s):
     try:
-        from datetime import datetime
-        import re
         t = s.strip().replace('Z', '+00:00')
         # Jira pode retornar -0300 (sem dois pontos); fromisoformat espera -03:00
-        t = re.sub(r'([+-])(\d{2})(\d{2})$', r'\1\2:\3', t)
+        t = _RE_TZ_NO_COLON.sub(r'\1\2:\3', t)
         return datetime.fromisoformat(t)
     except Exception:
         try:
             # Fallback: só a parte da data
-            from datetime import datetime
             return datetime.fromisoformat(str(s)[:19].replace('Z', '+00:00'))
         except Exception:
             return None
 
 
+# Mesmos created/resolutiondate são parseados por vários stats_*; datetime é imutável, pode memoizar.
+# Tamanho cobre uma busca inteira (limit 5000 × created/resolutiondate/updated): com LRU menor que o volume,
+# cada stats_* percorrendo os chamados na mesma ordem expulsaria as datas antes de reusá-las.
+_parse_iso_date_str = functools.lru_cache(maxsize=65536)(_parse_iso_date_uncached)
+
+
+def clear_date_cache():
+    """Esvazia o memo de _parse_iso_date (chamado ao fim de cada busca com gráficos, para não segurar memória entre buscas)."""
+    _parse_iso_date_str.cache_clear()
+
+
 def _format_duration(created_iso, resolved_iso):
     """Compute duration between created and resolutiondate; return HH:MM (como no Jira)."""
     created = _parse_iso_date(created_iso)
@@ -2609,13 +3030,106 @@ def get_field_display_value(issue, field_id, field_ids):
     return format_field_value(val)
 
 
-def get_row_values_for_columns(issue, columns, field_ids):
-    """Retorna lista de valores para exibição, na ordem das colunas do filtro."""
-    return [get_field_display_value(issue, col['id'], field_ids) for col in columns]
+def _display_name_or(default):
+    """Formatador de pessoa (reporter/assignee): displayName do dict ou valor formatado; default se vazio."""
+    if default:
+        return lambda val, fields: val.get('displayName', default) if isinstance(val, dict) else (format_field_value(val) or default)
+    return lambda val, fields: val.get('displayName', '') if isinstance(val, dict) else format_field_value(val)
+
+
+def _display_name_field(val, fields):
+    return val.get('name', '') if isinstance(val, dict) else format_field_value(val)
+
+
+def _display_ttr(val, fields):
+    return format_field_value(val) or _format_duration(fields.get('created'), fields.get('resolutiondate')) or 'Em aberto'
+
+
+def _display_frt(val, fields):
+    return format_field_value(val) or '—'
+
+
+def _display_default(val, fields):
+    return format_field_value(val)
+
+
+def _display_date_or(fallback):
+    """Formatador de data (created/updated/resolutiondate); valor vazio cai no formatador seguinte da cadeia."""
+    def fmt(val, fields):
+        if not val:
+            return fallback(val, fields)
+        parsed = _parse_iso_date(val)
+        if parsed:
+            return parsed.strftime('%Y-%m-%d %H:%M')
+        return str(val)[:19] if len(str(val)) >= 19 else str(val)
+    return fmt
+
+
+def _column_extractor(field_id, field_ids):
+    """
+    Especializa get_field_display_value para um field_id: a cadeia de comparações roda uma vez por coluna,
+    não por célula. Retorna função issue -> texto de exibição.
+    """
+    if not field_id:
+        return lambda issue: ''
+    if field_id == 'issuekey' or field_id == 'key':
+        return lambda issue: issue.get('key', '')
+    if field_id == NUBANK_TIME_TO_RESOLUTION_FID or field_id == field_ids.get('Time to resolution'):
+        tail = _display_ttr
+    elif field_id == NUBANK_TIME_TO_FIRST_RESPONSE_FID or field_id == field_ids.get('Time to first response'):
+        tail = _display_frt
+    else:
+        tail = _display_default
+    if field_id == 'reporter':
+        fmt = _display_name_or('')
+    elif field_id == 'assignee':
+        fmt = _display_name_or('Unassigned')
+    elif field_id in ('issuetype', 'status'):
+        fmt = _display_name_field
+    elif field_id in ('created', 'updated', 'resolutiondate'):
+        fmt = _display_date_or(tail)
+    else:
+        fmt = tail
+
+    def extract(issue):
+        fields = issue.get('fields', {})
+        val = fields.get(field_id)
+        if val is None:
+            return ''
+        return fmt(val, fields)
+    return extract
+
+
+def build_column_extractors(columns, field_ids):
+    """Extratores de exibição, um por coluna do filtro (ver get_row_values_for_columns)."""
+    return [_column_extractor(col['id'], field_ids) for col in columns]
+
+
+def get_row_values_for_columns(issue, columns, field_ids, extractors=None):
+    """Retorna lista de valores para exibição, na ordem das colunas do filtro.
+    extractors: opcional, build_column_extractors(columns, field_ids) montado uma vez para o relatório."""
+    if extractors is None:
+        extractors = build_column_extractors(columns, field_ids)
+    return [ex(issue) for ex in extractors]
+
+
+def resolve_row_field_ids(field_ids):
+    """
+    Resolve uma vez por relatório os IDs que get_row_values consulta: (TTR, FRT, Request Type, Satisfaction).
+    TTR/FRT viram tuplas de candidatos em ordem (resolvido, Nubank), sem repetir quando são o mesmo ID.
+    """
+    field_ids = field_ids or {}
+    ttr = field_ids.get('Time to resolution')
+    frt = field_ids.get('Time to first response')
+    ttr_fids = (ttr, NUBANK_TIME_TO_RESOLUTION_FID) if ttr and ttr != NUBANK_TIME_TO_RESOLUTION_FID else (NUBANK_TIME_TO_RESOLUTION_FID,)
+    frt_fids = (frt, NUBANK_TIME_TO_FIRST_RESPONSE_FID) if frt and frt != NUBANK_TIME_TO_FIRST_RESPONSE_FID else (NUBANK_TIME_TO_FIRST_RESPONSE_FID,)
+    return (ttr_fids, frt_fids, field_ids.get('Request Type'), field_ids.get('Satisfaction'))
 
 
-def get_row_values(issue, field_ids):
-    """Extract display row: Reporter, Time to resolution, Time to first response, Assignee, Request Type."""
+def get_row_values(issue, field_ids, row_fids=None):
+    """Extract display row: Reporter, Time to resolution, Time to first response, Assignee, Request Type.
+    row_fids: opcional, resultado de resolve_row_field_ids(field_ids) para laços sobre muitos issues."""
+    ttr_fids, frt_fids, fid_rt, fid_sat = row_fids or resolve_row_field_ids(field_ids)
     fields = issue.get('fields', {})
     key = issue.get('key', '')
 
@@ -2626,11 +3140,10 @@ def get_row_values(issue, field_ids):
     assignee_str = assignee.get('displayName', 'Unassigned') if isinstance(assignee, dict) else (format_field_value(assignee) or 'Unassigned')
 
     time_to_res = ''
-    fid = field_ids.get('Time to resolution')
-    if fid:
+    for fid in ttr_fids:
         time_to_res = format_field_value(fields.get(fid))
-    if not time_to_res:
-        time_to_res = format_field_value(fields.get(NUBANK_TIME_TO_RESOLUTION_FID))
+        if time_to_res:
+            break
     if not time_to_res:
         time_to_res = _format_duration(fields.get('created'), fields.get('resolutiondate'))
     if not time_to_res:
@@ -2638,21 +3151,16 @@ def get_row_values(issue, field_ids):
         time_to_res = 'Em aberto' if not fields.get('resolutiondate') else '—'
 
     time_to_first = ''
-    fid = field_ids.get('Time to first response')
-    if fid:
+    for fid in frt_fids:
         time_to_first = format_field_value(fields.get(fid))
-    if not time_to_first:
-        time_to_first = format_field_value(fields.get(NUBANK_TIME_TO_FIRST_RESPONSE_FID))
+        if time_to_first:
+            break
     if not time_to_first:
         time_to_first = '—'  # campo não preenchido no Jira para este issue
 
-    request_type = ''
-    fid = field_ids.get('Request Type')
-    if fid:
-        request_type = format_field_value(fields.get(fid))
+    request_type = format_field_value(fields.get(fid_rt)) if fid_rt else ''
 
     satisfaction = '—'
-    fid_sat = field_ids.get('Satisfaction')
     if fid_sat:
         raw = fields.get(fid_sat)
         if raw is not None:
@@ -2694,20 +3202,24 @@ def _issue_sla_breached(issue_key, sla_by_key):
     Considera SLA estourado SOMENTE quando na coluna SLAs do modo lista o chamado exibe o ícone X (vermelho),
     ou seja, algum SLA relevante com met=False (mesma fonte e critério da lista)."""
     slas = (sla_by_key or {}).get(issue_key) or []
-    relevant = [s for s in slas if _sla_name_is_relevant(s.get('name'))]
-    if not relevant:
-        return False
-    # met=False = ícone X na lista (estourado); met=True = ✓ (cumprido)
-    return any(not s.get('met', True) for s in relevant)
+    # met=False = ícone X na lista (estourado); met=True = ✓ (cumprido). Relevância só é checada nos estourados
+    for s in slas:
+        if not s.get('met', True) and _sla_item_is_relevant(s):
+            return True
+    return False
 
 
 def _issue_sla_within(issue_key, sla_by_key):
     """True se o chamado tem SLAs relevantes e todos cumpridos. Usa dados da coluna SLAs."""
     slas = (sla_by_key or {}).get(issue_key) or []
-    relevant = [s for s in slas if _sla_name_is_relevant(s.get('name'))]
-    if not relevant:
-        return False
-    return all(s.get('met', True) for s in relevant)
+    # Uma passada: para no primeiro relevante estourado
+    found = False
+    for s in slas:
+        if _sla_item_is_relevant(s):
+            if not s.get('met', True):
+                return False
+            found = True
+    return found
 
 
 def get_satisfaction_numeric(issue, field_ids):
@@ -2716,19 +3228,25 @@ def get_satisfaction_numeric(issue, field_ids):
     fid = field_ids.get('Satisfaction')
     if not fid:
         return None
-    raw = (issue.get('fields') or {}).get(fid)
+    raw = (issue.get('fields') or _EMPTY_FIELDS).get(fid)
     if raw is None:
         return None
-    if isinstance(raw, (int, float)) and 1 <= raw <= 5:
-        return int(raw)
+    # Caso comum do Service Desk primeiro: {'rating': 5}
     if isinstance(raw, dict):
-        v = raw.get('rating') or raw.get('value') or raw.get('id') or raw.get('name')
+        v = raw.get('rating')
+        if type(v) is int and v:
+            return v if 1 <= v <= 5 else None
+        v = v or raw.get('value') or raw.get('id') or raw.get('name')
         if v is not None:
             try:
                 n = int(v) if isinstance(v, (int, float)) else int(str(v).strip())
                 return n if 1 <= n <= 5 else None
             except (ValueError, TypeError):
                 pass
+        # str(dict) nunca vira número: sem a tentativa genérica abaixo
+        return None
+    if isinstance(raw, (int, float)) and 1 <= raw <= 5:
+        return int(raw)
     try:
         n = int(raw) if isinstance(raw, (int, float)) else int(str(raw).strip())
         return n if 1 <= n <= 5 else None
@@ -2754,15 +3272,22 @@ def stats_csat(issues, field_ids):
     return {'average': average, 'byStar': by_star, 'totalWithSatisfaction': total}
 
 
+_EMPTY_FIELDS = {}  # fallback compartilhado (só leitura) para issue sem 'fields'
+
+
+def _assignee_name(fields):
+    """Nome do analista para agrupar estatísticas: displayName, texto do campo ou 'Unassigned'."""
+    assignee = fields.get('assignee')
+    if isinstance(assignee, dict):
+        return assignee.get('displayName') or 'Unassigned'
+    return (str(assignee) if assignee else '') or 'Unassigned'
+
+
 def _median(values):
     """Retorna mediana de uma lista numérica; None se vazia."""
     if not values:
         return None
-    s = sorted(values)
-    n = len(s)
-    if n % 2:
-        return round(s[n // 2], 2)
-    return round((s[n // 2 - 1] + s[n // 2]) / 2, 2)
+    return round(statistics.median(values), 2)
 
 
 def _period_key(dt, by_month=False):
@@ -2824,57 +3349,65 @@ def _get_issue_resolution_and_frt_seconds(issue, field_ids):
     return res_sec, fr_sec
 
 
-def stats_ttr_frt_by_period(issues, field_ids, by_month=False):
-    """
-    TTR e FRT medianos por semana ou mês (apenas com dados já presentes no issue; sem fallback de comentário).
-    Retorna { 'byPeriod': [ { 'period', 'medianTtrHours', 'medianFrtHours', 'count' } ], 'periodList': [...] }.
-    """
-    by_period = {}
-    for issue in issues:
-        created = _parse_iso_date((issue.get('fields') or {}).get('created'))
-        if not created:
-            continue
-        pk = _period_key(created, by_month=by_month)
-        if not pk:
-            continue
-        if pk not in by_period:
-            by_period[pk] = {'ttr_sec': [], 'frt_sec': [], 'count': 0}
-        by_period[pk]['count'] += 1
-        res_sec, fr_sec = _get_issue_resolution_and_frt_seconds(issue, field_ids)
-        if res_sec is not None:
-            by_period[pk]['ttr_sec'].append(res_sec)
-        if fr_sec is not None and fr_sec >= 0:
-            by_period[pk]['frt_sec'].append(fr_sec)
-    period_list = sorted(by_period.keys())
-    out = []
-    for p in period_list:
-        data = by_period[p]
-        median_ttr = _median(data['ttr_sec'])
-        median_frt = _median(data['frt_sec'])
-        out.append({
-            'period': p,
-            'medianTtrHours': round(median_ttr / 3600, 2) if median_ttr is not None else None,
-            'medianFrtHours': round(median_frt / 3600, 2) if median_frt is not None else None,
-            'count': data['count'],
-        })
-    return {'byPeriod': out, 'periodList': period_list}
+_PERIOD_SERIES = ('ttrFrtByPeriod', 'notaTemporal', 'csatByPeriod', 'volumeByPeriod', 'slaPctByPeriod')
 
 
-def stats_nota_temporal(issues, notas, by_month=False):
+def stats_by_period(issues, field_ids, sla_by_key=None, notas=None, by_month=False, series=None):
     """
-    Nota final média por período; distribuição 1-5; top analistas por nota.
-    notas: dict issue_key -> { 'nota': 1-5, 'comentario': ... }.
-    Retorna: byPeriod, distribution, topAnalysts.
+    Séries por período (semana ou mês) numa única passada sobre issues: created/período, TTR/FRT, Satisfaction,
+    SLA e nota lidos uma vez por chamado.
+    notas: dict issue_key -> { 'nota': 1-5, ... }; sla_by_key: dict issue_key -> lista de SLAs (coluna SLAs).
+    series: opcional, subconjunto de _PERIOD_SERIES a calcular (padrão: todas); o que não for pedido não é lido.
+    Retorna { 'ttrFrtByPeriod', 'notaTemporal', 'csatByPeriod', 'volumeByPeriod', 'slaPctByPeriod' } (só as pedidas),
+    cada um no formato da função stats_* correspondente.
     """
-    from collections import defaultdict
-    by_period = defaultdict(lambda: {'sum': 0, 'count': 0})
+    series = _PERIOD_SERIES if series is None else series
+    want_ttr = 'ttrFrtByPeriod' in series
+    want_nota = 'notaTemporal' in series
+    want_csat = 'csatByPeriod' in series
+    want_sla = 'slaPctByPeriod' in series
+    field_ids = field_ids or {}
+    sla_by_key = sla_by_key or {}
+    notas = notas or {}
+    by_period = {}
     distribution = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
-    by_analyst = defaultdict(lambda: {'sum': 0, 'count': 0})
+    # Soma e contagem de nota por analista em Counters paralelos (sem um dict por analista)
+    nota_sum_by_analyst = Counter()
+    nota_count_by_analyst = Counter()
     for issue in issues:
+        fields = issue.get('fields') or {}
         key = issue.get('key')
-        if not key:
+        created = _parse_iso_date(fields.get('created'))
+        pk = _period_key(created, by_month=by_month) if created else None
+        d = None
+        if pk:
+            d = by_period.get(pk)
+            if d is None:
+                d = by_period[pk] = {
+                    'count': 0, 'ttr_sec': [], 'frt_sec': [], 'csat_sum': 0, 'csat_count': 0,
+                    'nota_sum': 0, 'nota_count': 0, 'sla_met': 0, 'sla_total': 0,
+                }
+            d['count'] += 1
+            if want_ttr:
+                res_sec, fr_sec = _get_issue_resolution_and_frt_seconds(issue, field_ids)
+                if res_sec is not None:
+                    d['ttr_sec'].append(res_sec)
+                if fr_sec is not None and fr_sec >= 0:
+                    d['frt_sec'].append(fr_sec)
+            if want_csat:
+                csat = get_satisfaction_numeric(issue, field_ids)
+                if csat is not None:
+                    d['csat_sum'] += csat
+                    d['csat_count'] += 1
+            slas = sla_by_key.get(key) or [] if key and want_sla else []
+            if slas:
+                d['sla_total'] += 1
+                if all(s.get('met', True) for s in slas):
+                    d['sla_met'] += 1
+        # Nota: distribuição e analistas contam mesmo sem created (só o período depende dele)
+        if not key or not want_nota:
             continue
-        entry = (notas or {}).get(key)
+        entry = notas.get(key)
         nota = entry.get('nota') if isinstance(entry, dict) else None
         if nota is None:
             continue
@@ -2884,66 +3417,83 @@ def stats_nota_temporal(issues, notas, by_month=False):
             continue
         if n < 1 or n > 5:
             continue
-        created = _parse_iso_date((issue.get('fields') or {}).get('created'))
-        if created:
-            pk = _period_key(created, by_month=by_month)
-            if pk:
-                by_period[pk]['sum'] += n
-                by_period[pk]['count'] += 1
+        if d is not None:
+            d['nota_sum'] += n
+            d['nota_count'] += 1
         distribution[n] = distribution.get(n, 0) + 1
-        assignee = (issue.get('fields') or {}).get('assignee') or {}
-        name = assignee.get('displayName', '') if isinstance(assignee, dict) else (str(assignee) or 'Unassigned')
-        if not name:
-            name = 'Unassigned'
-        by_analyst[name]['sum'] += n
-        by_analyst[name]['count'] += 1
+        name = _assignee_name(fields)
+        nota_sum_by_analyst[name] += n
+        nota_count_by_analyst[name] += 1
     period_list = sorted(by_period.keys())
-    by_period_list = []
-    for p in period_list:
-        d = by_period[p]
-        avg = round(d['sum'] / d['count'], 2) if d['count'] else None
-        by_period_list.append({'period': p, 'avgNota': avg, 'count': d['count']})
-    analysts_list = []
-    for name, d in by_analyst.items():
-        if d['count'] > 0:
-            analysts_list.append({
-                'assignee': name,
-                'avgNota': round(d['sum'] / d['count'], 2),
-                'count': d['count'],
+    out = {}
+    if want_ttr:
+        ttr_frt = []
+        for p in period_list:
+            data = by_period[p]
+            median_ttr = _median(data['ttr_sec'])
+            median_frt = _median(data['frt_sec'])
+            ttr_frt.append({
+                'period': p,
+                'medianTtrHours': round(median_ttr / 3600, 2) if median_ttr is not None else None,
+                'medianFrtHours': round(median_frt / 3600, 2) if median_frt is not None else None,
+                'count': data['count'],
             })
-    analysts_list.sort(key=lambda x: (-x['avgNota'], -x['count']))
-    top_analysts = analysts_list[:15]
-    bottom_analysts = sorted(analysts_list, key=lambda x: (x['avgNota'], -x['count']))[:10]
-    return {
-        'byPeriod': by_period_list,
-        'distribution': distribution,
-        'topAnalysts': top_analysts,
-        'bottomAnalysts': bottom_analysts,
-    }
+        out['ttrFrtByPeriod'] = {'byPeriod': ttr_frt, 'periodList': period_list}
+    if want_nota:
+        nota_by_period = [
+            {'period': p, 'avgNota': round(by_period[p]['nota_sum'] / by_period[p]['nota_count'], 2), 'count': by_period[p]['nota_count']}
+            for p in period_list if by_period[p]['nota_count']
+        ]
+        analysts_list = [
+            {'assignee': name, 'avgNota': round(nota_sum_by_analyst[name] / count, 2), 'count': count}
+            for name, count in nota_count_by_analyst.items()
+        ]
+        analysts_list.sort(key=lambda x: (-x['avgNota'], -x['count']))
+        out['notaTemporal'] = {
+            'byPeriod': nota_by_period,
+            'distribution': distribution,
+            'topAnalysts': analysts_list[:15],
+            'bottomAnalysts': sorted(analysts_list, key=lambda x: (x['avgNota'], -x['count']))[:10],
+        }
+    if want_csat:
+        out['csatByPeriod'] = {
+            'byPeriod': [
+                {'period': p, 'average': round(by_period[p]['csat_sum'] / by_period[p]['csat_count'], 2), 'totalWithSatisfaction': by_period[p]['csat_count']}
+                for p in period_list if by_period[p]['csat_count']
+            ],
+        }
+    if 'volumeByPeriod' in series:
+        out['volumeByPeriod'] = {'byPeriod': [{'period': p, 'count': by_period[p]['count']} for p in period_list]}
+    if want_sla:
+        sla_pct = []
+        for p in period_list:
+            d = by_period[p]
+            if d['sla_total']:
+                sla_pct.append({'period': p, 'pctWithinSla': round(100 * d['sla_met'] / d['sla_total'], 1), 'total': d['sla_total'], 'met': d['sla_met']})
+        out['slaPctByPeriod'] = {'byPeriod': sla_pct}
+    return out
+
+
+def stats_ttr_frt_by_period(issues, field_ids, by_month=False):
+    """
+    TTR e FRT medianos por semana ou mês (apenas com dados já presentes no issue; sem fallback de comentário).
+    Retorna { 'byPeriod': [ { 'period', 'medianTtrHours', 'medianFrtHours', 'count' } ], 'periodList': [...] }.
+    """
+    return stats_by_period(issues, field_ids, by_month=by_month, series=('ttrFrtByPeriod',))['ttrFrtByPeriod']
+
+
+def stats_nota_temporal(issues, notas, by_month=False):
+    """
+    Nota final média por período; distribuição 1-5; top analistas por nota.
+    notas: dict issue_key -> { 'nota': 1-5, 'comentario': ... }.
+    Retorna: byPeriod, distribution, topAnalysts.
+    """
+    return stats_by_period(issues, {}, notas=notas, by_month=by_month, series=('notaTemporal',))['notaTemporal']
 
 
 def stats_csat_by_period(issues, field_ids, by_month=False):
     """CSAT médio por período (semana ou mês). Retorna { 'byPeriod': [ { period, average, totalWithSatisfaction } ] }."""
-    from collections import defaultdict
-    by_period = defaultdict(lambda: {'sum': 0, 'count': 0})
-    for issue in issues:
-        created = _parse_iso_date((issue.get('fields') or {}).get('created'))
-        if not created:
-            continue
-        pk = _period_key(created, by_month=by_month)
-        if not pk:
-            continue
-        n = get_satisfaction_numeric(issue, field_ids)
-        if n is not None:
-            by_period[pk]['sum'] += n
-            by_period[pk]['count'] += 1
-    period_list = sorted(by_period.keys())
-    return {
-        'byPeriod': [
-            {'period': p, 'average': round(by_period[p]['sum'] / by_period[p]['count'], 2), 'totalWithSatisfaction': by_period[p]['count']}
-            for p in period_list
-        ],
-    }
+    return stats_by_period(issues, field_ids, by_month=by_month, series=('csatByPeriod',))['csatByPeriod']
 
 
 def stats_csat_vs_nota(issues, field_ids, notas):
@@ -2968,7 +3518,6 @@ def stats_csat_vs_nota(issues, field_ids, notas):
 
 def stats_csat_by_request_type(issues, field_ids):
     """CSAT por Request Type. Retorna { 'byRequestType': { rt: { average, total, byStar } } }."""
-    from collections import defaultdict
     by_rt = defaultdict(lambda: {'sum': 0, 'count': 0, 'byStar': {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}})
     for issue in issues:
         row = get_row_values(issue, field_ids)
@@ -2991,29 +3540,12 @@ def stats_csat_by_request_type(issues, field_ids):
 
 def stats_volume_by_period(issues, by_month=False):
     """Tickets por período (semana ou mês). Retorna { 'byPeriod': [ { period, count } ] }."""
-    from collections import defaultdict
-    by_period = defaultdict(int)
-    for issue in issues:
-        created = _parse_iso_date((issue.get('fields') or {}).get('created'))
-        if not created:
-            continue
-        pk = _period_key(created, by_month=by_month)
-        if pk:
-            by_period[pk] += 1
-    period_list = sorted(by_period.keys())
-    return {'byPeriod': [{'period': p, 'count': by_period[p]} for p in period_list]}
+    return stats_by_period(issues, {}, by_month=by_month, series=('volumeByPeriod',))['volumeByPeriod']
 
 
 def stats_volume_by_analyst(issues):
     """Contagem de tickets por analista (assignee). Retorna { 'byAnalyst': [ { assignee, count } ] }."""
-    from collections import defaultdict
-    by_analyst = defaultdict(int)
-    for issue in issues:
-        assignee = (issue.get('fields') or {}).get('assignee') or {}
-        name = assignee.get('displayName', '') if isinstance(assignee, dict) else (str(assignee) or 'Unassigned')
-        if not name:
-            name = 'Unassigned'
-        by_analyst[name] += 1
+    by_analyst = Counter(_assignee_name(issue.get('fields') or _EMPTY_FIELDS) for issue in issues)
     list_analysts = [{'assignee': k, 'count': v} for k, v in by_analyst.items()]
     list_analysts.sort(key=lambda x: -x['count'])
     return {'byAnalyst': list_analysts}
@@ -3021,37 +3553,13 @@ def stats_volume_by_analyst(issues):
 
 def stats_sla_pct_by_period(issues, sla_by_key, by_month=False):
     """% de tickets dentro do SLA (TTR + FRT) por período. Retorna { 'byPeriod': [ { period, pctWithinSla, total, met } ] }."""
-    from collections import defaultdict
-    by_period = defaultdict(lambda: {'met': 0, 'total': 0})
-    for issue in issues:
-        key = issue.get('key')
-        if not key:
-            continue
-        created = _parse_iso_date((issue.get('fields') or {}).get('created'))
-        if not created:
-            continue
-        pk = _period_key(created, by_month=by_month)
-        if not pk:
-            continue
-        slas = (sla_by_key or {}).get(key) or []
-        if not slas:
-            continue
-        by_period[pk]['total'] += 1
-        if all(s.get('met', True) for s in slas):
-            by_period[pk]['met'] += 1
-    period_list = sorted(by_period.keys())
-    out = []
-    for p in period_list:
-        d = by_period[p]
-        pct = round(100 * d['met'] / d['total'], 1) if d['total'] else None
-        out.append({'period': p, 'pctWithinSla': pct, 'total': d['total'], 'met': d['met']})
-    return {'byPeriod': out}
+    return stats_by_period(issues, {}, sla_by_key=sla_by_key, by_month=by_month, series=('slaPctByPeriod',))['slaPctByPeriod']
 
 
 def stats_sla_by_analyst(issues, sla_by_key):
     """SLA por analista: met/total e %. Retorna { 'byAnalyst': [ { assignee, met, total, pct } ] }."""
-    from collections import defaultdict
-    by_analyst = defaultdict(lambda: {'met': 0, 'total': 0})
+    met_by_analyst = Counter()
+    total_by_analyst = Counter()
     for issue in issues:
         key = issue.get('key')
         if not key:
@@ -3059,22 +3567,19 @@ def stats_sla_by_analyst(issues, sla_by_key):
         slas = (sla_by_key or {}).get(key) or []
         if not slas:
             continue
-        assignee = (issue.get('fields') or {}).get('assignee') or {}
-        name = assignee.get('displayName', '') if isinstance(assignee, dict) else (str(assignee) or 'Unassigned')
-        if not name:
-            name = 'Unassigned'
-        by_analyst[name]['total'] += 1
+        name = _assignee_name(issue.get('fields') or _EMPTY_FIELDS)
+        total_by_analyst[name] += 1
         if all(s.get('met', True) for s in slas):
-            by_analyst[name]['met'] += 1
+            met_by_analyst[name] += 1
     out = []
-    for name, d in by_analyst.items():
-        if d['total'] > 0:
-            out.append({
-                'assignee': name,
-                'met': d['met'],
-                'total': d['total'],
-                'pct': round(100 * d['met'] / d['total'], 1),
-            })
+    for name, total in total_by_analyst.items():
+        met = met_by_analyst[name]
+        out.append({
+            'assignee': name,
+            'met': met,
+            'total': total,
+            'pct': round(100 * met / total, 1),
+        })
     out.sort(key=lambda x: (-x['pct'], -x['total']))
     return {'byAnalyst': out}
 
@@ -3087,8 +3592,8 @@ def _get_request_type_from_issue(issue, field_ids):
 
 def stats_nota_by_request_type(issues, notas, field_ids):
     """Nota média por Request Type. Retorna { 'byRequestType': { rt: { avgNota, count } } }."""
-    from collections import defaultdict
-    by_rt = defaultdict(lambda: {'sum': 0, 'count': 0})
+    sum_by_rt = Counter()
+    count_by_rt = Counter()
     for issue in issues:
         key = issue.get('key')
         if not key:
@@ -3104,19 +3609,16 @@ def stats_nota_by_request_type(issues, notas, field_ids):
         if n < 1 or n > 5:
             continue
         rt = _get_request_type_from_issue(issue, field_ids)
-        by_rt[rt]['sum'] += n
-        by_rt[rt]['count'] += 1
-    out = {}
-    for rt, d in by_rt.items():
-        if d['count'] > 0:
-            out[rt] = {'avgNota': round(d['sum'] / d['count'], 2), 'count': d['count']}
+        sum_by_rt[rt] += n
+        count_by_rt[rt] += 1
+    out = {rt: {'avgNota': round(sum_by_rt[rt] / count, 2), 'count': count} for rt, count in count_by_rt.items()}
     return {'byRequestType': out}
 
 
 def stats_sla_by_request_type(issues, sla_by_key, field_ids):
     """% dentro do SLA por Request Type. Retorna { 'byRequestType': { rt: { met, total, pct } } }."""
-    from collections import defaultdict
-    by_rt = defaultdict(lambda: {'met': 0, 'total': 0})
+    met_by_rt = Counter()
+    total_by_rt = Counter()
     for issue in issues:
         key = issue.get('key')
         if not key:
@@ -3125,13 +3627,13 @@ def stats_sla_by_request_type(issues, sla_by_key, field_ids):
         if not slas:
             continue
         rt = _get_request_type_from_issue(issue, field_ids)
-        by_rt[rt]['total'] += 1
+        total_by_rt[rt] += 1
         if all(s.get('met', True) for s in slas):
-            by_rt[rt]['met'] += 1
+            met_by_rt[rt] += 1
     out = {}
-    for rt, d in by_rt.items():
-        if d['total'] > 0:
-            out[rt] = {'met': d['met'], 'total': d['total'], 'pct': round(100 * d['met'] / d['total'], 1)}
+    for rt, total in total_by_rt.items():
+        met = met_by_rt[rt]
+        out[rt] = {'met': met, 'total': total, 'pct': round(100 * met / total, 1)}
     return {'byRequestType': out}
 
 
@@ -3141,7 +3643,6 @@ def stats_ttr_frt_by_request_type_from_sla(issues, sla_by_key, field_ids):
     Fonte: sla_by_key (mesma da coluna SLAs). Sem fallback para campos do issue.
     Retorna { 'byRequestType': { rt: { count, avgResolutionHours, avgFirstResponseHours } }, 'requestTypeList': [...] }.
     """
-    from collections import defaultdict
     by_rt = defaultdict(lambda: {'count': 0, 'resolution_seconds': [], 'first_response_seconds': []})
     for issue in issues:
         key = issue.get('key')
@@ -3178,7 +3679,6 @@ def stats_ttr_frt_by_request_type_from_sla(issues, sla_by_key, field_ids):
 def stats_critical_pct_by_period(issues, field_ids, by_month=False):
     """% de tickets críticos por período com base na coluna Satisfaction do Jira (1 ou 2 = crítico).
     Retorna { 'byPeriod': [ { period, pctCritical, count, total, keys } ] } (keys = lista de issue_key com Satisfaction 1 ou 2 no período)."""
-    from collections import defaultdict
     by_period = defaultdict(lambda: {'critical': 0, 'total': 0, 'keys': []})
     for issue in issues:
         key = issue.get('key')
@@ -3220,7 +3720,7 @@ def get_first_comment_created_seconds(auth, issue_key, created_iso):
     if not created_dt:
         return None
     try:
-        r = requests.get(
+        r = _JIRA_SESSION.get(
             f'{JIRA_URL}/rest/api/3/issue/{issue_key}/comment',
             auth=auth,
             headers={'Accept': 'application/json'},
@@ -3229,7 +3729,7 @@ def get_first_comment_created_seconds(auth, issue_key, created_iso):
         )
         if r.status_code != 200:
             return None
-        data = r.json()
+        data = _response_json(r)
         comments = data.get('comments') or data.get('values') or []
         if not comments:
             return None
@@ -3254,7 +3754,7 @@ def fetch_issue_comments_text(auth, issue_key, max_comments=20):
     if not auth or not issue_key:
         return ''
     try:
-        r = requests.get(
+        r = _JIRA_SESSION.get(
             f'{JIRA_URL}/rest/api/3/issue/{issue_key}/comment',
             auth=auth,
             headers={'Accept': 'application/json'},
@@ -3263,7 +3763,7 @@ def fetch_issue_comments_text(auth, issue_key, max_comments=20):
         )
         if r.status_code != 200:
             return ''
-        data = r.json()
+        data = _response_json(r)
         comments = data.get('comments') or data.get('values') or []
         if not comments:
             return ''
@@ -3271,8 +3771,8 @@ def fetch_issue_comments_text(auth, issue_key, max_comments=20):
         for c in comments[:max_comments]:
             author = (c.get('author') or {}).get('displayName') or (c.get('author') or {}).get('name') or '—'
             created = (c.get('created') or '')[:19]
-            body = _description_to_plain_text(c.get('body'))
-            lines.append(f'[{created}] {author}: {body[:500]}')
+            body = _description_to_plain_text(c.get('body'), max_chars=500)
+            lines.append(f'[{created}] {author}: {body}')
         return '\n\n'.join(lines).strip()[:4000]
     except Exception:
         return ''
@@ -3284,7 +3784,6 @@ def stats_by_request_type(issues, field_ids, auth=None):
     Usa o campo Time to first response do Jira; quando vazio, usa primeiro comentário (created → 1º comentário) para preencher o gráfico.
     Retorna { 'byRequestType': { rt: { count, avgResolutionHours, avgFirstResponseHours } }, 'requestTypeList': [...] }.
     """
-    from concurrent.futures import ThreadPoolExecutor, as_completed
     by_rt = {}
     need_fallback = []
     for issue in issues:
@@ -3347,8 +3846,7 @@ def _normalize_for_keyword(s):
     if not s:
         return ''
     s = (s or '').lower().strip()
-    import unicodedata
-    return ''.join(c for c in unicodedata.normalize('NFD', s) if unicodedata.category(c) != 'Mn')
+    return _strip_accents(s)
 
 
 # Subcategorias por palavras-chave no ticket (título + descrição). Primeira que bater define a subcategoria.
@@ -3544,24 +4042,20 @@ def get_issue_subcategory_from_ollama(issue, ollama_url, model=None, field_ids=N
         for use_chat, url in [(True, f'{base}/api/chat'), (False, f'{base}/api/generate')]:
             try:
                 if use_chat:
-                    r = requests.post(
+                    r = _ollama_post(
                         url,
-                        json={
+                        {
                             'model': model,
                             'messages': [{'role': 'user', 'content': prompt}],
                             'stream': False,
                             'options': {'temperature': 0},
                         },
-                        timeout=90,
+                        90,
                     )
                 else:
-                    r = requests.post(
-                        url,
-                        json={'model': model, 'prompt': prompt, 'stream': False},
-                        timeout=90,
-                    )
+                    r = _ollama_post(url, {'model': model, 'prompt': prompt, 'stream': False}, 90)
                 if r.status_code == 200:
-                    data = r.json()
+                    data = _response_json(r)
                     content = _parse_content(data, use_chat)
                     if content:
                         break
@@ -3571,7 +4065,7 @@ def get_issue_subcategory_from_ollama(issue, ollama_url, model=None, field_ids=N
                 break
         if not content:
             return NO_KEYWORD_MATCH_LABEL
-        first_line = content.split('\n')[0].strip().rstrip('.;')
+        first_line = content.partition('\n')[0].strip().rstrip('.;')
         for label in labels:
             if first_line == label or first_line in label or label in first_line:
                 return label
@@ -3619,7 +4113,8 @@ def stats_keyword_breakdown_by_request_type_ollama(issues, field_ids, ollama_url
 
 def print_table(issues, field_ids, include_key=True):
     """Print a text table to stdout."""
-    rows = [get_row_values(iss, field_ids) for iss in issues]
+    row_fids = resolve_row_field_ids(field_ids)
+    rows = [get_row_values(iss, field_ids, row_fids) for iss in issues]
     cols = ['key'] + COLUMNS if include_key else COLUMNS
     widths = {c: max(len(str(c)), max((len(str(r.get(c, ''))) for r in rows), default=0)) for c in cols}
     widths = {c: min(w, 50) for c, w in widths.items()}
@@ -3638,7 +4133,8 @@ def print_table(issues, field_ids, include_key=True):
 
 def write_html(issues, field_ids, output_path, jql):
     """Write an HTML dashboard file."""
-    rows = [get_row_values(iss, field_ids) for iss in issues]
+    row_fids = resolve_row_field_ids(field_ids)
+    rows = [get_row_values(iss, field_ids, row_fids) for iss in issues]
     base_url = JIRA_URL.rstrip('/')
     key_link = lambda k: f'<a href="{base_url}/browse/{k}" target="_blank">{k}</a>'
 
@@ -3696,6 +4192,7 @@ def main():
     parser.add_argument('--no-key', action='store_true', help='Hide Key column in text output')
     parser.add_argument('--list-fields', metavar='SEARCH', nargs='?', const='', default=None,
                         help='List all Jira field names (and IDs). Optional SEARCH filters by name (e.g. "resolution", "Support")')
+    parser.add_argument('--refresh-fields', action='store_true', help='Ignore the on-disk Jira field cache and fetch /rest/api/3/field again')
     args = parser.parse_args()
 
     try:
@@ -3705,6 +4202,8 @@ def main():
         print('Set JIRA_EMAIL and JIRA_API_TOKEN (or use .env).', file=sys.stderr)
         sys.exit(1)
     auth = (email, api_token)
+    if args.refresh_fields:
+        clear_fields_cache(auth)
 
     if args.list_fields is not None:
         search = args.list_fields if args.list_fields != '' else None
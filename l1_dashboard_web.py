@@ -4,11 +4,14 @@ L1 Dashboard - Versão web (Flask). Roda no navegador, sem Tkinter.
 Use quando o app Tkinter falhar no macOS (ex.: "macOS 1507 required").
 """
 
+import calendar
 import os
 import sys
 import sqlite3
 import time
 import webbrowser
+from datetime import datetime
+from html import escape as html_escape
 from threading import Timer
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -68,7 +71,6 @@ def _sync_notas_to_sheet(notas):
     if err or not sh:
         return
     try:
-        from datetime import datetime
         ws = sh.worksheet('Notas') if 'Notas' in [s.title for s in sh.worksheets()] else sh.add_worksheet('Notas', rows=500, cols=6)
         _sheet_ensure_headers(ws, ['issue_key', 'nota', 'comentario', 'updated_at'])
         keys_in_sheet = ws.col_values(1)[1:]  # skip header
@@ -100,7 +102,6 @@ def _sync_auditoria_to_sheet(issue_key, analista, catalogo, preenchimento, soluc
     if err or not sh:
         return
     try:
-        from datetime import datetime
         ws = sh.worksheet('Auditoria') if 'Auditoria' in [s.title for s in sh.worksheets()] else sh.add_worksheet('Auditoria', rows=500, cols=10)
         _sheet_ensure_headers(ws, ['issue_key', 'analista', 'catalogo', 'preenchimento', 'solucao', 'comentarios', 'updated_at'])
         now = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
@@ -118,7 +119,6 @@ def _sync_pontos_to_sheet(pontos_por_issue):
     if err or not sh:
         return
     try:
-        from datetime import datetime
         ws = sh.worksheet('Pontos') if 'Pontos' in [s.title for s in sh.worksheets()] else sh.add_worksheet('Pontos', rows=500, cols=6)
         _sheet_ensure_headers(ws, ['issue_key', 'summary', 'melhorias', 'fortes', 'updated_at'])
         now = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
@@ -143,7 +143,6 @@ def _sync_feedback_analistas_to_sheet(by_analyst):
     if err or not sh:
         return
     try:
-        from datetime import datetime
         ws = sh.worksheet('Feedback Analistas') if 'Feedback Analistas' in [s.title for s in sh.worksheets()] else sh.add_worksheet('Feedback Analistas', rows=300, cols=6)
         _sheet_ensure_headers(ws, ['assignee', 'ticket_count', 'feedback', 'melhorias', 'fortes', 'updated_at'])
         now = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
@@ -184,15 +183,19 @@ from l1_dashboard import (
     resolve_custom_fields,
     search_jql,
     get_row_values,
+    build_column_extractors,
+    resolve_row_field_ids,
     get_row_values_for_columns,
     get_field_display_value,
     fetch_issue_sla,
     fetch_issue_sla_raw,
-    _sla_name_is_relevant,
+    _fetch_issue_sla_uncached,
+    _sla_item_is_relevant,
     _format_sla_list_for_ollama,
     get_issue_note_from_rovo,
     get_issue_note_from_agent,
     get_issue_note_from_ollama,
+    build_ollama_nota_prompt,
     get_issue_note_rule_based,
     fetch_issue_comments_text,
     stats_ttr_frt_by_request_type_from_sla,
@@ -201,18 +204,17 @@ from l1_dashboard import (
     stats_keyword_breakdown_by_request_type_ollama,
     stats_csat,
     stats_sla_aggregate,
-    stats_sla_pct_by_period,
+    stats_by_period,
     stats_sla_by_analyst,
-    stats_ttr_frt_by_period,
-    stats_nota_temporal,
     stats_nota_by_request_type,
     stats_sla_by_request_type,
     stats_critical_pct_by_period,
-    stats_csat_by_period,
     stats_csat_vs_nota,
     stats_csat_by_request_type,
-    stats_volume_by_period,
     stats_volume_by_analyst,
+    clear_ollama_cache,
+    clear_date_cache,
+    clear_sla_cache,
     stats_reopened_for_period,
     stats_reopened_for_date_range,
     _parse_jql_date_range,
@@ -2334,7 +2336,6 @@ def get_auth():
 
 @app.route('/')
 def index():
-    from datetime import datetime
     current_year = datetime.now().year
     years_list = list(range(current_year, current_year - 6, -1))
     return render_template_string(HTML_TEMPLATE, default_jql=DEFAULT_JQL, years_list=years_list)
@@ -2345,7 +2346,6 @@ def _jql_with_month_year(jql, month, year):
     Não substitui a JQL: adiciona AND created >= "YYYY-MM-01" AND created <= "YYYY-MM-DD"
     antes do ORDER BY, se existir, para manter a ordem.
     """
-    import calendar
     try:
         last_day = calendar.monthrange(int(year), int(month))[1]
         first = f'{year}-{month:02d}-01'
@@ -2380,11 +2380,10 @@ def buscar():
         if not jql:
             return jsonify({'error': 'JQL vazia.'})
         # Cache da busca (60s) para melhor desempenho em buscas repetidas
-        import time as _time
         cache_key = (jql, limit, filter_id or '')
         if getattr(app, '_search_cache', None):
             ck, expiry, cached = app._search_cache
-            if ck == cache_key and _time.time() < expiry:
+            if ck == cache_key and time.time() < expiry:
                 issues, field_ids, columns = cached
             else:
                 app._search_cache = None
@@ -2397,14 +2396,15 @@ def buscar():
                 except Exception:
                     columns = None
             issues = search_jql(auth, jql, field_ids, limit=limit, columns=columns)
-            app._search_cache = (cache_key, _time.time() + 60, (issues, field_ids, columns))
+            app._search_cache = (cache_key, time.time() + 60, (issues, field_ids, columns))
+            # Busca nova no Jira: SLAs também são relidos (o memo só vale para a lista/notas/pontos desta busca)
+            clear_sla_cache()
         else:
             issues, field_ids, columns = app._search_cache[2]
         base_url = JIRA_URL.rstrip('/')
-        from html import escape as html_escape
         # SLA: origem única no Jira. sla_by_key alimenta a coluna SLAs do modo lista; gráficos e análise Ollama (pontos fortes/melhoria) usam esses mesmos dados (sla_by_key_relevant para agregações).
         sla_by_key = _fetch_slas_for_issues(auth, issues)
-        sla_by_key_relevant = {k: [s for s in v if _sla_name_is_relevant(s.get('name'))] for k, v in sla_by_key.items()}
+        sla_by_key_relevant = {k: [s for s in v if _sla_item_is_relevant(s)] for k, v in sla_by_key.items()}
         if columns:
             # Colunas do filtro, exceto Time to resolution e Time to first response (ficam só na coluna única SLAs); Status no lugar se faltar
             skip_idx = set()
@@ -2428,8 +2428,11 @@ def buscar():
                 header_parts.append('<th>Status</th>')
             headers = ''.join(header_parts) + '<th class="satisfaction-cell">Satisfaction</th><th>Created</th><th>Updated</th><th class="nota-cell">Nota</th><th class="sla-header">SLAs</th>'
             html_rows = []
+            row_fids = resolve_row_field_ids(field_ids)
+            extractors = build_column_extractors(columns, field_ids)
             for issue in issues:
-                values = get_row_values_for_columns(issue, columns, field_ids)
+                values = get_row_values_for_columns(issue, columns, field_ids, extractors)
+                row = get_row_values(issue, field_ids, row_fids)
                 status_obj = (issue.get('fields') or {}).get('status')
                 status_txt = status_obj.get('name', '') if isinstance(status_obj, dict) else (str(status_obj) if status_obj else '')
                 created_txt = get_field_display_value(issue, 'created', field_ids)
@@ -2457,18 +2460,19 @@ def buscar():
                 desc_display = (desc_plain[:250] + '…') if len(desc_plain) > 250 else (desc_plain or '—')
                 desc_title = desc_plain.replace('"', '&quot;')[:800] if desc_plain else ''
                 cells.append(f'<td class="desc-cell" title="{desc_title}">{html_escape(desc_display)}</td>')
-                sat_txt = get_row_values(issue, field_ids).get('Satisfaction') or '—'
+                sat_txt = row.get('Satisfaction') or '—'
                 cells.append(f'<td class="satisfaction-cell">{html_escape(str(sat_txt))}</td>')
                 cells.append(f'<td>{html_escape(created_txt)}</td>')
                 cells.append(f'<td>{html_escape(updated_txt)}</td>')
                 cells.append(f'<td class="nota-cell" data-nota-key="{html_escape(key)}">—</td>')
                 cells.append(f'<td class="sla-cell">{_sla_inline_html(slas, html_escape)}</td>')
-                rt_attr = html_escape((get_row_values(issue, field_ids).get('Request Type') or '').strip() or '(sem tipo)')
+                rt_attr = html_escape((row.get('Request Type') or '').strip() or '(sem tipo)')
                 html_rows.append('<tr data-request-type="' + rt_attr + '">' + ''.join(cells) + '</tr>')
             headers = headers.replace('<th class="satisfaction-cell">Satisfaction</th><th>Created</th>', '<th>Descrição</th><th class="satisfaction-cell">Satisfaction</th><th>Created</th>', 1)
             table = f'<div class="table-wrap"><table><thead><tr>{headers}</tr></thead><tbody>' + ''.join(html_rows) + '</tbody></table></div><p class="count">Total: {len(issues)} issues</p>'
         else:
-            rows = [get_row_values(issue, field_ids) for issue in issues]
+            row_fids = resolve_row_field_ids(field_ids)
+            rows = [get_row_values(issue, field_ids, row_fids) for issue in issues]
             html_rows = []
             for idx, (r, issue) in enumerate(zip(rows, issues)):
                 key = r.get('key', '')
@@ -2511,18 +2515,16 @@ def buscar():
         stats['csat'] = stats_csat(issues, field_ids)
         stats['totalIssues'] = len(issues)  # total no período (para comparar com chamados com Satisfaction)
         stats['slaAggregate'] = stats_sla_aggregate(sla_by_key_relevant)
-        stats['slaPctByPeriod'] = stats_sla_pct_by_period(issues, sla_by_key_relevant, by_month=True)
+        # Séries mensais (SLA %, TTR/FRT, nota, CSAT, volume) numa única passada sobre os chamados
+        stats.update(stats_by_period(issues, field_ids, sla_by_key=sla_by_key_relevant, notas=_last_notas, by_month=True))
         stats['slaByAnalyst'] = stats_sla_by_analyst(issues, sla_by_key_relevant)
-        stats['ttrFrtByPeriod'] = stats_ttr_frt_by_period(issues, field_ids, by_month=True)
-        stats['notaTemporal'] = stats_nota_temporal(issues, _last_notas, by_month=True)
         stats['notaByRequestType'] = stats_nota_by_request_type(issues, _last_notas, field_ids)
         stats['slaByRequestType'] = stats_sla_by_request_type(issues, sla_by_key_relevant, field_ids)
         stats['criticalPctByPeriod'] = stats_critical_pct_by_period(issues, field_ids, by_month=True)
-        stats['csatByPeriod'] = stats_csat_by_period(issues, field_ids, by_month=True)
         stats['csatVsNota'] = stats_csat_vs_nota(issues, field_ids, _last_notas)
         stats['csatByRequestType'] = stats_csat_by_request_type(issues, field_ids)
-        stats['volumeByPeriod'] = stats_volume_by_period(issues, by_month=True)
         stats['volumeByAnalyst'] = stats_volume_by_analyst(issues)
+        clear_date_cache()
         # Reabertura separada da busca principal: use a seção 4 com período e botão "Buscar reabertos"
         stats['reopened'] = {'total': 0, 'byPeriod': [], 'keys': [], 'listHtml': ''}
         request_type_keys = {}
@@ -2559,7 +2561,6 @@ def api_buscar_reabertos():
         field_ids = resolve_custom_fields(auth)
         reopened = stats_reopened_for_period(auth, field_ids, month, year)
         base_url = JIRA_URL.rstrip('/')
-        from html import escape as html_escape
         reopened_issues = reopened.get('issues') or []
         list_html = ''
         if reopened_issues:
@@ -2604,9 +2605,12 @@ def _nota_is_evaluated(entry):
     return n is not None and isinstance(n, (int, float)) and 1 <= int(n) <= 5
 
 
-def _evaluate_one_issue(key, issue, field_ids, auth, ollama_url, ollama_model):
-    """Avalia um único chamado usando apenas Ollama. Várias tentativas; fallback para regras só se Ollama não responder após todas."""
+def _evaluate_one_issue(key, issue, field_ids, auth, ollama_url, ollama_model, sla_list=None):
+    """Avalia um único chamado usando apenas Ollama. Várias tentativas; fallback para regras só se Ollama não responder após todas.
+    sla_list: SLAs do chamado já buscados pelo lote (evita nova chamada ao Jira a cada passada)."""
     comments_text = fetch_issue_comments_text(auth, issue.get('key')) if auth else ''
+    # Contexto (descrição, Comments, SLAs) montado uma vez e reaproveitado em todas as tentativas
+    prompt = build_ollama_nota_prompt(issue, field_ids, comments_text=comments_text or None, auth=auth, sla_list=sla_list)
     max_tentativas = int(os.environ.get('OLLAMA_NOTAS_MAX_RETRIES', '5'))
     for tentativa in range(max_tentativas):
         r = get_issue_note_from_ollama(
@@ -2616,6 +2620,7 @@ def _evaluate_one_issue(key, issue, field_ids, auth, ollama_url, ollama_model):
             field_ids=field_ids,
             comments_text=comments_text or None,
             auth=auth,
+            prompt=prompt,
         )
         if _nota_is_evaluated(r):
             return r
@@ -2625,10 +2630,19 @@ def _evaluate_one_issue(key, issue, field_ids, auth, ollama_url, ollama_model):
     return {'nota': r.get('nota'), 'comentario': ('(regras, Ollama sem resposta) ' + (r.get('comentario') or ''))[:200]}
 
 
+def _nota_after_error(issue, field_ids, err):
+    """Nota de um chamado cuja avaliação levantou exceção: por regras, com o erro no comentário; nota None se as regras também falharem."""
+    try:
+        r = get_issue_note_rule_based(issue, field_ids)
+        return {'nota': r.get('nota'), 'comentario': (f'(regras, erro na avaliação: {err}) ' + (r.get('comentario') or ''))[:200]}
+    except Exception:
+        return {'nota': None, 'comentario': f'Erro na avaliação: {err}'[:200]}
+
+
 def _run_evaluate_all_until_complete(force_reavaliar=False):
     """
     Usa cache + SQLite para saber quem já tem nota (exceto se force_reavaliar=True).
-    Avalia chamado por chamado (um por vez). Só encerra quando todas as linhas do resultado atual tiverem nota (1–5).
+    Avalia chamado por chamado (um por vez). Só encerra quando todas as linhas do resultado atual tiverem nota (1–5); um chamado cuja avaliação levanta exceção recebe nota por regras.
     Persiste no SQLite após cada avaliação.
     Se force_reavaliar=True, ignora cache e banco e reavalia todos os chamados do resultado atual.
     """
@@ -2664,16 +2678,33 @@ def _run_evaluate_all_until_complete(force_reavaliar=False):
             out[k] = loaded.get(k) or cache.get(k) or {'nota': None, 'comentario': '—'}
     keys_sem_nota = [k for k in keys if not _nota_is_evaluated(out[k])]
 
+    # Vários chamados em paralelo (OLLAMA_NOTAS_WORKERS); persiste a cada resultado, como no fluxo sequencial
+    try:
+        max_workers = max(1, int(os.environ.get('OLLAMA_NOTAS_WORKERS', '4') or 1))
+    except ValueError:
+        max_workers = 4  # valor inválido no .env: usa o padrão em vez de quebrar o cálculo de notas
+    # SLAs buscados uma vez para o lote; as passadas seguintes (reavaliação) não voltam ao Jira
+    sla_by_key = _fetch_slas_for_issues(auth, [issue_by_key[k] for k in keys_sem_nota]) if auth and keys_sem_nota else {}
+    falhou = set()  # chamados cuja avaliação levantou exceção e nem as regras deram nota: não entram de novo no laço
     while keys_sem_nota:
-        for key in keys_sem_nota:
-            issue = issue_by_key.get(key)
-            if not issue:
-                continue
-            result = _evaluate_one_issue(key, issue, field_ids, auth, ollama_url, ollama_model)
-            out[key] = result
-            _last_notas = dict(out)
-            _save_notas_to_db(out)
-        keys_sem_nota = [k for k in keys if not _nota_is_evaluated(out[k])]
+        pending = [k for k in keys_sem_nota if issue_by_key.get(k)]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(_evaluate_one_issue, key, issue_by_key[key], field_ids, auth, ollama_url, ollama_model, sla_by_key.get(key)): key
+                for key in pending
+            }
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    out[key] = future.result()
+                except Exception as e:
+                    # Um chamado com erro não derruba o lote (nem descarta as notas dos outros)
+                    out[key] = _nota_after_error(issue_by_key[key], field_ids, e)
+                    if not _nota_is_evaluated(out[key]):
+                        falhou.add(key)
+                _last_notas = dict(out)
+                _save_notas_to_db(out)
+        keys_sem_nota = [k for k in keys if not _nota_is_evaluated(out[k]) and k not in falhou]
         if keys_sem_nota:
             time.sleep(1)
 
@@ -2759,6 +2790,8 @@ def api_notas_restante():
 def api_notas_reavaliar():
     """Reavalia todas as notas do resultado atual: ignora cache e banco, recalcula todas via Ollama (valida todas as notas)."""
     try:
+        # Relê /api/tags e a ordem dos endpoints (ex.: modelo instalado depois da última leitura)
+        clear_ollama_cache()
         out, err = _run_evaluate_all_until_complete(force_reavaliar=True)
         if err:
             return jsonify({'error': err}), 400
@@ -3005,7 +3038,8 @@ def sla(issue_key):
     try:
         auth = get_auth()
         debug = request.args.get('debug', '').lower() in ('1', 'true', 'yes')
-        slas = fetch_issue_sla(auth, issue_key)
+        # Com debug, sem o memo: os SLAs processados e a resposta bruta vêm da mesma leitura recente do Jira
+        slas = _fetch_issue_sla_uncached(auth, issue_key.strip()) if debug else fetch_issue_sla(auth, issue_key)
         out = {'issue_key': issue_key, 'slas': slas}
         if debug:
             status, raw, err = fetch_issue_sla_raw(auth, issue_key)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Teste: memos em memória (Ollama, SLA do Jira) e campos pedidos ao Jira, com HTTP simulado (sem Jira/Ollama).
+Rode: python -m pytest test_caches.py
+"""
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import l1_dashboard as dash
+
+
+AUTH = ('analista@exemplo.com', 'token')
+
+
+def test_sla_memo_reaproveita_e_devolve_copia():
+    slas = [{'name': 'Time to resolution', 'met': True}]
+    with patch.object(dash, '_fetch_issue_sla_uncached', return_value=slas) as fetch:
+        a = dash.fetch_issue_sla(AUTH, 'IT-1')
+        a.append('lixo')
+        a[0]['met'] = False
+        b = dash.fetch_issue_sla(AUTH, ' IT-1 ')
+    assert fetch.call_count == 1
+    assert b == [{'name': 'Time to resolution', 'met': True}]
+    assert b[0] is not a[0]
+
+
+def test_sla_memo_expira_e_nao_guarda_vazio():
+    with patch.object(dash, '_fetch_issue_sla_uncached', return_value=[]) as fetch:
+        dash.fetch_issue_sla(AUTH, 'IT-1')
+        dash.fetch_issue_sla(AUTH, 'IT-1')
+    assert fetch.call_count == 2
+    with patch.object(dash, '_SLA_CACHE_TTL', -1), \
+            patch.object(dash, '_fetch_issue_sla_uncached', return_value=[{'name': 'x'}]) as fetch:
+        dash.fetch_issue_sla(AUTH, 'IT-2')
+        dash.fetch_issue_sla(AUTH, 'IT-2')
+    assert fetch.call_count == 2
+
+
+def test_sla_memo_limitado_sai_o_mais_antigo():
+    with patch.object(dash, '_SLA_CACHE_MAX', 3), \
+            patch.object(dash, '_fetch_issue_sla_uncached', side_effect=lambda auth, key: [{'name': key}]):
+        for i in range(5):
+            dash.fetch_issue_sla(AUTH, f'IT-{i}')
+        assert [k[1] for k in dash._sla_cache] == ['IT-2', 'IT-3', 'IT-4']
+
+
+def test_sla_memo_em_varias_threads():
+    """Mesmo padrão de _fetch_slas_for_issues (12 threads): sem erro de dict alterado durante iteração, tamanho limitado."""
+    keys = [f'IT-{i}' for i in range(2000)]
+    with patch.object(dash, '_SLA_CACHE_MAX', 50), \
+            patch.object(dash, '_fetch_issue_sla_uncached', side_effect=lambda auth, key: [{'name': key}]):
+        with ThreadPoolExecutor(max_workers=12) as executor:
+            results = list(executor.map(lambda k: dash.fetch_issue_sla(AUTH, k), keys))
+        assert len(dash._sla_cache) <= 50
+    assert results == [[{'name': k}] for k in keys]
+
+
+def test_tags_memo_ate_limpar(sessao_http, resposta_http):
+    base = 'http://ollama-teste'
+    sessao = sessao_http({'/api/tags': resposta_http(payload={'models': [{'name': 'llama3.2'}, {'name': 'qwen2.5'}]})})
+    with patch.object(dash, '_OLLAMA_SESSION', sessao):
+        assert dash._ollama_installed_models(base) == (200, ['llama3.2', 'qwen2.5'])
+        assert dash._ollama_installed_models(base) == (200, ['llama3.2', 'qwen2.5'])
+        assert sessao.get.call_count == 1
+        dash.clear_ollama_cache()
+        dash._ollama_installed_models(base)
+        assert sessao.get.call_count == 2
+
+
+def test_tags_uma_leitura_com_threads_simultaneas(sessao_http, resposta_http):
+    sessao = sessao_http({'/api/tags': resposta_http(payload={'models': [{'name': 'm1'}]})})
+    start = threading.Barrier(8)
+
+    def call(_):
+        start.wait()
+        return dash._ollama_installed_models('http://ollama-teste')
+    with patch.object(dash, '_OLLAMA_SESSION', sessao):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(call, range(8)))
+    assert sessao.get.call_count == 1
+    assert results == [(200, ['m1'])] * 8
+
+
+def test_ordem_dos_modelos():
+    assert dash._build_models_to_try(('m1', 'llama3.2'), 'm2')[:4] == ('m1', 'llama3.2', 'm2', 'llama3.1')
+    assert dash._build_models_to_try((), '')[0] == 'llama3.2'
+
+
+def test_reabertos_pedem_so_os_campos_da_tabela():
+    field_ids = {'Request Type': 'customfield_1', 'Satisfaction': 'customfield_2', 'Time to resolution': 'customfield_3'}
+    with patch.object(dash, 'search_jql', return_value=[{'key': 'IT-1'}]) as busca:
+        out = dash.stats_reopened_for_period(AUTH, field_ids, 1, 2025)
+    assert out['keys'] == ['IT-1']
+    fields = busca.call_args.kwargs['fields']
+    assert fields == dash.get_reopened_field_ids(field_ids)
+    assert 'customfield_3' not in fields and 'resolutiondate' not in fields
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Teste: camada HTTP do Ollama e análise de pontos, com respostas simuladas (sem Ollama/Jira).
+Rode: python -m pytest test_ollama_http.py
+"""
+import os
+import sys
+from unittest.mock import patch
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import l1_dashboard as dash
+
+
+BASE = 'http://ollama-teste'
+ISSUE = {'key': 'IT-1', 'fields': {'summary': 'T', 'description': 'd'}}
+MELHORIA = 'Melhoria: O analista demorou para responder o cliente.'
+
+
+def test_endpoint_que_funcionou_passa_a_ser_o_primeiro(sessao_http, resposta_http):
+    sessao = sessao_http({
+        '/api/generate': resposta_http(404),
+        '/api/chat': resposta_http(payload={'message': {'content': MELHORIA}}),
+    })
+    with patch.dict(dash._ollama_preferred_endpoint, clear=True), \
+            patch.object(dash, '_ollama_installed_models', return_value=(200, ['m1'])), \
+            patch.object(dash, '_OLLAMA_SESSION', sessao):
+        assert [e[0] for e in dash._ollama_endpoints_for(BASE)][0] == '/api/generate'
+        out = dash.get_issue_pontos_ollama(ISSUE, BASE, mode='melhoria')
+        assert out['melhorias'] == ['O analista demorou para responder o cliente.']
+        assert dash._ollama_preferred_endpoint[BASE] == '/api/chat'
+        assert [e[0] for e in dash._ollama_endpoints_for(BASE)] == ['/api/chat', '/api/generate', '/v1/chat/completions']
+        sessao.urls.clear()
+        dash.get_issue_pontos_ollama(ISSUE, BASE, mode='melhoria')
+        assert sessao.urls == [BASE + '/api/chat']
+
+
+def _stream(sessao_http, r, stop_when):
+    """_ollama_post_stream em /api/generate com a resposta r."""
+    with patch.object(dash, '_OLLAMA_SESSION', sessao_http({'/api/generate': r})):
+        return dash._ollama_post_stream(BASE + '/api/generate', {}, dash._OLLAMA_STREAM_CHUNK['/api/generate'], 5, stop_when)
+
+
+def test_stream_sem_parada_devolve_tudo(sessao_http, resposta_http):
+    r = resposta_http(linhas=[{'response': 'a\n'}, {'response': 'b'}, {'done': True}])
+    assert _stream(sessao_http, r, lambda t: False) == ('ok', 'a\nb')
+
+
+def test_stream_para_cedo_e_devolve_so_o_trecho_verificado(sessao_http, resposta_http):
+    r = resposta_http(linhas=[{'response': p} for p in ('linha 1\nlinha', ' 2\nfrag', 'mento\n', 'nunca lido\n')])
+    assert _stream(sessao_http, r, lambda t: t.count('\n') >= 1) == ('ok', 'linha 1\nlinha 2')
+    assert {'response': 'nunca lido\n'} not in r.lidas
+
+
+def _pontos_em_stream(sessao_http, resposta_http, linhas):
+    """get_issue_pontos_ollama com /api/generate respondendo as linhas em pedaços NDJSON; devolve (resultado, resposta)."""
+    r = resposta_http(linhas=[{'response': t + '\n'} for t in linhas] + [{'done': True}])
+    with patch.dict(dash._ollama_preferred_endpoint, clear=True), \
+            patch.object(dash, '_ollama_installed_models', return_value=(200, ['m1'])), \
+            patch.object(dash, '_OLLAMA_SESSION', sessao_http({'/api/generate': r})):
+        return dash.get_issue_pontos_ollama(ISSUE, BASE, mode='melhoria'), r
+
+
+def test_stream_de_pontos_le_ate_o_fim_enquanto_o_resultado_pode_mudar(sessao_http, resposta_http):
+    """Cinco melhorias não bastam para parar: o forte que chega depois ainda remove a melhoria contraditória."""
+    linhas = [
+        'Melhoria: FRT estourado na primeira resposta.',
+        'Melhoria: Documentar melhor a solução aplicada no chamado.',
+        'Melhoria: Confirmar com o usuário antes de encerrar o chamado.',
+        'Melhoria: Registrar a causa raiz do incidente no chamado.',
+        MELHORIA,
+        'Forte: FRT cumprido dentro do SLA.',
+    ]
+    out, r = _pontos_em_stream(sessao_http, resposta_http, linhas)
+    assert out == dash._parse_pontos_ollama_response('\n'.join(linhas))
+    assert 'Melhoria: FRT estourado na primeira resposta.' not in out['melhorias']
+    assert r.lidas[-1] == {'done': True}
+
+
+def test_stream_de_pontos_para_com_cinco_de_cada(sessao_http, resposta_http):
+    melhorias = [f'Melhoria: Ponto {i} a melhorar no atendimento do chamado.' for i in range(1, 6)]
+    fortes = [f'Forte: Comunicação clara com o cliente, ponto {i}.' for i in range(1, 6)]
+    out, r = _pontos_em_stream(sessao_http, resposta_http, melhorias + fortes + ['Melhoria: Nunca lida pelo cliente HTTP.'])
+    assert out == dash._parse_pontos_ollama_response('\n'.join(melhorias + fortes))
+    assert {'response': 'Melhoria: Nunca lida pelo cliente HTTP.\n'} not in r.lidas
+
+
+def test_erro_de_conexao_repete_so_o_mesmo_endpoint(sessao_http, resposta_http):
+    """Conexão recusada em /api/generate: um backoff e uma nova tentativa ali, depois /api/chat (não desiste do chamado)."""
+    sessao = sessao_http({
+        '/api/generate': requests.exceptions.ConnectionError('recusada'),
+        '/api/chat': resposta_http(payload={'message': {'content': MELHORIA}}),
+    })
+    with patch.dict(dash._ollama_preferred_endpoint, clear=True), \
+            patch.object(dash, '_ollama_installed_models', return_value=(200, ['m1'])), \
+            patch.object(dash, '_OLLAMA_SESSION', sessao), \
+            patch.object(dash.time, 'sleep') as sleep:
+        out = dash.get_issue_pontos_ollama(ISSUE, BASE, mode='melhoria')
+    assert out['melhorias'] == ['O analista demorou para responder o cliente.']
+    assert sessao.urls == [BASE + '/api/generate', BASE + '/api/generate', BASE + '/api/chat']
+    assert sleep.call_count == 1
+
+
+def _issues_melhoria(n):
+    issues = [{'key': f'K-{i}', 'fields': {'sat': {'rating': 1}, 'summary': f'T{i}'}} for i in range(n)]
+    sla = {i['key']: [{'name': 'Time to resolution', 'met': False}] for i in issues}
+    return issues, sla
+
+
+def test_pontos_em_paralelo_mantem_ordem_dos_candidatos():
+    issues, sla = _issues_melhoria(5)
+
+    def fake(issue, modes, *args):
+        return {m: {'melhorias': [f'Ponto do chamado {issue["key"]} para melhorar.'], 'fortes': []} for m in modes}
+    with patch.object(dash, '_pontos_for_candidate', side_effect=fake):
+        out = dash.stats_pontos_melhoria_fortes(issues, BASE, {'Satisfaction': 'sat'}, sla_by_key=sla)
+    assert [p['key'] for p in out['pontosPorIssue']] == ['K-0', 'K-1', 'K-2', 'K-3', 'K-4']
+
+
+def test_pontos_falha_num_candidato_perde_so_ele():
+    issues, sla = _issues_melhoria(3)
+
+    def fake(issue, modes, *args):
+        if issue['key'] == 'K-1':
+            raise RuntimeError('Ollama fora do ar')
+        return {m: {'melhorias': ['Responder o cliente mais rápido.'], 'fortes': []} for m in modes}
+    with patch.object(dash, '_pontos_for_candidate', side_effect=fake):
+        out = dash.stats_pontos_melhoria_fortes(issues, BASE, {'Satisfaction': 'sat'}, sla_by_key=sla)
+    assert [p['key'] for p in out['pontosPorIssue']] == ['K-0', 'K-2']
+    assert out['top5Melhoria'][0]['keys'] == ['K-0', 'K-2']
+
+
+def test_candidato_nos_dois_modos_monta_contexto_uma_vez():
+    with patch.object(dash, '_issue_context_full_for_pontos', return_value='ctx') as ctx, \
+            patch.object(dash, 'get_issue_pontos_ollama', side_effect=lambda *a, **kw: {'mode': kw['mode'], 'context': kw['context']}):
+        out = dash._pontos_for_candidate(ISSUE, ['melhoria', 'fortes'], BASE, {}, None, {})
+    assert ctx.call_count == 1
+    assert out == {'melhoria': {'mode': 'melhoria', 'context': 'ctx'}, 'fortes': {'mode': 'fortes', 'context': 'ctx'}}
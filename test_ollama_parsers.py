@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Teste: parsers das respostas do Ollama (nota e pontos), sem chamar o Ollama.
+Rode: python -m pytest test_ollama_parsers.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import l1_dashboard as dash
+
+
+def test_nota_usa_so_o_primeiro_objeto():
+    """Um segundo objeto JSON depois do primeiro não pode trocar a nota (fallbacks olham só o primeiro objeto)."""
+    out = dash._parse_ollama_nota_response("{'nota': 3} {\"nota\": 4, \"comentario\": \"bom\"}")
+    assert out == {'nota': 3, 'comentario': 'OK'}
+
+
+def test_nota_json_simples():
+    assert dash._parse_ollama_nota_response('{"nota": 4, "comentario": "ok"}') == {'nota': 4, 'comentario': 'ok'}
+    assert dash._parse_ollama_nota_response('```json\n{"nota": "5", "comentario": "bom"}\n```') == {'nota': 5, 'comentario': 'bom'}
+    assert dash._parse_ollama_nota_response('Avaliação:\n{"nota": 2} texto depois') == {'nota': 2, 'comentario': 'OK'}
+
+
+def test_pontos_separa_melhorias_e_fortes():
+    out = dash._parse_pontos_ollama_response(
+        'Melhoria: O analista demorou para responder o cliente.\n'
+        'Forte: Comunicação clara com o cliente durante todo o chamado.\n'
+        '- Documentar a solução aplicada no chamado.'
+    )
+    assert out['melhorias'] == ['O analista demorou para responder o cliente.', 'Documentar a solução aplicada no chamado.']
+    assert out['fortes'] == ['Comunicação clara com o cliente durante todo o chamado.']
+
+
+def test_pontos_remove_contradicao():
+    """TTR estourado em melhoria remove 'TTR dentro do SLA' de fortes."""
+    out = dash._parse_pontos_ollama_response('Melhoria: TTR estourado no chamado.\nForte: TTR dentro do SLA no chamado.')
+    assert out == {'melhorias': ['TTR estourado no chamado.'], 'fortes': []}